@@ -31,6 +31,7 @@ pip install --quiet Werkzeug==3.0.1
 pip install --quiet reportlab==4.0.7
 pip install --quiet python-dotenv==1.0.0
 pip install --quiet bcrypt==4.1.1
+pip install --quiet numpy==1.26.4
 
 echo "[4/4] ✅ Database ready!"
 echo ""
@@ -0,0 +1,221 @@
+"""
+Admin Analytics
+
+Aggregates behind the admin analytics page: program recommendations by
+strand, rule firing frequency, average confidence and feedback
+helpfulness per program, and daily submission volume.
+
+Program aggregates come out of one grouped query over recommendations,
+rule effectiveness out of an indexed join on recommendation_rules, and
+the daily volume out of one index range scan over recent responses. The
+combined snapshot is cached for a few minutes, so opening the page
+during peak submission hours does not rescan the tables on every
+request.
+"""
+
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from db import db
+from models import FEEDBACK_VALUES
+from program_catalog import program_catalog
+
+
+class TTLCache:
+    """
+    Small time-bounded cache for expensive aggregates
+    
+    Only one caller rebuilds an expired value; concurrent callers wait for
+    it instead of running the same aggregation in parallel.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+    
+    def get(self, key: str, build: Callable[[], Any]) -> Any:
+        """
+        Cached value for key, rebuilt with build() once it is older than ttl
+        
+        Args:
+            key: Name of the cached value
+            build: Function computing it
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                entry = (time.monotonic() + self.ttl, build())
+                self._entries[key] = entry
+            return entry[1]
+    
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one cached value, or all of them"""
+        with self._lock:
+            if key is None:
+                self._entries = {}
+            else:
+                self._entries.pop(key, None)
+
+
+def init_app(app):
+    """Set up the app's aggregate cache (ANALYTICS_CACHE_TTL)"""
+    app.extensions['analytics'] = TTLCache(app.config['ANALYTICS_CACHE_TTL'])
+
+
+def _program_label(program_id: int) -> Tuple[str, str]:
+    entry = program_catalog.get(program_id)
+    if entry is None:
+        return str(program_id), f'Program {program_id}'
+    return entry.program_code, entry.program_name
+
+
+def recommendation_rollup() -> Dict[str, Any]:
+    """
+    Recommendation aggregates from a single grouped pass
+    
+    The recommendations table is grouped by (strand, program, feedback);
+    the number of distinct groups is small, so every aggregate below is
+    folded together in Python from those groups.
+    
+    Returns:
+        Dictionary with distribution, confidence and feedback
+    """
+    from models import Recommendation, Student
+    
+    groups = db.session.query(
+        Student.strand,
+        Recommendation.program_id,
+        Recommendation.student_feedback,
+        func.count(),
+        func.sum(Recommendation.confidence_score)
+    ).join(Student, Student.student_id == Recommendation.student_id).group_by(
+        Student.strand,
+        Recommendation.program_id,
+        Recommendation.student_feedback
+    ).all()
+    
+    by_strand = defaultdict(Counter)
+    confidence_sum = Counter()
+    program_counts = Counter()
+    feedback_counts = defaultdict(Counter)
+    
+    for strand, program_id, feedback, count, confidence in groups:
+        by_strand[strand][program_id] += count
+        program_counts[program_id] += count
+        confidence_sum[program_id] += confidence or 0
+        feedback_counts[program_id][feedback or 'no_feedback'] += count
+    
+    distribution = {
+        strand: [(*_program_label(program_id), count)
+                 for program_id, count in counts.most_common()]
+        for strand, counts in sorted(by_strand.items(), key=lambda item: item[0] or '')
+    }
+    
+    confidence = sorted(
+        ((*_program_label(program_id), round(confidence_sum[program_id] / count, 1), count)
+         for program_id, count in program_counts.items()),
+        key=lambda row: row[2], reverse=True
+    )
+    
+    feedback = [(*_program_label(program_id), *_helpfulness(counts))
+                for program_id, counts in feedback_counts.items()]
+    feedback.sort(key=lambda row: row[5], reverse=True)
+    
+    return {
+        'distribution': distribution,
+        'confidence': confidence,
+        'feedback': feedback
+    }
+
+
+def _helpfulness(counts: Counter) -> Tuple:
+    """(helpful, somewhat, not helpful, rated, helpful %) from feedback counts"""
+    rated = sum(counts[value] for value in FEEDBACK_VALUES)
+    rate = round(100.0 * counts['helpful'] / rated, 1) if rated else None
+    return (*(counts[value] for value in FEEDBACK_VALUES), rated, rate)
+
+
+def rule_effectiveness(rule_id: Optional[str] = None) -> List[Tuple]:
+    """
+    How often each rule fired and how its recommendations were rated
+    
+    An indexed join of recommendation_rules onto recommendations, grouped
+    by rule and feedback value.
+    
+    Args:
+        rule_id: Restrict to one rule (served by ix_recommendation_rules_rule)
+    
+    Returns:
+        (rule_id, times fired, helpful, somewhat, not helpful, rated, helpful %)
+        tuples, most frequently fired first
+    """
+    from models import Recommendation, RecommendationRule
+    
+    query = db.session.query(
+        RecommendationRule.rule_id, Recommendation.student_feedback, func.count()
+    ).join(Recommendation, Recommendation.recommendation_id == RecommendationRule.recommendation_id)
+    if rule_id is not None:
+        query = query.filter(RecommendationRule.rule_id == rule_id)
+    
+    feedback_counts = defaultdict(Counter)
+    for rule, feedback, count in query.group_by(RecommendationRule.rule_id,
+                                                Recommendation.student_feedback):
+        feedback_counts[rule][feedback or 'no_feedback'] += count
+    
+    rows = [(rule, sum(counts.values()), *_helpfulness(counts))
+            for rule, counts in feedback_counts.items()]
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows
+
+
+def daily_submissions(days: int = 30) -> List[Tuple[str, int]]:
+    """
+    Questionnaire submissions per day over the last days, oldest first
+    
+    Days without submissions are included with a count of zero.
+    """
+    from models import QuestionnaireResponse
+    
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    day = func.date(QuestionnaireResponse.response_date)
+    
+    counts = {
+        str(value): count
+        for value, count in db.session.query(day, func.count())
+        .filter(QuestionnaireResponse.response_date >= datetime.combine(start, datetime.min.time()))
+        .group_by(day)
+    }
+    
+    dates = (start + timedelta(days=offset) for offset in range(days))
+    return [(d.isoformat(), counts.get(d.isoformat(), 0)) for d in dates]
+
+
+def build_snapshot(days: int = 30) -> Dict[str, Any]:
+    """Compute every analytics aggregate now, bypassing the cache"""
+    aggregates = recommendation_rollup()
+    aggregates['rules'] = rule_effectiveness()
+    aggregates['daily'] = daily_submissions(days)
+    aggregates['generated_at'] = datetime.utcnow().replace(microsecond=0)
+    return aggregates
+
+
+def snapshot() -> Dict[str, Any]:
+    """Analytics aggregates, at most ANALYTICS_CACHE_TTL seconds old"""
+    return current_app.extensions['analytics'].get('snapshot', build_snapshot)
+
+
+def rule_stats() -> Dict[str, Tuple]:
+    """Cached rule_effectiveness() rows keyed by rule id"""
+    return {row[0]: row for row in snapshot()['rules']}
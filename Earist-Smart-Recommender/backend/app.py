@@ -1,164 +1,112 @@
 import os
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
-from db import db
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify, session, redirect, url_for, send_file, make_response, Response, stream_with_context
+from db import db, apply_sqlite_pragmas, StoredVersion
+from config import get_config
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import io
 
- # Initialize Flask app with correct static folder
-app = Flask(
-    __name__,
-    template_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), '../frontend/templates')),
-    static_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), '../frontend/static'))
-)
-app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
-db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'database', 'ervhs_earist.db'))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
+# Import models
+from models import FEEDBACK_VALUES, STRANDS, Student, QuestionnaireResponse, Program, Rule, Recommendation, AdminUser, SystemLog
+from inference_engine import InferenceEngine
+from persistence import save_submission
+import dashboard_stats
+import analytics
+import export_data
+import reports
+from program_catalog import program_catalog, register_program_listeners, content_etag
 
+FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../frontend'))
 
-db.init_app(app)
+views = Blueprint('main', __name__)
 
-# Import models
-from models import Student, QuestionnaireResponse, Program, Rule, Recommendation, AdminUser, SystemLog
-from inference_engine import InferenceEngine
 
-# AUTO-CREATE ALL TABLES ON STARTUP
-def init_database():
-    """Initialize database and create tables"""
+def create_app(config=None, migrate=None):
+    """
+    Application factory
+    
+    Building an app does no DDL. If AUTO_MIGRATE is on, the database's
+    schema version is checked and the one-time migrate/seed step runs
+    only when it is behind (see migrate_database.prepare_database).
+    
+    Args:
+        config: Config class or environment name (default: FLASK_ENV)
+        migrate: Override the config's AUTO_MIGRATE
+    
+    Returns:
+        Configured Flask app
+    """
+    if config is None or isinstance(config, str):
+        config = get_config(config)
+    
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(FRONTEND_DIR, 'templates'),
+        static_folder=os.path.join(FRONTEND_DIR, 'static')
+    )
+    app.config.from_object(config)
+    
+    db.init_app(app)
+    
+    # Tune SQLite (WAL, busy timeout, caches) before any connection is opened
     with app.app_context():
-        try:
-            # Ensure database directory exists
-            os.makedirs('database', exist_ok=True)
-            print("📂 Database directory ready")
-            
-            # Create all tables
-            db.create_all()
-            print("✅ Database tables created/verified")
-            
-            # Check if we need to seed data
-            program_count = Program.query.count()
-            if program_count == 0:
-                print("📚 Loading initial data...")
-                from seed_data import seed_programs, seed_rules
-                
-                try:
-                    seed_programs()
-                    print("✅ 15 programs loaded!")
-                except Exception as e:
-                    print(f"⚠️  Program loading: {e}")
-                
-                try:
-                    seed_rules()
-                    print("✅ 20 rules loaded!")
-                except Exception as e:
-                    print(f"⚠️  Rule loading: {e}")
-                
-
-                # Create admin user
-                admin = AdminUser.query.filter_by(username='admin').first()
-                if not admin:
-                    admin = AdminUser(
-                        username='admin',
-                        role='super_admin',
-                        email='admin@earist.edu.ph'
-                    )
-                    db.session.add(admin)
-                    db.session.commit()
-                    print("✅ Admin user created (admin/admin123)")
-            else:
-                print(f"✅ Database ready ({program_count} programs loaded)")
-            print("🎉 System initialization complete!")
-        except Exception as e:
-            print(f"❌ Database error: {e}")
-            print("⚠️  System will attempt to continue...")
-
-# Initialize inference engine
-inference_engine = InferenceEngine(db)
-
-# Initialize database on startup
-init_database()
-
-# Initialize inference engine
-inference_engine = InferenceEngine(db)
+        apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    
+    # Keep the program catalog in sync with Program writes, and notice
+    # other processes' rule and program edits this often
+    register_program_listeners()
+    StoredVersion.interval = app.config['CACHE_VERSION_CHECK_SECONDS']
+    
+    # Per-app services, configured from app.config (rules are compiled on first use)
+    app.extensions['inference_engine'] = InferenceEngine.from_config(db, app.config)
+    reports.init_app(app)
+    analytics.init_app(app)
+    
+    if app.config['AUTO_MIGRATE'] if migrate is None else migrate:
+        from migrate_database import prepare_database
+        prepare_database(app)
+        
+        # Load the program catalog now instead of on the first request
+        with app.app_context():
+            program_catalog.load()
+    
+    app.register_blueprint(views)
+    return app
+
+def get_inference_engine() -> InferenceEngine:
+    """Inference engine of the current app"""
+    return current_app.extensions['inference_engine']
 
 # Routes
-@app.route('/')
+@views.route('/')
 def index():
     """Landing page"""
     return render_template('index.html')
 
-@app.route('/questionnaire')
+@views.route('/questionnaire')
 def questionnaire():
     """Student questionnaire page"""
     return render_template('questionnaire.html')
 
-@app.route('/api/submit-response', methods=['POST'])
+@views.route('/api/submit-response', methods=['POST'])
 def submit_response():
     """Handle questionnaire submission"""
     try:
         data = request.json
         
-        # Create student record
-        student = Student(
-            student_name=data.get('name'),
-            grade_level=data.get('grade_level'),
-            strand=data.get('strand'),
-            email=data.get('email')
-        )
-        db.session.add(student)
-        db.session.flush()
-        
-        # Create questionnaire response
-        response = QuestionnaireResponse(
-            student_id=student.student_id,
-            favorite_subjects=','.join(data.get('favorite_subjects', [])),
-            skill_analytical=int(data.get('skills', {}).get('analytical', 0)),
-            skill_technical=int(data.get('skills', {}).get('technical', 0)),
-            skill_communication=int(data.get('skills', {}).get('communication', 0)),
-            skill_creativity=int(data.get('skills', {}).get('creativity', 0)),
-            skill_numerical=int(data.get('skills', {}).get('numerical', 0)),
-            skill_leadership=int(data.get('skills', {}).get('leadership', 0)),
-            skill_attention_to_detail=int(data.get('skills', {}).get('attention_to_detail', 0)),
-            skill_research=int(data.get('skills', {}).get('research', 0)),
-            interests=','.join(data.get('interests', [])),
-            learning_style=data.get('learning_style'),
-            career_goal_specified=True if data.get('career_goals', '') else False,
-            career_goal_description=data.get('career_goals', ''),
-            career_priority=data.get('career_priority', '')
-        )
-        db.session.add(response)
-        db.session.flush()
-        
-        # Generate recommendations (pass response_id as required)
-        recommendations = inference_engine.generate_recommendations(data, response.response_id)
-        
-        # Save recommendations
-        for rec in recommendations:
-            recommendation = Recommendation(
-                student_id=student.student_id,
-                response_id=response.response_id,
-                program_id=rec['program_id'],
-                rank_position=rec.get('rank', 1),
-                confidence_score=rec.get('confidence', 0),
-                justification=rec.get('justification', ''),
-                rules_triggered=','.join([str(r) for r in rec.get('rules_triggered', [])])
-            )
-            db.session.add(recommendation)
+        # Generate recommendations before taking the database write lock
+        recommendations = get_inference_engine().generate_recommendations(data)
         
-        db.session.commit()
+        # Insert student, response and recommendations in one transaction
+        student_id, response_id = save_submission(data, recommendations)
         
         # Store in session
-        session['student_id'] = student.student_id
-        session['response_id'] = response.response_id
+        session['student_id'] = student_id
+        session['response_id'] = response_id
         
         return jsonify({
             'success': True,
-            'student_id': student.student_id,
+            'student_id': student_id,
             'recommendations': recommendations
         })
         
@@ -172,24 +120,22 @@ def submit_response():
             'error': str(e)
         }), 500
 
-@app.route('/results')
+@views.route('/results')
 def results():
     """Display recommendations"""
     student_id = session.get('student_id')
     if not student_id:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     student = Student.query.get(student_id)
-    recommendations = Recommendation.query.filter_by(
-        student_id=student_id
-    ).order_by(Recommendation.rank_position).all()
+    recommendations = Recommendation.for_student(student_id).all()
 
     rec_list = []
     for rec in recommendations:
-        program = Program.query.get(rec.program_id)
         rec_list.append({
+            'recommendation_id': rec.recommendation_id,
             'rank': rec.rank_position,
-            'program': program,
+            'program': rec.program,
             'confidence': rec.confidence_score,
             'justification': rec.justification
         })
@@ -197,66 +143,101 @@ def results():
     response_id = session.get('response_id')
     return render_template('results.html', student=student, recommendations=rec_list, response_id=response_id)
 
-@app.route('/programs')
+@views.route('/programs')
 def programs():
     """Display all programs"""
-    all_programs = Program.query.filter_by(is_active=True).all()
-    return render_template('programs.html', programs=all_programs)
+    def render_page():
+        body = render_template('programs.html', programs=program_catalog.active())
+        return body, content_etag(body)
+    
+    body, etag = program_catalog.cached('programs_page', render_page)
+    
+    response = make_response(body)
+    response.set_etag(etag)
+    response.last_modified = program_catalog.loaded_at
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@views.route('/api/programs/<program_code>')
+def program_details(program_code):
+    """Program details for the programs page modal"""
+    program = program_catalog.by_code(program_code)
+    if program is None or not program.is_active:
+        return jsonify({'error': 'Program not found'}), 404
+    return jsonify(program.to_dict())
 
-@app.route('/api/feedback', methods=['POST'])
+@views.route('/api/feedback', methods=['POST'])
 def feedback():
-    """Save student feedback"""
+    """
+    Save student feedback
+    
+    Students can only rate their own recommendations (other ids answer
+    404); repeating the stored vote changes nothing.
+    """
+    student_id = session.get('student_id')
+    if student_id is None:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
     try:
         data = request.json
+        value = data.get('feedback')
+        if value not in FEEDBACK_VALUES:
+            return jsonify({'success': False,
+                            'error': f"feedback must be one of {', '.join(FEEDBACK_VALUES)}"}), 400
         recommendation = Recommendation.query.get(data.get('recommendation_id'))
-        if recommendation:
-            recommendation.student_feedback = data.get('feedback')
+        if recommendation is None or recommendation.student_id != student_id:
+            return jsonify({'success': False, 'error': 'Recommendation not found'}), 404
+        
+        old_feedback = recommendation.student_feedback
+        if old_feedback != value:
+            recommendation.student_feedback = value
+            dashboard_stats.bump(dashboard_stats.feedback_deltas(old_feedback, value))
             db.session.commit()
-            return jsonify({'success': True})
+        return jsonify({'success': True})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/download-report/<int:student_id>')
+@views.route('/api/download-report/<int:student_id>')
 def download_report(student_id):
-    """Generate PDF report"""
+    """
+    PDF report, rendered in the background and cached
+    
+    Answers 202 with a Location to poll when rendering takes longer than
+    REPORT_WAIT_SECONDS; polling the same URL returns the PDF once ready.
+    Only the student themselves (their session) or an admin may fetch it.
+    """
+    if session.get('student_id') != student_id and 'admin_id' not in session:
+        return jsonify({'error': 'Not authorized'}), 403
+    
     try:
-        student = Student.query.get(student_id)
-        recommendations = Recommendation.query.filter_by(
-            student_id=student_id
-        ).order_by(Recommendation.rank).all()
-        
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
+        data = reports.report_data(student_id)
+        if data is None:
+            return jsonify({'error': 'Student not found'}), 404
         
-        p.setFont("Helvetica-Bold", 20)
-        p.drawString(1*inch, height-1*inch, "ERVHS-EARIST Recommendations")
-        
-        p.setFont("Helvetica", 12)
-        p.drawString(1*inch, height-1.5*inch, f"Student: {student.name}")
-        p.drawString(1*inch, height-1.7*inch, f"Strand: {student.strand}")
-        
-        y = height - 2.5*inch
-        for rec in recommendations:
-            program = Program.query.get(rec.program_id)
-            p.setFont("Helvetica-Bold", 12)
-            p.drawString(1*inch, y, f"{rec.rank}. {program.program_name}")
-            y -= 0.3*inch
-        
-        p.save()
-        buffer.seek(0)
+        path = reports.report_cache().get(data['key'])
+        if path is None:
+            job = reports.report_renderer().submit(data)
+            try:
+                path = job.result(timeout=current_app.config['REPORT_WAIT_SECONDS'])
+            except FutureTimeoutError:
+                poll_url = url_for('main.download_report', student_id=student_id)
+                response = jsonify({'status': 'rendering', 'poll': poll_url})
+                response.headers['Location'] = poll_url
+                response.headers['Retry-After'] = '1'
+                return response, 202
         
         return send_file(
-            buffer,
+            path,
             as_attachment=True,
-            download_name=f"recommendations_{student.name.replace(' ', '_')}.pdf",
+            download_name=reports.report_filename(data),
             mimetype='application/pdf'
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Admin routes
-@app.route('/admin/login', methods=['GET', 'POST'])
+@views.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     """Admin login"""
     if request.method == 'POST':
@@ -264,49 +245,245 @@ def admin_login():
         password = request.form.get('password')
         
         admin = AdminUser.query.filter_by(username=username).first()
+        from werkzeug.security import check_password_hash
+        
         if admin and check_password_hash(admin.password_hash, password):
             session['admin_id'] = admin.admin_id
             session['admin_username'] = admin.username
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         else:
             return render_template('admin_login.html', error='Invalid credentials')
     
     return render_template('admin_login.html')
 
-@app.route('/admin/logout')
+@views.route('/admin/logout')
 def admin_logout():
     """Admin logout"""
     session.pop('admin_id', None)
     session.pop('admin_username', None)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/admin/dashboard')
+@views.route('/admin/dashboard')
 def admin_dashboard():
     """Admin dashboard"""
     if 'admin_id' not in session:
-        return redirect(url_for('admin_login'))
+        return redirect(url_for('main.admin_login'))
     
-    total_students = Student.query.count()
-    total_responses = QuestionnaireResponse.query.count()
-    total_recommendations = Recommendation.query.count()
-    recent_students = Student.query.order_by(Student.date_submitted.desc()).limit(10).all()
+    # Materialized counters instead of COUNT(*) over the big tables
+    stats = dashboard_stats.read()
+    recent_students, _ = Student.keyset_page(10)
     
     return render_template('admin_dashboard.html',
-                         total_students=total_students,
-                         total_responses=total_responses,
-                         total_recommendations=total_recommendations,
-                         recent_students=recent_students)
+                         total_students=stats.get('students', 0),
+                         total_responses=stats.get('responses', 0),
+                         total_recommendations=stats.get('recommendations', 0),
+                         recent_students=recent_students,
+                         strand_stats=dashboard_stats.strand_stats(stats))
 
-@app.route('/admin/students')
+@views.route('/admin/students')
 def admin_students():
-    """View all students"""
+    """View students, one keyset page at a time"""
+    if 'admin_id' not in session:
+        return redirect(url_for('main.admin_login'))
+    
+    filters = student_filters(request.args)
+    try:
+        students, next_cursor = Student.keyset_page(
+            current_app.config['STUDENTS_PER_PAGE'], after=request.args.get('after'), **filters)
+    except ValueError:
+        return redirect(url_for('main.admin_students', **filters))
+    
+    return render_template('admin_students.html', students=students,
+                           next_cursor=next_cursor, filters=filters, strands=STRANDS)
+
+@views.route('/admin/api/students')
+def admin_students_api():
+    """Student listing pages as JSON for lazy loading"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    limit = min(request.args.get('limit', current_app.config['STUDENTS_PER_PAGE'], type=int), 100)
+    try:
+        students, next_cursor = Student.keyset_page(
+            max(limit, 1), after=request.args.get('after'), **student_filters(request.args))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'students': [s.to_dict() for s in students],
+        'next_cursor': next_cursor
+    })
+
+@views.route('/admin/responses')
+def admin_responses():
+    """View questionnaire responses, newest first, one keyset page at a time"""
+    if 'admin_id' not in session:
+        return redirect(url_for('main.admin_login'))
+    
+    query = db.session.query(QuestionnaireResponse, Student.student_name, Student.strand).join(
+        Student, Student.student_id == QuestionnaireResponse.student_id)
+    after = request.args.get('after', type=int)
+    if after:
+        query = query.filter(QuestionnaireResponse.response_id < after)
+    
+    limit = current_app.config['RESPONSES_PER_PAGE']
+    rows = query.order_by(QuestionnaireResponse.response_id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1][0].response_id if len(rows) > limit else None
+    
+    return render_template('admin_responses.html', responses=rows[:limit],
+                           next_cursor=next_cursor)
+
+@views.route('/admin/rules')
+def admin_rules():
+    """View the rule base with how often each rule fired and how it was rated"""
+    if 'admin_id' not in session:
+        return redirect(url_for('main.admin_login'))
+    
+    rules = Rule.query.order_by(Rule.rule_id).all()
+    return render_template('admin_rules.html', rules=rules,
+                           programs=program_catalog,
+                           rule_stats=analytics.rule_stats())
+
+@views.route('/admin/analytics')
+def admin_analytics():
+    """Recommendation and submission analytics (cached aggregates)"""
+    if 'admin_id' not in session:
+        return redirect(url_for('main.admin_login'))
+    
+    return render_template('admin_analytics.html', stats=analytics.snapshot(),
+                           cache_ttl=current_app.config['ANALYTICS_CACHE_TTL'],
+                           result_cache=get_inference_engine().cache_stats())
+
+@views.route('/admin/api/inference-cache')
+def admin_inference_cache():
+    """Recommendation cache size, hit rate and evictions of this worker process"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    stats = get_inference_engine().cache_stats()
+    if stats is None:
+        return jsonify({'enabled': False, 'pid': os.getpid()})
+    return jsonify({'enabled': True, 'pid': os.getpid(), **stats})
+
+@views.route('/admin/export/<entity>')
+def admin_export(entity):
+    """Stream students, responses or recommendations as CSV / JSONL"""
+    if 'admin_id' not in session:
+        return redirect(url_for('main.admin_login'))
+    
+    fmt = request.args.get('format', 'csv')
+    if entity not in export_data.ENTITIES:
+        return jsonify({'error': f'Unknown export: {entity}'}), 404
+    if fmt not in export_data.FORMATS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+    
+    top = min(max(request.args.get('top', 3, type=int), 1),
+              current_app.config['MAX_RECOMMENDATIONS'])
+    compress = request.args.get('gzip') in ('1', 'true')
+    
+    body = stream_with_context(export_data.generate(entity, fmt, top, compress))
+    filename = export_data.export_filename(entity, fmt, compress)
+    return Response(body,
+                    mimetype='application/gzip' if compress else export_data.FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@views.route('/admin/import', methods=['POST'])
+def admin_import():
+    """Bulk import encoded questionnaires from an uploaded CSV / JSONL file"""
     if 'admin_id' not in session:
-        return redirect(url_for('admin_login'))
+        return jsonify({'error': 'Not authenticated'}), 401
     
-    students = Student.query.order_by(Student.date_submitted.desc()).all()
-    return render_template('admin_students.html', students=students)
+    import import_data  # pulls in NumPy; most workers never import
+    
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    fmt = request.form.get('format') or import_data.file_format(upload.filename)
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+    
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        report = import_data.import_file(
+            get_inference_engine(), stream, fmt,
+            validate_only=request.form.get('validate_only') in ('1', 'true'))
+    except UnicodeDecodeError:
+        return jsonify({'error': 'File must be UTF-8 encoded'}), 400
+    
+    return jsonify(report)
+
+@views.route('/admin/reports/batch', methods=['POST'])
+def admin_batch_reports():
+    """Start rendering the reports of every student matching a filter"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    import batch_reports
+    
+    params = request.get_json(silent=True) or request.form
+    fmt = params.get('format', 'zip')
+    if fmt not in batch_reports.FORMATS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+    try:
+        filters = {
+            'strand': params.get('strand') or None,
+            'grade_level': params.get('grade_level') or None,
+            'date_from': datetime.fromisoformat(params['date_from']) if params.get('date_from') else None,
+            'date_to': datetime.fromisoformat(params['date_to']) if params.get('date_to') else None
+        }
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    job = batch_reports.batch_jobs().start(current_app._get_current_object(), filters, fmt)
+    status_url = url_for('main.admin_batch_report_status', job_id=job['job_id'])
+    response = jsonify(dict(job, status_url=status_url))
+    response.headers['Location'] = status_url
+    return response, 202
+
+@views.route('/admin/reports/batch/<job_id>')
+def admin_batch_report_status(job_id):
+    """Progress of a batch report job"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    import batch_reports
+    
+    job = batch_reports.batch_jobs().status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job['status'] == 'done':
+        job['download_url'] = url_for('main.admin_batch_report_download', job_id=job_id)
+    return jsonify(job)
+
+@views.route('/admin/reports/batch/<job_id>/download')
+def admin_batch_report_download(job_id):
+    """Output of a finished batch report job"""
+    if 'admin_id' not in session:
+        return redirect(url_for('main.admin_login'))
+    
+    import batch_reports
+    
+    job = batch_reports.batch_jobs().status(job_id)
+    if job is None or job['status'] != 'done':
+        return jsonify({'error': 'Report not ready'}), 404
+    
+    fmt = job['format']
+    return send_file(
+        batch_reports.batch_jobs().output_path(job_id, fmt),
+        as_attachment=True,
+        download_name=f"reports-{job['started_at'][:10]}.{fmt}",
+        mimetype=batch_reports.FORMATS[fmt]
+    )
+
+def student_filters(args):
+    """Strand / grade level / status filters from the query string"""
+    return {name: args.get(name) for name in ('strand', 'grade_level', 'status')
+            if args.get(name)}
 
 if __name__ == '__main__':
+    app = create_app()
+    
     print("\n" + "="*50)
     print("🚀 ERVHS-EARIST SYSTEM STARTING...")
     print("="*50)
@@ -0,0 +1,305 @@
+"""
+Vectorized Batch Inference
+
+Scores many student profiles against the compiled rule set at once with
+NumPy. Profiles are encoded column by column (numeric fields as float
+arrays, equality fields as vocabulary codes, CONTAINS fields as boolean
+membership masks), every distinct criterion becomes one boolean column,
+and rules fire through a single incidence-matrix product.
+
+Scoring and ranking reproduce InferenceEngine.aggregate_recommendations
+and rank_recommendations exactly (same scorer states merged in the same
+order), so results are identical to the per-profile path.
+"""
+
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from inference_engine import _field_getter, _is_hashable, _to_float, compile_criterion
+from scoring import IDENTITY, Scorer, get_scorer
+
+# Vectorized merge of each scorer state component
+UFUNCS = {'max': np.maximum, 'sum': np.add, 'prod': np.multiply}
+
+
+class BatchMatcher:
+    """
+    Vectorized matcher over a compiled rule set
+    """
+    
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        
+        # Distinct criteria grouped by field: field -> [(column, criterion)]
+        self._fields: Dict[str, List] = {}
+        columns = {}
+        incidence = []
+        self._is_or = []
+        self._required = []
+        
+        for rule in self.rules:
+            operator = rule.conditions.get('operator', 'AND')
+            criteria = rule.conditions.get('criteria', [])
+            
+            nodes = set()
+            if operator in ('AND', 'OR'):
+                for criterion in criteria:
+                    key = (criterion['field'], criterion['operator'], repr(criterion['value']))
+                    if key not in columns:
+                        columns[key] = len(columns)
+                        self._fields.setdefault(criterion['field'], []).append(
+                            (columns[key], criterion))
+                    nodes.add(columns[key])
+            
+            incidence.append(nodes)
+            self._is_or.append(operator == 'OR')
+            # Rules with no usable criteria can never fire
+            self._required.append(len(nodes) if nodes else -1)
+        
+        self.criterion_count = len(columns)
+        self._incidence = np.zeros((len(columns), len(self.rules)), dtype=np.float32)
+        for position, nodes in enumerate(incidence):
+            for column in nodes:
+                self._incidence[column, position] = 1.0
+        self._is_or = np.array(self._is_or, dtype=bool)
+        self._required = np.array(self._required, dtype=np.float32)
+        
+        # Columns in program id order, so ties rank the lower id first
+        program_ids = sorted({rule.program_id for rule in self.rules})
+        self.program_ids = program_ids
+        program_column = {pid: i for i, pid in enumerate(program_ids)}
+        self._rule_program = np.array([program_column[r.program_id] for r in self.rules],
+                                      dtype=np.intp)
+    
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    
+    def _evaluate_field(self, field: str, tests: List, profiles: List[Dict], out: np.ndarray):
+        """Fill the criterion columns of one field for the whole batch"""
+        get = _field_getter(field)
+        values = [get(profile) for profile in profiles]
+        count = len(values)
+        
+        eq_vocab = {}
+        contains_vocab = {}
+        codes = members = numeric = None
+        
+        for column, criterion in tests:
+            cond_operator = criterion['operator']
+            value = criterion['value']
+            
+            if cond_operator in ('==', 'IN') and (
+                    _is_hashable(value) if cond_operator == '==' else
+                    isinstance(value, list) and all(_is_hashable(v) for v in value)):
+                for item in (value if cond_operator == 'IN' else (value,)):
+                    eq_vocab.setdefault(item, len(eq_vocab))
+            elif cond_operator == 'CONTAINS' and _is_hashable(value):
+                contains_vocab.setdefault(value, len(contains_vocab))
+        
+        # Equality fields: vocabulary codes (-1 for values no rule accepts)
+        if eq_vocab:
+            codes = np.full(count, -1, dtype=np.int64)
+            for row, actual in enumerate(values):
+                try:
+                    codes[row] = eq_vocab.get(actual, -1)
+                except TypeError:
+                    pass
+        
+        # CONTAINS fields: membership mask over the vocabulary
+        if contains_vocab:
+            members = np.zeros((count, len(contains_vocab)), dtype=bool)
+            undecoded = []
+            for row, actual in enumerate(values):
+                if isinstance(actual, list):
+                    for item in actual:
+                        try:
+                            index = contains_vocab.get(item)
+                        except TypeError:
+                            continue
+                        if index is not None:
+                            members[row, index] = True
+                elif isinstance(actual, str):
+                    undecoded.append(row)
+        
+        for column, criterion in tests:
+            cond_operator = criterion['operator']
+            value = criterion['value']
+            
+            if cond_operator == '==' and _is_hashable(value):
+                out[:, column] = codes == eq_vocab[value]
+            elif (cond_operator == 'IN' and isinstance(value, list)
+                    and all(_is_hashable(v) for v in value)):
+                out[:, column] = np.isin(codes, [eq_vocab[v] for v in value])
+            elif cond_operator in ('>=', '<='):
+                if numeric is None:
+                    numeric = np.array(
+                        [np.nan if n is None else n for n in map(_to_float, values)],
+                        dtype=np.float64)
+                threshold = float(value)
+                with np.errstate(invalid='ignore'):
+                    out[:, column] = (numeric >= threshold if cond_operator == '>='
+                                      else numeric <= threshold)
+            elif cond_operator == 'CONTAINS' and _is_hashable(value):
+                out[:, column] = members[:, contains_vocab[value]]
+                if undecoded:
+                    # JSON string values: defer to the compiled predicate
+                    predicate = compile_criterion(criterion)
+                    for row in undecoded:
+                        out[row, column] = predicate(profiles[row])
+            else:
+                predicate = compile_criterion(criterion)
+                out[:, column] = np.fromiter((predicate(p) for p in profiles),
+                                             dtype=bool, count=count)
+    
+    def fired(self, profiles: List[Dict]) -> np.ndarray:
+        """
+        Evaluate every rule against every profile
+        
+        Returns:
+            Boolean array of shape (profiles, rules)
+        """
+        satisfied = np.zeros((len(profiles), self.criterion_count), dtype=bool)
+        for field, tests in self._fields.items():
+            self._evaluate_field(field, tests, profiles, satisfied)
+        
+        counts = satisfied.astype(np.float32) @ self._incidence
+        return np.where(self._is_or, counts > 0, counts == self._required)
+    
+    # ------------------------------------------------------------------
+    # Aggregation and ranking
+    # ------------------------------------------------------------------
+    
+    def recommend(self, profiles: List[Dict], scorer: Optional[Union[str, Scorer]] = None,
+                  limit: int = 5, min_score: float = 0.0, content=None,
+                  similarity_weight: float = 0.0,
+                  similarity_min_score: Optional[float] = None) -> List[List[Dict]]:
+        """
+        Generate ranked recommendations for a batch of profiles
+        
+        Args:
+            profiles: Student profile dictionaries
+            scorer: Scorer or scorer name (default: weighted_mean)
+            limit: Number of recommendations kept per profile
+            min_score: Programs scoring below this are dropped
+            content: ContentModel of the content-based stage (None = rules only)
+            similarity_weight: Share of the confidence taken from similarity
+            similarity_min_score: Minimum similarity of fallback
+                recommendations (None = no fallback)
+        
+        Returns:
+            One ranked recommendation list per profile, identical to
+            InferenceEngine.generate_recommendations with the same settings
+        """
+        count = len(profiles)
+        if count == 0:
+            return []
+        
+        scorer = get_scorer(scorer or 'weighted_mean')
+        fired = self.fired(profiles)
+        program_count = len(self.program_ids)
+        
+        states = [np.full((count, program_count), IDENTITY[op], dtype=np.float64)
+                  for op in scorer.ops]
+        merges = [UFUNCS[op] for op in scorer.ops]
+        seen = np.zeros((count, program_count), dtype=bool)
+        
+        # Merge each fired rule's state into its program, in rule order like
+        # the per-profile path, for every profile at once
+        for position, rule in enumerate(self.rules):
+            mask = fired[:, position]
+            if not mask.any():
+                continue
+            column = self._rule_program[position]
+            for state, merge, value in zip(states, merges,
+                                           scorer.rule_state(rule.confidence, rule.weight)):
+                state[mask, column] = merge(state[mask, column], value)
+            seen[:, column] |= mask
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = scorer.score(tuple(states))
+        eligible = seen & (scores >= min_score)
+        
+        # Content-based stage: blend the scores of programs in the model
+        # with their similarity (after eligibility, which stays on the rules)
+        if content is not None:
+            features = [content.features(profile) for profile in profiles]
+            similarity = content.scores_many(features)
+            rows = np.array([content.index.get(pid, -1) for pid in self.program_ids], dtype=np.intp)
+            if similarity_weight:
+                mapped = np.flatnonzero(rows >= 0)
+                scores = scores.copy()
+                scores[:, mapped] = content.blend(scores[:, mapped], similarity[:, rows[mapped]],
+                                                  similarity_weight)
+        
+        # Stable descending sort: ties keep program id order
+        sort_key = np.where(eligible, -scores, np.inf)
+        order = self._top_columns(sort_key, limit)
+        
+        rows = np.arange(count)[:, None]
+        top_eligible = eligible[rows, order]
+        top_scores = scores[rows, order]
+        
+        results = []
+        for row in range(count):
+            ranked = []
+            fired_positions = np.flatnonzero(fired[row])
+            for slot in range(order.shape[1]):
+                if not top_eligible[row, slot]:
+                    break
+                column = order[row, slot]
+                rule_positions = fired_positions[self._rule_program[fired_positions] == column]
+                ranked.append(self._build(rule_positions, float(top_scores[row, slot]), slot + 1))
+            if content is not None and similarity_min_score is not None:
+                judged = {self.program_ids[column] for column in np.flatnonzero(seen[row])}
+                for rec in content.fallback(features[row], similarity[row], judged,
+                                            limit - len(ranked), similarity_min_score):
+                    rec['rank'] = len(ranked) + 1
+                    ranked.append(rec)
+            results.append(ranked)
+        
+        return results
+    
+    @staticmethod
+    def _top_columns(sort_key, limit: int):
+        """
+        Columns of the limit smallest keys per row, ordered by (key, column)
+        
+        Partitions first so only limit columns per row are sorted. Rows
+        where a tie at the cut could have been resolved differently fall
+        back to a full stable sort.
+        """
+        limit = max(0, min(limit, sort_key.shape[1]))
+        if limit == 0 or limit == sort_key.shape[1]:
+            return np.argsort(sort_key, axis=-1, kind='stable')[:, :limit]
+        
+        picked = np.argpartition(sort_key, limit - 1, axis=-1)[:, :limit]
+        picked.sort(axis=-1)
+        picked_keys = np.take_along_axis(sort_key, picked, axis=-1)
+        order = np.take_along_axis(picked, np.argsort(picked_keys, axis=-1, kind='stable'), axis=-1)
+        
+        # Ineligible columns (inf) are never ranked, so ties among them do not matter
+        cut = picked_keys.max(axis=-1, keepdims=True)
+        ties = np.isfinite(cut[:, 0]) & (
+            (sort_key == cut).sum(axis=-1) != (picked_keys == cut).sum(axis=-1))
+        if ties.any():
+            order[ties] = np.argsort(sort_key[ties], axis=-1, kind='stable')[:, :limit]
+        return order
+    
+    def _build(self, rule_positions, confidence: float, rank: int) -> Dict:
+        """Assemble one recommendation dict from the rules it aggregates"""
+        rules = sorted((self.rules[p] for p in rule_positions),
+                       key=lambda rule: (-rule.confidence, rule.rule_id))
+        justification = rules[0].justification
+        for rule in rules[1:]:
+            if rule.justification not in justification:
+                justification += f" Additionally, {rule.justification}"
+        
+        return {
+            'program_id': rules[0].program_id,
+            'confidence': confidence,
+            'justification': justification,
+            'rules_triggered': [rule.rule_id for rule in rules],
+            'rank': rank
+        }
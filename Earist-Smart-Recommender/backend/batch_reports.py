@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Batch PDF reports for whole sections
+
+Renders the recommendation reports of every student matching a filter
+(strand, grade level, registration date range) in one job. All report
+data is preloaded with a single ordered join, so the job never queries
+per student.
+
+Two outputs:
+    zip  one PDF per student, rendered in chunks on a process pool and
+         written into a ZIP archive as the chunks complete
+    pdf  a single merged document, one page per student, drawn on one
+         canvas (a PDF cannot be split across processes without a merge
+         library, and a single canvas already renders thousands of pages
+         per second)
+
+Jobs started from the admin panel run in a background thread and record
+their progress in a JSON file next to the output, so any worker process
+can report on them and serve the result. Finished jobs are deleted once
+they expire or the outputs outgrow their size limit.
+
+The render pool is started with the spawn method: forking a web worker
+whose other threads may hold locks (database pool, logging) can hang
+the children.
+
+Usage:
+    python batch_reports.py --strand STEM --grade 12 -o stem-12.zip
+    python batch_reports.py --from 2025-06-01 --to 2025-06-30 --format pdf -o june.pdf
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from reports import draw_report, render_report, report_filename
+
+FORMATS = {
+    'zip': 'application/zip',
+    'pdf': 'application/pdf'
+}
+
+CHUNK_SIZE = 100
+
+
+def load_report_data(strand: Optional[str] = None, grade_level: Optional[str] = None,
+                     date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None) -> List[Dict]:
+    """
+    Report data of every student matching the filters, in one query
+    
+    Students are joined to their recommendations and ordered by student,
+    so each student's rows arrive together and are folded as they stream.
+    Program names come from the in-memory catalog.
+    
+    Args:
+        strand, grade_level: Optional exact-match filters
+        date_from, date_to: Optional registration date range (inclusive)
+    
+    Returns:
+        Report data dictionaries in the shape reports.render_report expects
+    """
+    from db import db
+    from models import Recommendation, Student
+    from program_catalog import program_catalog
+    
+    student = Student.__table__
+    rec = Recommendation.__table__
+    
+    stmt = select(
+        student.c.student_id, student.c.student_name, student.c.strand,
+        rec.c.response_id, rec.c.rank_position, rec.c.program_id
+    ).outerjoin(rec, rec.c.student_id == student.c.student_id)
+    if strand:
+        stmt = stmt.where(student.c.strand == strand)
+    if grade_level:
+        stmt = stmt.where(student.c.grade_level == grade_level)
+    if date_from:
+        stmt = stmt.where(student.c.date_registered >= date_from)
+    if date_to:
+        stmt = stmt.where(student.c.date_registered < date_to + timedelta(days=1))
+    stmt = stmt.order_by(student.c.student_id, rec.c.rank_position)
+    
+    items = []
+    for row in db.session.execute(stmt, execution_options={'yield_per': 1000}):
+        if not items or items[-1]['key'][0] != row.student_id:
+            items.append({
+                'key': (row.student_id, row.response_id or 0, 0),
+                'student_name': row.student_name,
+                'strand': row.strand,
+                'programs': []
+            })
+        if row.program_id is not None:
+            program = program_catalog.get(row.program_id)
+            items[-1]['programs'].append(
+                (row.rank_position, program.program_name if program else row.program_id))
+    return items
+
+
+def zip_entry_name(data: Dict) -> str:
+    """Unique file name for a student's report inside the archive"""
+    return f"{data['key'][0]}_{report_filename(data)}"
+
+
+def _render_chunk(items: List[Dict]) -> List[bytes]:
+    return [render_report(data) for data in items]
+
+
+def write_zip(items: List[Dict], out, workers: Optional[int] = None,
+              progress: Optional[Callable[[int], None]] = None):
+    """
+    Render one PDF per student into a ZIP archive
+    
+    Args:
+        items: Report data from load_report_data
+        out: Writable binary file object
+        workers: Worker processes (0 renders in-process)
+        progress: Called with the number of reports written so far
+    """
+    chunks = [items[start:start + CHUNK_SIZE] for start in range(0, len(items), CHUNK_SIZE)]
+    done = 0
+    
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        def write(chunk, pdfs):
+            nonlocal done
+            for data, pdf in zip(chunk, pdfs):
+                archive.writestr(zip_entry_name(data), pdf)
+            done += len(chunk)
+            if progress:
+                progress(done)
+        
+        if workers == 0 or len(chunks) <= 1:
+            for chunk in chunks:
+                write(chunk, _render_chunk(chunk))
+            return
+        
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_render_chunk, chunk)))
+                # Bound the read-ahead so memory stays flat
+                if len(pending) >= workers * 2:
+                    chunk, future = pending.popleft()
+                    write(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                write(chunk, future.result())
+
+
+def write_pdf(items: List[Dict], out, progress: Optional[Callable[[int], None]] = None):
+    """
+    Render every student's report as one page of a single PDF
+    
+    Args:
+        items: Report data from load_report_data
+        out: Writable binary file object
+        progress: Called with the number of pages drawn so far
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    
+    p = canvas.Canvas(out, pagesize=letter)
+    for number, data in enumerate(items, 1):
+        draw_report(p, data)
+        p.showPage()
+        if progress and (number % CHUNK_SIZE == 0 or number == len(items)):
+            progress(number)
+    p.save()
+
+
+class BatchJobs:
+    """
+    Batch report jobs, with progress kept in JSON files beside the output
+    
+    Every worker process can read a job's progress and serve its output,
+    whichever process is running it. Jobs untouched for max_age seconds
+    are deleted, and finished jobs oldest-first while the outputs exceed
+    max_bytes.
+    """
+    
+    def __init__(self, directory: str, workers: Optional[int] = None,
+                 max_age: float = 24 * 3600, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.workers = workers
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+    
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.json')
+    
+    def output_path(self, job_id: str, fmt: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.{fmt}')
+    
+    def _save(self, status: Dict):
+        path = self._status_path(status['job_id'])
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as out:
+            json.dump(status, out)
+        os.replace(tmp, path)
+    
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Progress of a job, or None if it is unknown"""
+        if not job_id.replace('-', '').isalnum():
+            return None
+        try:
+            with open(self._status_path(job_id)) as stream:
+                return json.load(stream)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def prune(self):
+        """Delete expired jobs, then the oldest finished ones beyond max_bytes"""
+        jobs: Dict[str, List] = {}
+        for entry in os.scandir(self.directory) if os.path.isdir(self.directory) else ():
+            stat = entry.stat()
+            job = jobs.setdefault(entry.name.split('.', 1)[0], [0, 0, []])
+            job[0] = max(job[0], stat.st_mtime)
+            job[1] += stat.st_size
+            job[2].append(entry.path)
+        
+        # A running job saves its progress after every chunk, so one left
+        # untouched this long was abandoned by a process that exited
+        expired = time.time() - self.max_age
+        total = sum(size for _, size, _ in jobs.values())
+        for job_id, (modified, size, paths) in sorted(jobs.items(), key=lambda item: item[1][0]):
+            if modified >= expired:
+                if total <= self.max_bytes:
+                    break
+                status = self.status(job_id)
+                if status is None or status['status'] not in ('done', 'failed'):
+                    continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+    
+    def start(self, app, filters: Dict, fmt: str) -> Dict:
+        """
+        Start a job in a background thread
+        
+        Args:
+            app: Flask app (the job loads its data in an app context)
+            filters: Keyword arguments for load_report_data
+            fmt: 'zip' or 'pdf'
+        
+        Returns:
+            Initial job status
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.prune()
+        status = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'format': fmt,
+            'filters': {name: str(value) for name, value in filters.items() if value},
+            'total': None,
+            'done': 0,
+            'error': None,
+            'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'finished_at': None
+        }
+        self._save(status)
+        threading.Thread(target=self._run, args=(app, status, filters),
+                         name=f"batch-report-{status['job_id'][:8]}", daemon=True).start()
+        return status
+    
+    def _run(self, app, status: Dict, filters: Dict):
+        def progress(done):
+            status['done'] = done
+            self._save(status)
+        
+        try:
+            with app.app_context():
+                items = load_report_data(**filters)
+            status.update(status='running', total=len(items))
+            self._save(status)
+            
+            path = self.output_path(status['job_id'], status['format'])
+            with open(path + '.part', 'wb') as out:
+                if status['format'] == 'zip':
+                    write_zip(items, out, self.workers, progress)
+                else:
+                    write_pdf(items, out, progress)
+            os.replace(path + '.part', path)
+            status['status'] = 'done'
+        except Exception as e:
+            status.update(status='failed', error=str(e))
+        status['finished_at'] = datetime.utcnow().isoformat(timespec='seconds')
+        self._save(status)
+
+
+def batch_jobs() -> BatchJobs:
+    """
+    Batch jobs of the current app, set up from its config on first use
+    
+    This module is imported by the admin routes that need it, not by
+    create_app, so the jobs are attached to the app here.
+    """
+    app = current_app._get_current_object()
+    jobs = app.extensions.get('batch_reports')
+    if jobs is None:
+        jobs = app.extensions.setdefault('batch_reports', BatchJobs(
+            os.path.join(app.config['REPORT_CACHE_DIR'], 'batches'),
+            app.config['REPORT_BATCH_WORKERS'], app.config['REPORT_BATCH_MAX_AGE'],
+            app.config['REPORT_BATCH_MAX_BYTES']))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the reports of many students at once')
+    parser.add_argument('--strand')
+    parser.add_argument('--grade', dest='grade_level', choices=['11', '12'])
+    parser.add_argument('--from', dest='date_from', type=datetime.fromisoformat,
+                        help='registered on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', type=datetime.fromisoformat,
+                        help='registered on or before this date (YYYY-MM-DD)')
+    parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='zip')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes for ZIP output (default: CPU count, 0 = in-process)')
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+    
+    from app import create_app
+    
+    app = create_app()
+    
+    started = time.perf_counter()
+    with app.app_context():
+        items = load_report_data(args.strand, args.grade_level, args.date_from, args.date_to)
+    print(f"📄 Rendering {len(items)} reports...")
+    
+    def progress(done):
+        elapsed = time.perf_counter() - started
+        print(f"   ✓ {done}/{len(items)} ({done / elapsed:,.0f} pages/s)")
+    
+    with open(args.output, 'wb') as out:
+        if args.fmt == 'zip':
+            write_zip(items, out, args.workers, progress)
+        else:
+            write_pdf(items, out, progress)
+    
+    elapsed = time.perf_counter() - started
+    rate = len(items) / elapsed if elapsed else 0
+    print(f"✅ {len(items)} reports written to {args.output} in {elapsed:.2f}s ({rate:,.0f} pages/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Collaborative model benchmark
+
+Trains the item-item model on synthetic feedback (each student rates
+a handful of programs) at several student and program counts, then
+memory-maps the saved data file and times the per-request boost of a ranked
+list of recommendations. The request latency should stay well under a
+millisecond; training time grows with the number of ratings.
+
+Usage: python benchmarks/bench_collaborative.py [--requests N] [--per-student K]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import common
+from collaborative_filtering import FEEDBACK_VALUES, CollaborativeModel, fit, save_model
+
+# (students, programs)
+SIZES = [(1000, 15), (50000, 15), (50000, 300), (200000, 2000)]
+
+
+def synthetic_feedback(students, programs, per_student, seed=11):
+    """Coordinate-form ratings, sorted by student"""
+    rng = random.Random(seed)
+    values = list(FEEDBACK_VALUES.values())
+    rows, columns, ratings = [], [], []
+    for student in range(students):
+        for program in sorted(rng.sample(range(1, programs + 1), min(per_student, programs))):
+            rows.append(student)
+            columns.append(program)
+            ratings.append(rng.choice(values))
+    return np.array(rows), np.array(columns), np.array(ratings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--per-student', type=int, default=5, help='ratings per student')
+    parser.add_argument('--limit', type=int, default=5, help='recommendations per request')
+    args = parser.parse_args()
+    
+    rng = random.Random(5)
+    print(f"{args.per_student} ratings per student, {args.limit} recommendations per request\n")
+    print(f"{'students':>9} {'programs':>9} {'train s':>8} {'file MB':>8} {'boost us':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for students, programs in SIZES:
+            path = os.path.join(directory, f'model_{students}_{programs}.json')
+            start = time.perf_counter()
+            program_ids, similarity = fit(*synthetic_feedback(students, programs, args.per_student))
+            data_path = save_model(path, program_ids, similarity)
+            trained = time.perf_counter() - start
+            
+            model = CollaborativeModel(data_path)
+            requests = [[{'program_id': program_id, 'confidence': float(rng.randint(70, 95)),
+                          'rank': 0} for program_id in rng.sample(program_ids, args.limit)]
+                        for _ in range(args.requests)]
+            start = time.perf_counter()
+            for recommendations in requests:
+                model.rerank(recommendations, 5.0)
+            boost = (time.perf_counter() - start) / len(requests)
+            
+            print(f"{students:>9,} {programs:>9,} {trained:>8.2f} "
+                  f"{os.path.getsize(data_path) / 2**20:>8.1f} {boost * 1e6:>9.1f}")
+            del model
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
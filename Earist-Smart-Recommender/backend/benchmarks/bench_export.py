@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Streaming export benchmark
+
+Fills a throwaway SQLite database with synthetic students, responses and
+recommendations (bulk inserted, no inference), then streams every export
+to /dev/null. Reports rows per second and the peak RSS growth, which
+should stay flat as --rows grows.
+
+Usage: python benchmarks/bench_export.py [--rows N] [--gzip]
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import common
+
+
+def populate(db, rows, programs=15, per_response=3, batch=5000):
+    """Bulk insert rows students, each with one response and its recommendations"""
+    from sqlalchemy import insert
+    from models import QuestionnaireResponse, Recommendation, Student
+    from persistence import response_row, student_row
+    
+    rng = random.Random(1)
+    student_id = 0
+    recommendation_rows = 0
+    for start in range(0, rows, batch):
+        profiles = [common.random_profile(rng) for _ in range(min(batch, rows - start))]
+        students, responses, recommendations = [], [], []
+        for profile in profiles:
+            student_id += 1
+            students.append({'student_id': student_id, **student_row(profile)})
+            responses.append({'response_id': student_id, **response_row(profile, student_id)})
+            for rank, program_id in enumerate(rng.sample(range(1, programs + 1), per_response), 1):
+                recommendations.append({
+                    'student_id': student_id, 'response_id': student_id,
+                    'program_id': program_id, 'rank_position': rank,
+                    'confidence_score': rng.randint(70, 95),
+                    'justification': 'synthetic', 'rules_triggered': f'RULE{rank:03d}'
+                })
+        db.session.execute(insert(Student.__table__), students)
+        db.session.execute(insert(QuestionnaireResponse.__table__), responses)
+        db.session.execute(insert(Recommendation.__table__), recommendations)
+        db.session.commit()
+        recommendation_rows += len(recommendations)
+    return recommendation_rows
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='students / responses')
+    parser.add_argument('--gzip', action='store_true', help='compress the exports')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='ervhs-bench-')
+    app = common.make_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    
+    from db import db
+    import export_data
+    
+    with app.app_context():
+        started = time.perf_counter()
+        recommendations = populate(db, args.rows)
+        print(f"Populated {args.rows:,} students/responses and {recommendations:,} "
+              f"recommendations in {time.perf_counter() - started:.1f}s")
+        
+        counts = {'students': args.rows, 'responses': args.rows,
+                  'recommendations': recommendations}
+        baseline = peak_rss_mb()
+        print(f"Peak RSS before exporting: {baseline:.0f} MB\n")
+        print(f"{'export':<24} {'rows/s':>10} {'MB written':>11} {'peak RSS +MB':>13}")
+        
+        with open(os.devnull, 'wb') as sink:
+            for entity in ('students', 'responses', 'recommendations'):
+                for fmt in ('csv', 'jsonl'):
+                    written = 0
+                    started = time.perf_counter()
+                    for chunk in export_data.generate(entity, fmt, compress=args.gzip):
+                        sink.write(chunk)
+                        written += len(chunk)
+                    elapsed = time.perf_counter() - started
+                    db.session.remove()
+                    
+                    print(f"{entity + ' ' + fmt:<24} {counts[entity] / elapsed:>10,.0f} "
+                          f"{written / 1e6:>11.1f} {peak_rss_mb() - baseline:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
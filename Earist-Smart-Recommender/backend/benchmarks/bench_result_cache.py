@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Recommendation cache benchmark
+
+Replays a stream of submissions drawn (with repeats) from a pool of
+distinct answer sets through InferenceEngine at several cache sizes,
+checks every cached result against the uncached engine, and reports the
+hit rate, evictions and submissions per second. Use it to size
+RECOMMENDATION_CACHE_SIZE: pick the smallest size whose hit rate is
+close to the unbounded one for the expected number of distinct answers.
+
+Usage: python benchmarks/bench_result_cache.py [--distinct N] [--submissions N]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import common
+from inference_engine import InferenceEngine, RuleSet, RuleSetCache, load_rule_set
+
+CACHE_SIZES = (0, 256, 1024, 4096, 16384)
+RULE_COUNTS = (20, 500)
+
+
+def replay(rule_set, stream, cache_size):
+    """Run the stream through a fresh engine; returns (results, seconds, cache stats)"""
+    engine = InferenceEngine(None, rule_cache=RuleSetCache(lambda version: rule_set),
+                             cache_size=cache_size)
+    start = time.perf_counter()
+    results = [engine.generate_recommendations(profile) for profile in stream]
+    return results, time.perf_counter() - start, engine.cache_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--distinct', type=int, default=5000, help='distinct answer sets')
+    parser.add_argument('--submissions', type=int, default=20000)
+    args = parser.parse_args()
+    
+    pool = common.random_profiles(args.distinct)
+    rng = random.Random(5)
+    stream = [rng.choice(pool) for _ in range(args.submissions)]
+    
+    app = common.make_app()
+    # The content-based stage reads the program catalog
+    app.app_context().push()
+    seeded = load_rule_set()
+    content = InferenceEngine(None, cache_size=0).content_model()
+    
+    print(f"{args.submissions:,} submissions from {args.distinct:,} distinct answer sets\n")
+    print(f"{'rules':>6} {'cache':>7} {'keys':>7} {'hit rate':>9} {'evictions':>10} {'subs/s':>10}")
+    for count in RULE_COUNTS:
+        rule_set = seeded if count == len(seeded) else RuleSet(common.synthetic_rules(count))
+        # Results are cached per rule fingerprint and similarity features
+        keys = len({(rule_set.fingerprint(profile), content and content.features(profile))
+                    for profile in pool})
+        
+        baseline = None
+        for size in CACHE_SIZES:
+            results, elapsed, stats = replay(rule_set, stream, size)
+            if baseline is None:
+                baseline = results
+            elif results != baseline:
+                print(f"Cached results differ from uncached ({count} rules, cache {size})")
+                return 1
+            
+            hit_rate = f"{stats['hit_rate']}%" if stats else '-'
+            evictions = stats['evictions'] if stats else '-'
+            print(f"{len(rule_set):>6} {size:>7} {keys:>7} {hit_rate:>9} {evictions:>10} "
+                  f"{len(stream) / elapsed:>10,.0f}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
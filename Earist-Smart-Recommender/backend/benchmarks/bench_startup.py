@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+
+Imports and builds the app (create_app) in fresh interpreters, the way a
+new gunicorn worker does, against a throwaway migrated database. Reports
+the median time until the app is ready to serve, the modules with the
+largest cumulative import time (from python -X importtime) and whether
+heavy dependencies were loaded at startup. They should not be: both are
+required, but ReportLab is first imported when a report is rendered and
+NumPy when batch scoring, a bulk import or the content-based or
+collaborative stage first runs.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import common
+
+# Must stay out of the startup path
+HEAVY_MODULES = ['reportlab', 'numpy']
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import app
+app.create_app()
+print('ready', time.perf_counter() - started)
+print('loaded', ' '.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def parse_importtime(stderr):
+    """Cumulative microseconds per module from -X importtime output"""
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module = line.split('|', 2)
+        times[module.strip()] = int(cumulative_us)
+    return times
+
+
+def run_once(env):
+    """Import the app in a new interpreter; returns (ready seconds, importtime, heavy loaded)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=common.BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    
+    ready, loaded = None, []
+    for line in result.stdout.splitlines():
+        if line.startswith('ready '):
+            ready = float(line.split()[1])
+        elif line.startswith('loaded'):
+            loaded = line.split()[1:]
+    return ready, parse_importtime(result.stderr), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to start')
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to list')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='ervhs-bench-')
+    database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    common.make_app(database_uri)
+    
+    env = dict(os.environ, DATABASE_URL=database_uri,
+               MIGRATE_LOCK_FILE=os.path.join(workdir, 'migrate.lock'),
+               REPORT_CACHE_DIR=os.path.join(workdir, 'reports'))
+    
+    # The first run warms the bytecode and OS file caches
+    run_once(env)
+    
+    ready_times, importtimes, loaded = [], [], set()
+    for _ in range(args.runs):
+        ready, times, heavy = run_once(env)
+        ready_times.append(ready)
+        importtimes.append(times)
+        loaded.update(heavy)
+    
+    print(f"Time to ready (create_app): median {statistics.median(ready_times) * 1000:.0f} ms, "
+          f"min {min(ready_times) * 1000:.0f} ms over {args.runs} runs\n")
+    
+    modules = set().union(*importtimes)
+    median_us = {name: statistics.median(times.get(name, 0) for times in importtimes)
+                 for name in modules}
+    print(f"{'module':<40} {'cumulative ms':>14}")
+    for name, us in sorted(median_us.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40} {us / 1000:>14.1f}")
+    
+    print()
+    for name in HEAVY_MODULES:
+        state = 'LOADED at startup' if name in loaded else 'not loaded'
+        print(f"{name:<12} {state}")
+    return 1 if loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Questionnaire submission latency benchmark
+
+Posts questionnaire payloads to /api/submit-response from concurrent
+clients, optionally while reader clients load /results, against a
+throwaway SQLite database. Reports p50/p99 latency and throughput.
+
+Usage: python benchmarks/bench_submit.py [--clients N] [--requests N]
+                                         [--readers N] [--untuned]
+
+--untuned disables the SQLite pragmas and pool settings from config.Config
+to compare against the default rollback-journal setup.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import common
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=250, help='per client')
+    parser.add_argument('--readers', type=int, default=0,
+                        help='clients loading /results while submissions run')
+    parser.add_argument('--untuned', action='store_true',
+                        help='run without the SQLite pragmas and pool settings')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='ervhs-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['MIGRATE_LOCK_FILE'] = os.path.join(workdir, 'migrate.lock')
+    
+    if args.untuned:
+        from config import Config
+        Config.SQLITE_PRAGMAS = {}
+        Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    
+    # Migrates and seeds the empty database
+    from app import create_app
+    
+    app = create_app()
+    
+    # Student whose results page the readers load
+    seeded = app.test_client().post('/api/submit-response',
+                                    json=common.random_profile(common.random.Random(0)))
+    reader_student = seeded.json['student_id']
+    
+    latencies = {'submit': [], 'read': []}
+    errors = {'submit': 0, 'read': 0}
+    lock = threading.Lock()
+    done = threading.Event()
+    
+    def record(kind, samples, failed):
+        with lock:
+            latencies[kind].extend(samples)
+            errors[kind] += failed
+    
+    def writer(index):
+        http = app.test_client()
+        samples = []
+        failed = 0
+        for profile in common.random_profiles(args.requests, seed=index):
+            start = time.perf_counter()
+            response = http.post('/api/submit-response', json=profile)
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failed += 1
+        record('submit', samples, failed)
+    
+    def reader():
+        http = app.test_client()
+        with http.session_transaction() as session:
+            session['student_id'] = reader_student
+        samples = []
+        failed = 0
+        while not done.is_set():
+            start = time.perf_counter()
+            response = http.get('/results')
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failed += 1
+        record('read', samples, failed)
+    
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(args.clients)]
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    started = time.perf_counter()
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in readers:
+        thread.join()
+    
+    print(f"{'untuned' if args.untuned else 'tuned'}: {args.clients} writers x "
+          f"{args.requests} submissions, {args.readers} readers")
+    for kind in ('submit', 'read'):
+        samples = latencies[kind]
+        if not samples:
+            continue
+        print(f"  {kind:<7} p50 {percentile(samples, 50) * 1000:8.2f} ms   "
+              f"p99 {percentile(samples, 99) * 1000:8.2f} ms   "
+              f"mean {statistics.mean(samples) * 1000:8.2f} ms   "
+              f"{len(samples) / elapsed:7.0f}/s   errors {errors[kind]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Top-k recommendation benchmark
+
+Compares full matching (fire every candidate rule, aggregate, rank) with
+top-k matching (RuleSet.match_top: stop evaluating rules of programs
+that can no longer reach the top) at the seeded catalog size and at
+synthetic rule and program counts. Results are checked for equality, and
+the table shows how many fired rules top-k matching still had to keep.
+Only the max scorer prunes in the engine (see scoring.py), so the top-k
+column always uses RuleSet.match_top directly to show its effect.
+
+Usage: python benchmarks/bench_top_k.py [--profiles N] [--scorer NAME] [--limit K]
+"""
+
+import argparse
+import sys
+import time
+
+import common
+from inference_engine import InferenceEngine, RuleSet, RuleSetCache, load_rule_set
+from scoring import SCORERS
+
+# (rules, programs); None is the seeded rule set
+SIZES = [None, (500, 15), (5000, 15), (5000, 300), (5000, 2000)]
+
+
+def timed(function, profiles):
+    start = time.perf_counter()
+    results = [function(profile) for profile in profiles]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=2000)
+    parser.add_argument('--scorer', choices=sorted(SCORERS), default='max')
+    parser.add_argument('--limit', type=int, default=5, help='recommendations per profile')
+    args = parser.parse_args()
+    
+    profiles = common.random_profiles(args.profiles)
+    app = common.make_app()
+    with app.app_context():
+        seeded = load_rule_set()
+    
+    print(f"{args.profiles:,} profiles, scorer {args.scorer}, top {args.limit}\n")
+    print(f"{'rules':>6} {'programs':>9} {'full/s':>9} {'top-k/s':>9} {'speedup':>8} {'rules kept':>11}")
+    for size in SIZES:
+        if size is None:
+            rule_set = seeded
+        else:
+            count, programs = size
+            rule_set = RuleSet(common.synthetic_rules(count, program_ids=range(1, programs + 1)))
+        engine = InferenceEngine(None, rule_cache=RuleSetCache(lambda version: rule_set),
+                                 cache_size=0, scorer=args.scorer, limit=args.limit)
+        
+        def full(profile):
+            fired = rule_set.match(profile)
+            return engine.rank_recommendations(engine.aggregate_recommendations(fired))
+        
+        def top_k(profile):
+            fired = rule_set.match_top(profile, engine.scorer, engine.limit, engine.min_score)
+            return engine.rank_recommendations(engine.aggregate_recommendations(fired))
+        
+        full_results, full_time = timed(full, profiles)
+        top_results, top_time = timed(top_k, profiles)
+        if top_results != full_results:
+            print(f"Top-k results differ from full matching ({len(rule_set)} rules)")
+            return 1
+        
+        fired = sum(len(rule_set.match(profile)) for profile in profiles)
+        kept = sum(len(rule_set.match_top(profile, engine.scorer, engine.limit, engine.min_score))
+                   for profile in profiles)
+        programs = len({rule.program_id for rule in rule_set.rules})
+        print(f"{len(rule_set):>6} {programs:>9} {len(profiles) / full_time:>9,.0f} "
+              f"{len(profiles) / top_time:>9,.0f} {full_time / top_time:>7.2f}x "
+              f"{kept / fired if fired else 1:>10.0%}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
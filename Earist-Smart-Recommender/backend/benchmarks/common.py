@@ -0,0 +1,109 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks run against a throwaway database seeded with the standard
+programs and rules, never against backend/database/ervhs_earist.db.
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from models import SKILL_FIELDS as SKILLS, STRANDS
+
+INTERESTS = ['Technology', 'Engineering', 'Business', 'Education', 'Hospitality',
+             'Management', 'Arts', 'Health', 'Science', 'Media']
+SUBJECTS = ['Mathematics', 'Science', 'English', 'Filipino', 'Accounting',
+            'Computer Programming', 'Social Studies', 'Arts']
+LEARNING_STYLES = ['Hands-on/Practical learning', 'Collaborative/Group work',
+                   'Visual/Creative learning', 'Reading/Independent study']
+
+
+def make_app(database_uri=None):
+    """
+    Create the app with create_app on a throwaway database
+    
+    The database (by default a SQLite file), migration lock, report cache
+    and collaborative model live in a new temporary directory; create_app
+    migrates and seeds the database like a first deploy. The config is
+    subclassed rather than set through DATABASE_URL because the
+    benchmarks may have imported config already.
+    """
+    from app import create_app
+    from config import get_config
+    
+    workdir = tempfile.mkdtemp(prefix='ervhs-bench-')
+    
+    class BenchConfig(get_config()):
+        SQLALCHEMY_DATABASE_URI = database_uri or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        MIGRATE_LOCK_FILE = os.path.join(workdir, 'migrate.lock')
+        REPORT_CACHE_DIR = os.path.join(workdir, 'reports')
+        COLLABORATIVE_MODEL_PATH = os.path.join(workdir, 'collaborative_model.json')
+    
+    return create_app(BenchConfig, migrate=True)
+
+
+def random_profile(rng):
+    """Random questionnaire payload in the shape sent by questionnaire.js"""
+    return {
+        'name': f'Student {rng.randrange(10**6)}',
+        'grade_level': rng.choice(['11', '12']),
+        'strand': rng.choice(STRANDS),
+        'email': None,
+        'favorite_subjects': rng.sample(SUBJECTS, rng.randint(1, 3)),
+        'skills': {skill: rng.randint(1, 5) for skill in SKILLS},
+        'interests': rng.sample(INTERESTS, rng.randint(1, 4)),
+        'learning_style': rng.choice(LEARNING_STYLES),
+        'career_goals': ''
+    }
+
+
+def random_profiles(count, seed=42):
+    rng = random.Random(seed)
+    return [random_profile(rng) for _ in range(count)]
+
+
+def synthetic_rules(count, program_ids=range(1, 16), seed=7):
+    """
+    Generate compiled rules shaped like the seeded ones
+    
+    Each rule tests a strand (== or IN), one to three skill thresholds and
+    optionally an interest, subject or learning style.
+    """
+    from inference_engine import CompiledRule, create_criterion
+    
+    rng = random.Random(seed)
+    program_ids = list(program_ids)
+    rules = []
+    
+    for n in range(count):
+        if rng.random() < 0.6:
+            criteria = [create_criterion('strand', '==', rng.choice(STRANDS))]
+        else:
+            criteria = [create_criterion('strand', 'IN', rng.sample(STRANDS, rng.randint(2, 3)))]
+        
+        for skill in rng.sample(SKILLS, rng.randint(1, 3)):
+            criteria.append(create_criterion(f'skills.{skill}', '>=', rng.randint(3, 5)))
+        
+        extra = rng.random()
+        if extra < 0.4:
+            criteria.append(create_criterion('interests', 'CONTAINS', rng.choice(INTERESTS)))
+        elif extra < 0.6:
+            criteria.append(create_criterion('favorite_subjects', 'CONTAINS', rng.choice(SUBJECTS)))
+        elif extra < 0.8:
+            criteria.append(create_criterion('learning_style', '==', rng.choice(LEARNING_STYLES)))
+        
+        rules.append(CompiledRule(
+            rule_id=f'SYN{n:05d}',
+            program_id=rng.choice(program_ids),
+            confidence=float(rng.randint(70, 95)),
+            justification=f'Synthetic rule {n}',
+            conditions={'operator': 'AND', 'criteria': criteria}
+        ))
+    
+    return rules
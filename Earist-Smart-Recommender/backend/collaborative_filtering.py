@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Collaborative "Students Like You" Boosts
+
+Offline, student feedback on stored recommendations becomes a sparse
+student x program matrix (helpful +1, somewhat helpful +0.5, not helpful
+-1; recommendations without feedback are left out). Item-item cosine
+similarity between program columns, shrunk towards 0 for programs few
+students rated together and cut to each program's nearest neighbours,
+is saved as a single .npy file.
+
+Online, the file is memory-mapped read-only and a student's ranked
+recommendations are re-ordered by how the other programs on their list
+relate to each one: programs that students with similar lists also found
+helpful move up, programs they found unhelpful move down. The model is
+reloaded when a new one is published; requests never retrain.
+
+Model data file layout (float64): row 0 holds the program ids, rows 1..
+the similarity matrix. Every training run writes a new versioned data
+file (collaborative_model.<ns>.npy) and then atomically replaces a small
+JSON manifest (COLLABORATIVE_MODEL_PATH) naming it. A data file is never
+replaced in place, because Windows refuses to replace or delete a file
+that a worker still has memory-mapped. Superseded data files are
+deleted on a best-effort basis, and ones still mapped are retried after
+the next training run.
+
+Usage:
+    python collaborative_filtering.py                 # train into COLLABORATIVE_MODEL_PATH
+    python collaborative_filtering.py --neighbours 10 --shrinkage 5
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+# Rating each feedback value contributes to the student x program matrix
+FEEDBACK_VALUES = {'helpful': 1.0, 'somewhat_helpful': 0.5, 'not_helpful': -1.0}
+
+
+def load_interactions(db, chunk_size: int = 5000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sparse student x program feedback matrix in coordinate form
+    
+    Recommendations are streamed in keyset-paginated chunks. When a
+    student rated the same program on several responses, the latest
+    rating counts.
+    
+    Returns:
+        (student_ids, program_ids, ratings) arrays, sorted by student
+    """
+    from models import Recommendation
+    
+    table = Recommendation.__table__
+    ratings: Dict[Tuple[int, int], float] = {}
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.recommendation_id, table.c.student_id,
+                   table.c.program_id, table.c.student_feedback)
+            .where(table.c.recommendation_id > last_id,
+                   table.c.student_feedback.in_(list(FEEDBACK_VALUES)))
+            .order_by(table.c.recommendation_id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].recommendation_id
+        for row in rows:
+            ratings[(row.student_id, row.program_id)] = FEEDBACK_VALUES[row.student_feedback]
+    
+    keys = sorted(ratings)
+    students = np.array([student for student, _ in keys], dtype=np.int64)
+    programs = np.array([program for _, program in keys], dtype=np.int64)
+    return students, programs, np.array([ratings[key] for key in keys], dtype=np.float64)
+
+
+def fit(students: np.ndarray, programs: np.ndarray, ratings: np.ndarray,
+        neighbours: int = 20, shrinkage: float = 10.0,
+        block: int = 4096) -> Tuple[List[int], np.ndarray]:
+    """
+    Item-item similarity from a coordinate-form rating matrix
+    
+    The Gram matrices are accumulated over dense blocks of students, so
+    memory stays at block x programs however many students there are.
+    
+    Args:
+        students, programs, ratings: Matrix entries, sorted by student
+        neighbours: Similarities kept per program (largest magnitude)
+        shrinkage: Co-rating count at which a similarity keeps half its value
+        block: Students per dense block
+    
+    Returns:
+        (program ids, similarity matrix); row i holds the similarity of
+        program i to every other program, 0 on the diagonal
+    """
+    program_ids = np.unique(programs)
+    count = len(program_ids)
+    columns = np.searchsorted(program_ids, programs)
+    # Student ids to consecutive row numbers (entries are sorted by student)
+    first_entry = np.r_[True, students[1:] != students[:-1]] if len(students) else np.zeros(0, bool)
+    starts = np.flatnonzero(first_entry)
+    rows = np.cumsum(first_entry) - 1
+    
+    products = np.zeros((count, count))
+    together = np.zeros((count, count))
+    for first in range(0, len(starts), block):
+        lo = starts[first]
+        hi = starts[first + block] if first + block < len(starts) else len(students)
+        dense = np.zeros((min(block, len(starts) - first), count))
+        dense[rows[lo:hi] - first, columns[lo:hi]] = ratings[lo:hi]
+        products += dense.T @ dense
+        rated = (dense != 0).astype(np.float64)
+        together += rated.T @ rated
+    
+    norms = np.sqrt(np.diag(products))
+    scale = np.outer(norms, norms)
+    similarity = np.divide(products, scale, out=np.zeros_like(products), where=scale > 0)
+    if shrinkage:
+        similarity *= together / (together + shrinkage)
+    np.fill_diagonal(similarity, 0.0)
+    
+    if neighbours < count - 1:
+        cut = np.argpartition(-np.abs(similarity), neighbours, axis=1)[:, neighbours:]
+        np.put_along_axis(similarity, cut, 0.0, axis=1)
+    return program_ids.tolist(), similarity
+
+
+def _data_pattern(path: str) -> str:
+    """Glob matching the versioned data files of the manifest at path"""
+    return f'{os.path.splitext(path)[0]}.*.npy'
+
+
+def model_file(path: str) -> str:
+    """
+    Data file named by the manifest at path
+    
+    Raises OSError if the manifest cannot be read and ValueError if it is
+    malformed.
+    """
+    with open(path) as stream:
+        manifest = json.load(stream)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('file'), str):
+        raise ValueError(f"Not a collaborative model manifest: {path}")
+    name = manifest['file']
+    return os.path.join(os.path.dirname(os.path.abspath(path)), os.path.basename(name))
+
+
+def save_model(path: str, program_ids: Iterable[int], similarity: np.ndarray) -> str:
+    """
+    Write a new versioned data file and publish it through the manifest
+    
+    Args:
+        path: Manifest path (COLLABORATIVE_MODEL_PATH)
+        program_ids, similarity: Model from fit
+    
+    Returns:
+        Path of the data file written
+    """
+    program_ids = list(program_ids)
+    model = np.zeros((len(program_ids) + 1, len(program_ids)))
+    model[0] = program_ids
+    model[1:] = similarity
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    version = time.time_ns()
+    while os.path.exists(f'{os.path.splitext(path)[0]}.{version}.npy'):
+        version += 1
+    data_path = f'{os.path.splitext(path)[0]}.{version}.npy'
+    with open(data_path + '.tmp', 'wb') as handle:
+        np.save(handle, model)
+    os.replace(data_path + '.tmp', data_path)
+    
+    # The manifest is never mapped, only read and closed, so on Windows
+    # replacing it can only collide with a reader for a moment
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'w') as handle:
+        json.dump({'file': os.path.basename(data_path)}, handle)
+    for attempt in range(50):
+        try:
+            os.replace(partial, path)
+            break
+        except PermissionError:
+            if attempt == 49:
+                raise
+            time.sleep(0.1)
+    
+    for old in glob.glob(_data_pattern(path)):
+        if old != data_path:
+            try:
+                os.remove(old)
+            except OSError:  # still mapped by a worker (Windows)
+                pass
+    return data_path
+
+
+class CollaborativeModel:
+    """
+    Memory-mapped item-item similarity, read-only
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        model = np.load(path, mmap_mode='r')
+        self.program_ids = [int(program_id) for program_id in model[0]]
+        self.index = {program_id: row for row, program_id in enumerate(self.program_ids)}
+        self.similarity = model[1:]
+    
+    def __len__(self):
+        return len(self.program_ids)
+    
+    def affinities(self, program_ids: List[int], weights: List[float]) -> List[float]:
+        """
+        Neighbour affinity (-1 to 1) of each program on a list
+        
+        Args:
+            program_ids: Programs recommended to one student
+            weights: Their confidences (0-100)
+        
+        Returns:
+            Per program, the confidence-weighted mean similarity to the
+            other programs on the list (0 for programs the model lacks)
+        """
+        rows = [self.index.get(program_id) for program_id in program_ids]
+        known = [(position, row) for position, row in enumerate(rows) if row is not None]
+        result = [0.0] * len(program_ids)
+        if len(known) < 2:
+            return result
+        
+        positions, rows = zip(*known)
+        block = self.similarity[np.ix_(rows, rows)]
+        shares = np.array([weights[position] / 100.0 for position in positions])
+        totals = shares.sum() - shares
+        # Column j: similarity of every other listed program to program j
+        scores = (shares @ block) / np.where(totals > 0, totals, 1.0)
+        for position, score in zip(positions, scores.tolist()):
+            result[position] = score
+        return result
+    
+    def rerank(self, recommendations: List[Dict], weight: float,
+               floor: float = 0.0) -> List[Dict]:
+        """
+        Boost ranked recommendations in place and re-rank them
+        
+        Args:
+            recommendations: Ranked recommendation dicts of one student
+            weight: Confidence points a full (+/-1) affinity adds or removes
+            floor: Confidence a recommendation already scoring at least
+                floor cannot be pushed below (the ranking's min_score)
+        
+        Returns:
+            The recommendations, best first (ties by program id), re-ranked
+        """
+        affinities = self.affinities([rec['program_id'] for rec in recommendations],
+                                     [rec['confidence'] for rec in recommendations])
+        for rec, affinity in zip(recommendations, affinities):
+            if affinity:
+                confidence = rec['confidence']
+                lowest = floor if confidence >= floor else 0.0
+                rec['confidence'] = min(100.0, max(lowest, confidence + weight * affinity))
+        recommendations.sort(key=lambda rec: (-rec['confidence'], rec['program_id']))
+        for idx, rec in enumerate(recommendations):
+            rec['rank'] = idx + 1
+        return recommendations
+
+
+_lock = threading.Lock()
+_loaded: Dict[str, Tuple[Tuple[int, int], Optional[CollaborativeModel]]] = {}
+
+
+def collaborative_model(path: Optional[str] = None) -> Optional[CollaborativeModel]:
+    """
+    Model published at path (default: the current app's COLLABORATIVE_MODEL_PATH)
+    
+    Loaded on first use and again whenever training replaces the
+    manifest; None until a model has been trained. If a new model cannot
+    be read, the one already loaded keeps serving.
+    """
+    if path is None:
+        path = current_app.config['COLLABORATIVE_MODEL_PATH']
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    
+    stamp = (stat.st_mtime_ns, stat.st_ino)
+    entry = _loaded.get(path)
+    if entry is None or entry[0] != stamp:
+        with _lock:
+            entry = _loaded.get(path)
+            if entry is None or entry[0] != stamp:
+                try:
+                    model = CollaborativeModel(model_file(path))
+                except (OSError, ValueError):
+                    return entry[1] if entry else None
+                entry = (stamp, model)
+                _loaded[path] = entry
+    return entry[1]
+
+
+def train(db, path: str, neighbours: int = 20, shrinkage: float = 10.0) -> Dict[str, int]:
+    """
+    Train from the stored feedback and save the model
+    
+    Returns:
+        Counts of students, programs and ratings used
+    """
+    students, programs, ratings = load_interactions(db)
+    program_ids, similarity = fit(students, programs, ratings, neighbours, shrinkage)
+    save_model(path, program_ids, similarity)
+    return {
+        'students': len(np.unique(students)),
+        'programs': len(program_ids),
+        'ratings': len(ratings)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the collaborative recommendation model')
+    parser.add_argument('--output',
+                        help='model manifest (default: COLLABORATIVE_MODEL_PATH)')
+    parser.add_argument('--neighbours', type=int, default=20,
+                        help='similar programs kept per program')
+    parser.add_argument('--shrinkage', type=float, default=10.0,
+                        help='damping of similarities backed by few students')
+    args = parser.parse_args(argv)
+    
+    from app import create_app, db
+    
+    app = create_app()
+    output = args.output or app.config['COLLABORATIVE_MODEL_PATH']
+    with app.app_context():
+        print("🧮 Training collaborative model from student feedback...")
+        started = time.perf_counter()
+        counts = train(db, output, args.neighbours, args.shrinkage)
+    
+    print(f"✅ {counts['ratings']} ratings by {counts['students']} students over "
+          f"{counts['programs']} programs in {time.perf_counter() - started:.2f}s -> {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
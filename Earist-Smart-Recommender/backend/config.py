@@ -4,8 +4,15 @@ Centralized configuration management for the ERVHS-EARIST system
 """
 
 import os
+import tempfile
 from datetime import timedelta
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE_DIR = os.path.join(BASE_DIR, 'database')
+# Files written by TestingConfig apps, kept out of DATABASE_DIR
+TEST_DATA_DIR = os.path.join(tempfile.gettempdir(), 'ervhs-earist-test')
+
+
 class Config:
     """Base configuration"""
     
@@ -13,10 +20,35 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     
     # Database
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///ervhs_earist.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+        'sqlite:///' + os.path.join(DATABASE_DIR, 'ervhs_earist.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False  # Set to True for SQL query logging
     
+    # Schema creation and seeding (migrate_database.prepare_database). With
+    # AUTO_MIGRATE each process checks the schema version on startup and
+    # migrates under MIGRATE_LOCK_FILE if it is behind; set AUTO_MIGRATE=0
+    # when running `python migrate_database.py` as a deploy step instead.
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', '1') != '0'
+    MIGRATE_LOCK_FILE = os.environ.get('MIGRATE_LOCK_FILE') or os.path.join(DATABASE_DIR, 'migrate.lock')
+    
+    # Connection pool (file-based databases)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': 30,
+    }
+    
+    # SQLite tuning, applied to every new connection
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',          # readers no longer block the writer
+        'synchronous': 'NORMAL',        # fsync at checkpoints only (safe with WAL)
+        'busy_timeout': 5000,           # ms to wait for the write lock
+        'cache_size': -64000,           # 64 MB page cache (negative = KiB)
+        'mmap_size': 268435456,         # 256 MB memory-mapped I/O
+        'temp_store': 'MEMORY',
+    }
+    
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
@@ -37,9 +69,45 @@ class Config:
     RESPONSES_PER_PAGE = 20
     RULES_PER_PAGE = 30
     
+    # PDF reports: rendered in the background and cached on disk
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR') or os.path.join(DATABASE_DIR, 'reports')
+    REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+    REPORT_WAIT_SECONDS = 2.0  # answer 202 if rendering takes longer
+    REPORT_BATCH_WORKERS = int(os.environ.get('REPORT_BATCH_WORKERS', 0)) or None  # None = CPU count
+    REPORT_BATCH_MAX_AGE = 24 * 3600  # batch outputs are deleted after a day (seconds)
+    REPORT_BATCH_MAX_BYTES = 1024 * 1024 * 1024
+    
+    # Admin analytics are recomputed at most this often (seconds)
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 300))
+    
     # Recommendation Engine
     MAX_RECOMMENDATIONS = 5
     MIN_CONFIDENCE_SCORE = 70.0
+    # How rules recommending the same program combine: weighted_mean, max or noisy_or
+    RECOMMENDATION_SCORER = os.environ.get('RECOMMENDATION_SCORER', 'weighted_mean')
+    # Ranked results memoized per answer fingerprint, per process (0 = off)
+    RECOMMENDATION_CACHE_SIZE = int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 4096))
+    # How often each process checks the stored rules/programs change
+    # counters, i.e. how long another worker's edit can take to show (seconds)
+    CACHE_VERSION_CHECK_SECONDS = float(os.environ.get('CACHE_VERSION_CHECK_SECONDS', 1.0))
+    # Content-based stage (content_similarity.py), off by default: share of
+    # a recommended program's confidence taken from answer/program
+    # similarity (0 = rules only, e.g. 0.2), and whether slots the rules
+    # leave empty are filled with the most similar programs scoring at
+    # least SIMILARITY_MIN_SCORE ('1' = on). Either setting changes which
+    # programs students are recommended, and turns off top-k pruning.
+    SIMILARITY_WEIGHT = float(os.environ.get('SIMILARITY_WEIGHT', 0.0))
+    SIMILARITY_FALLBACK = os.environ.get('SIMILARITY_FALLBACK', '0') == '1'
+    SIMILARITY_MIN_SCORE = float(os.environ.get('SIMILARITY_MIN_SCORE', 50.0))
+    # Collaborative boosts (collaborative_filtering.py): confidence points a
+    # program gains or loses when students with similar recommendations
+    # found it helpful or not (0 = off). Train the model offline with
+    # `python collaborative_filtering.py`; no boosts until it exists. The
+    # path is a small manifest naming the current versioned data file.
+    COLLABORATIVE_WEIGHT = float(os.environ.get('COLLABORATIVE_WEIGHT', 5.0))
+    COLLABORATIVE_MODEL_PATH = os.environ.get('COLLABORATIVE_MODEL_PATH') or \
+        os.path.join(DATABASE_DIR, 'collaborative_model.json')
     
     # Admin
     DEFAULT_ADMIN_USERNAME = 'admin'
@@ -49,7 +117,7 @@ class Config:
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO') == '1'
 
 
 class ProductionConfig(Config):
@@ -60,17 +128,21 @@ class ProductionConfig(Config):
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SESSION_COOKIE_SECURE = True
-    
-    # Require environment variables in production
-    if not SECRET_KEY:
-        raise ValueError("SECRET_KEY environment variable must be set in production")
 
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # in-memory databases use a static pool
     WTF_CSRF_ENABLED = False
+    MIGRATE_LOCK_FILE = os.path.join(TEST_DATA_DIR, 'migrate.lock')
+    REPORT_CACHE_DIR = os.path.join(TEST_DATA_DIR, 'reports')
+    COLLABORATIVE_MODEL_PATH = os.path.join(TEST_DATA_DIR, 'collaborative_model.json')
+    RECOMMENDATION_CACHE_SIZE = 256
+    ANALYTICS_CACHE_TTL = 0
+    # Statement-count tests must not see the periodic version checks
+    CACHE_VERSION_CHECK_SECONDS = 3600.0
 
 
 # Configuration dictionary
@@ -86,4 +158,10 @@ def get_config(env=None):
     """Get configuration based on environment"""
     if env is None:
         env = os.environ.get('FLASK_ENV', 'development')
-    return config.get(env, config['default'])
+    selected = config.get(env, config['default'])
+    
+    # Require environment variables in production
+    if selected is ProductionConfig and not selected.SECRET_KEY:
+        raise ValueError("SECRET_KEY environment variable must be set in production")
+    
+    return selected
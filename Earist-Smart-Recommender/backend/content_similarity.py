@@ -0,0 +1,271 @@
+"""
+Content-Based Program Similarity
+
+A second recommendation stage next to the rules. Every program and every
+answer set is embedded as a fixed-length vector with three blocks:
+    
+    skills     the eight questionnaire skills; programs mark the skills
+               listed in required_skills (synonyms such as 'mathematical'
+               count as 'numerical'), students give their 1-5 rating
+    strand     one-hot of the student's strand / the program's typical strands
+    interests  bag of questionnaire interests; a program gets the interests
+               whose keywords appear in its name, description, college or
+               career pathways
+
+Program rows are normalized and weighted so that one matrix-vector
+product scores every program from 0 to 100: the weighted sum of the
+student's average rating in the program's skills, whether their strand is
+typical for it and the cosine overlap of interests. The program matrix is
+built once per catalog version and shared by all requests.
+"""
+
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import SKILL_FIELDS, STRANDS, decode_list
+
+# Keywords (matched at word starts) that tie a program to a questionnaire interest
+INTEREST_KEYWORDS = {
+    'Technology': ('technolog', 'computer', 'software', 'network', 'information', 'electronic'),
+    'Engineering': ('engineer',),
+    'Business': ('business', 'entrepreneur', 'marketing', 'accountan', 'financ', 'audit'),
+    'Education': ('education', 'teacher', 'teaching', 'curriculum', 'trainer', 'training'),
+    'Healthcare': ('health', 'medical', 'nurs', 'clinical'),
+    'Social Services': ('social', 'community', 'human resources', 'counsel'),
+    'Arts': ('art', 'architect', 'interior', 'graphic', 'creative'),
+    'Research': ('research', 'scientist', 'analyst'),
+    'Management': ('manag', 'administrat', 'supervis', 'operations'),
+    'Hospitality': ('hospitality', 'hotel', 'restaurant', 'tourism', 'food service', 'event'),
+}
+
+# required_skills wording that maps onto a questionnaire skill
+SKILL_SYNONYMS = {
+    'problem_solving': 'analytical',
+    'systems_thinking': 'analytical',
+    'logical': 'numerical',
+    'mathematical': 'numerical',
+    'technology': 'technical',
+    'troubleshooting': 'technical',
+    'mechanical': 'technical',
+    'practical': 'technical',
+    'creative': 'creativity',
+    'artistic': 'creativity',
+    'spatial': 'creativity',
+    'precision': 'attention_to_detail',
+    'organizational': 'leadership',
+    'teaching': 'communication',
+    'empathy': 'communication',
+    'service_oriented': 'communication',
+}
+
+# Share of the 0-100 similarity each block contributes
+BLOCK_WEIGHTS = {'skills': 0.5, 'strand': 0.2, 'interests': 0.3}
+
+INTERESTS = tuple(INTEREST_KEYWORDS)
+SKILL_INDEX = {skill: i for i, skill in enumerate(SKILL_FIELDS)}
+STRAND_OFFSET = len(SKILL_FIELDS)
+INTEREST_OFFSET = STRAND_OFFSET + len(STRANDS)
+STRAND_INDEX = {strand: STRAND_OFFSET + i for i, strand in enumerate(STRANDS)}
+INTEREST_INDEX = {interest: INTEREST_OFFSET + i for i, interest in enumerate(INTERESTS)}
+DIMENSIONS = INTEREST_OFFSET + len(INTERESTS)
+
+_INTEREST_PATTERNS = {
+    interest: re.compile(r'\b(?:' + '|'.join(map(re.escape, keywords)) + ')', re.IGNORECASE)
+    for interest, keywords in INTEREST_KEYWORDS.items()
+}
+
+# (strand, skill ratings scaled to 0-1, sorted known interests)
+Features = Tuple[Optional[str], Tuple[float, ...], Tuple[str, ...]]
+
+
+def program_skills(required_skills: Iterable[str]) -> List[str]:
+    """Questionnaire skills a program's required_skills refer to, in field order"""
+    found = set()
+    for skill in required_skills:
+        name = str(skill).strip().lower().replace('-', '_').replace(' ', '_')
+        name = name if name in SKILL_INDEX else SKILL_SYNONYMS.get(name)
+        if name:
+            found.add(name)
+    return [skill for skill in SKILL_FIELDS if skill in found]
+
+
+def program_interests(program) -> List[str]:
+    """Questionnaire interests whose keywords appear in a program's texts"""
+    text = ' '.join(filter(None, (program.program_name, program.program_description,
+                                  program.college_department, program.career_pathways)))
+    return [interest for interest, pattern in _INTEREST_PATTERNS.items() if pattern.search(text)]
+
+
+_RATINGS = {rating: (rating - 1) / 4 for rating in range(1, 6)}
+
+
+def _rating(value) -> float:
+    """1-5 skill rating scaled to 0-1 (0 when missing or invalid)"""
+    try:
+        return _RATINGS[value]
+    except (KeyError, TypeError):
+        pass
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return min(max((rating - 1.0) / 4.0, 0.0), 1.0)
+
+
+def profile_features(profile: Dict) -> Features:
+    """
+    The parts of an answer set the similarity depends on
+    
+    Hashable, so it doubles as a result cache key.
+    """
+    strand = profile.get('strand')
+    skills = profile.get('skills')
+    if not isinstance(skills, dict):
+        skills = {}
+    interests = profile.get('interests') or []
+    if isinstance(interests, str):
+        try:
+            interests = decode_list(interests)
+        except ValueError:
+            interests = []
+    
+    return (
+        strand if strand in STRAND_INDEX else None,
+        tuple(_rating(skills.get(skill)) for skill in SKILL_FIELDS),
+        tuple(sorted({i for i in interests if isinstance(i, str) and i in INTEREST_INDEX}))
+    )
+
+
+def blend(rule_score, similarity, weight: float):
+    """Confidence of a rule recommendation blended with its similarity (floats or arrays)"""
+    return (1.0 - weight) * rule_score + weight * similarity
+
+
+def _join(words: Sequence[str]) -> str:
+    return words[0] if len(words) == 1 else f"{', '.join(words[:-1])} and {words[-1]}"
+
+
+class ContentModel:
+    """
+    Program embedding matrix for one catalog version
+    
+    Holds only NumPy arrays and plain lists, so a model built in one
+    process can be pickled to pool workers.
+    """
+    
+    def __init__(self, programs: Iterable, version: int = 0):
+        programs = list(programs)
+        self.version = version
+        self.program_ids = [program.program_id for program in programs]
+        self.index = {program_id: row for row, program_id in enumerate(self.program_ids)}
+        self.matrix = np.zeros((len(programs), DIMENSIONS))
+        # (skills, strands, interests) per program, for justifications
+        self.traits: List[Tuple[List[str], List[str], List[str]]] = []
+        
+        for row, program in enumerate(programs):
+            skills = program_skills(program.skills)
+            strands = [strand for strand in program.strands if strand in STRAND_INDEX]
+            interests = program_interests(program)
+            self.traits.append((skills, strands, interests))
+            
+            # Average rating over the program's skills (all skills if none is known)
+            for skill in skills or SKILL_FIELDS:
+                self.matrix[row, SKILL_INDEX[skill]] = BLOCK_WEIGHTS['skills'] / len(skills or SKILL_FIELDS)
+            for strand in strands:
+                self.matrix[row, STRAND_INDEX[strand]] = BLOCK_WEIGHTS['strand']
+            # Program half of the interest cosine; the student half is applied in embed
+            for interest in interests:
+                self.matrix[row, INTEREST_INDEX[interest]] = BLOCK_WEIGHTS['interests'] / len(interests) ** 0.5
+        
+        self.matrix *= 100.0
+    
+    features = staticmethod(profile_features)
+    blend = staticmethod(blend)
+    
+    def __len__(self):
+        return len(self.program_ids)
+    
+    @staticmethod
+    def embed(features: Features) -> np.ndarray:
+        """Vector of an answer set"""
+        strand, ratings, interests = features
+        vector = np.zeros(DIMENSIONS)
+        vector[:STRAND_OFFSET] = ratings
+        if strand is not None:
+            vector[STRAND_INDEX[strand]] = 1.0
+        for interest in interests:
+            vector[INTEREST_INDEX[interest]] = 1.0 / len(interests) ** 0.5
+        return vector
+    
+    def scores(self, features: Features) -> np.ndarray:
+        """Similarity (0-100) of an answer set to every program, in program_ids order"""
+        return self.matrix @ self.embed(features)
+    
+    def scores_many(self, features: List[Features]) -> np.ndarray:
+        """
+        scores() for many answer sets, one row each
+        
+        Computed row by row: a matrix-matrix product may round differently
+        from the matrix-vector product of the per-request path.
+        """
+        if not features:
+            return np.zeros((0, len(self)))
+        return np.stack([self.scores(f) for f in features])
+    
+    def justification(self, row: int, features: Features) -> str:
+        """Why a program is similar to an answer set"""
+        strand, ratings, interests = features
+        skills, strands, linked = self.traits[row]
+        
+        reasons = []
+        strong = [skill.replace('_', ' ') for skill in skills if ratings[SKILL_INDEX[skill]] >= 0.75]
+        if strong:
+            reasons.append(f"your strength in {_join(strong)}")
+        if strand in strands:
+            reasons.append(f"your {strand} strand")
+        shared = [interest for interest in interests if interest in linked]
+        if shared:
+            reasons.append(f"your interest in {_join(shared)}")
+        
+        if not reasons:
+            return "Your answers are broadly similar to this program's profile."
+        return f"Suggested for {_join(reasons)}, which match this program's profile."
+    
+    def fallback(self, features: Features, scores: np.ndarray, exclude: set, count: int,
+                 min_score: float) -> List[Dict]:
+        """
+        Most similar programs, for slots the rules left empty
+        
+        Args:
+            features: Answer set features
+            scores: scores(features)
+            exclude: Program ids the rules already judged
+            count: Recommendations wanted
+            min_score: Minimum similarity
+        
+        Returns:
+            Recommendation dicts (without rank), best first, ties by program id
+        """
+        if count <= 0:
+            return []
+        picks = heapq.nsmallest(count, (
+            (-score, program_id, row)
+            for row, (program_id, score) in enumerate(zip(self.program_ids, scores.tolist()))
+            if score >= min_score and program_id not in exclude))
+        return [{
+            'program_id': program_id,
+            'confidence': -negative,
+            'justification': self.justification(row, features),
+            'rules_triggered': []
+        } for negative, program_id, row in picks]
+
+
+def content_model() -> ContentModel:
+    """Model of the active catalog programs, rebuilt after program changes"""
+    from program_catalog import program_catalog
+    
+    return program_catalog.cached(
+        'content_model', lambda: ContentModel(program_catalog.active(), program_catalog.version))
@@ -0,0 +1,132 @@
+"""
+Materialized Dashboard Counters
+
+The admin dashboard reads its totals from the small dashboard_stats table
+instead of running COUNT(*) over students, responses and recommendations
+on every load. Every write path that changes those counts applies its
+deltas with bump() inside its own transaction, so the counters commit or
+roll back together with the data. rebuild() recomputes everything from
+scratch for reconciliation.
+
+Keys:
+    students, responses, recommendations   totals
+    strand:<strand>                        students per strand
+    program:<program_id>                   recommendations per program
+    feedback:<feedback>                    recommendations per feedback value
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func
+
+from db import db
+from models import FEEDBACK_VALUES, STRANDS, DashboardStat, QuestionnaireResponse, Recommendation, Student
+
+
+def _upsert(table):
+    """Dialect-specific INSERT ... ON CONFLICT statement for the stats table"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def bump(deltas: Dict[str, int]):
+    """
+    Add deltas to counters in the current transaction
+    
+    Args:
+        deltas: Counter key -> amount to add (may be negative)
+    """
+    rows = [{'stat_key': key, 'stat_value': value} for key, value in deltas.items() if value]
+    if not rows:
+        return
+    
+    table = DashboardStat.__table__
+    stmt = _upsert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.stat_key],
+        set_={'stat_value': table.c.stat_value + stmt.excluded.stat_value}
+    )
+    db.session.execute(stmt, rows)
+
+
+def recommendation_deltas(program_ids: Iterable[int], feedback: Iterable[str], sign: int = 1) -> Counter:
+    """Counter changes for adding (sign=1) or removing (sign=-1) recommendations"""
+    deltas = Counter()
+    for program_id in program_ids:
+        deltas['recommendations'] += sign
+        deltas[f'program:{program_id}'] += sign
+    for value in feedback:
+        deltas[f'feedback:{value or "no_feedback"}'] += sign
+    return deltas
+
+
+def submission_deltas(strand: str, recommendations: List[Dict]) -> Counter:
+    """Counter changes for one questionnaire submission"""
+    deltas = Counter({'students': 1, 'responses': 1, f'strand:{strand}': 1})
+    deltas.update(recommendation_deltas(
+        [rec['program_id'] for rec in recommendations],
+        ['no_feedback'] * len(recommendations)
+    ))
+    return deltas
+
+
+def feedback_deltas(old: str, new: str) -> Counter:
+    """
+    Counter changes for a recommendation's feedback moving from old to new
+    
+    Raises ValueError if new is not one of FEEDBACK_VALUES.
+    """
+    if new not in FEEDBACK_VALUES:
+        raise ValueError(f"Unknown feedback: {new!r}")
+    deltas = Counter()
+    if old != new:
+        deltas[f'feedback:{old or "no_feedback"}'] -= 1
+        deltas[f'feedback:{new}'] += 1
+    return deltas
+
+
+def read() -> Dict[str, int]:
+    """All counters, keyed by stat key"""
+    return dict(db.session.query(DashboardStat.stat_key, DashboardStat.stat_value).all())
+
+
+def strand_stats(stats: Dict[str, int]) -> List[Tuple[str, int]]:
+    """(strand, students) pairs for the dashboard chart"""
+    return [(strand, stats.get(f'strand:{strand}', 0)) for strand in STRANDS]
+
+
+def rebuild() -> Dict[str, int]:
+    """
+    Recompute every counter from the underlying tables and commit
+    
+    Returns:
+        The rebuilt counters
+    """
+    stats = Counter()
+    stats['students'] = db.session.query(func.count(Student.student_id)).scalar()
+    stats['responses'] = db.session.query(func.count(QuestionnaireResponse.response_id)).scalar()
+    stats['recommendations'] = db.session.query(func.count(Recommendation.recommendation_id)).scalar()
+    
+    for strand, count in db.session.query(Student.strand, func.count()).group_by(Student.strand):
+        stats[f'strand:{strand}'] = count
+    for program_id, count in db.session.query(
+            Recommendation.program_id, func.count()).group_by(Recommendation.program_id):
+        stats[f'program:{program_id}'] = count
+    for feedback, count in db.session.query(
+            Recommendation.student_feedback, func.count()).group_by(Recommendation.student_feedback):
+        stats[f'feedback:{feedback or "no_feedback"}'] = count
+    
+    try:
+        db.session.query(DashboardStat).delete()
+        db.session.add_all(DashboardStat(stat_key=key, stat_value=value)
+                           for key, value in stats.items())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return dict(stats)
@@ -1,3 +1,115 @@
+import time
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
 db = SQLAlchemy()
+
+# (model class, callback) pairs already registered by watch_model_changes
+_watched = set()
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the configured PRAGMA statements on every new SQLite connection"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    
+    event.listen(engine, 'connect', set_pragmas)
+
+
+class StoredVersion:
+    """
+    Change counter of one table, kept in the cache_versions table
+    
+    On SQLite, triggers (see migrate_database.ensure_version_triggers)
+    bump the counter on every insert, update or delete of the table,
+    whichever process, script or raw SQL statement makes it. Process-wide
+    caches built from the table poll it at most every `interval` seconds
+    and reload when it has moved, so an edit made in one worker reaches
+    the others.
+    """
+    
+    # Seconds between reads of the counter (set from CACHE_VERSION_CHECK_SECONDS)
+    interval = 1.0
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.updated_at = None
+        self._value = None
+        self._checked = float('-inf')
+    
+    def changed(self) -> bool:
+        """
+        Whether the counter moved since it was last read
+        
+        Returns False without a query while the last read is more recent
+        than `interval`, outside an app context and before the table
+        exists.
+        """
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return False
+        self._checked = now
+        
+        from models import CacheVersion
+        try:
+            row = db.session.execute(
+                select(CacheVersion.version, CacheVersion.updated_at)
+                .where(CacheVersion.name == self.name)).first()
+        except (RuntimeError, SQLAlchemyError):
+            return False
+        if row is None:
+            return False
+        
+        previous, self._value = self._value, row.version
+        self.updated_at = row.updated_at
+        return previous is not None and previous != self._value
+    
+    def reset(self):
+        """Take the next value read as current (the cache was just dropped)"""
+        self._value = None
+        self._checked = float('-inf')
+
+
+def watch_model_changes(model_cls, on_commit):
+    """
+    Call on_commit after every commit that wrote rows of model_cls
+    
+    Sessions about to write such rows are flagged before each flush; the
+    flag is consumed by the commit or dropped by a rollback, so rolled
+    back writes do not trigger the callback. Watching the same model with
+    the same callback again does nothing.
+    
+    Args:
+        model_cls: Mapped class to watch
+        on_commit: Called without arguments after the commit
+    """
+    key = (model_cls, on_commit)
+    if key in _watched:
+        return
+    _watched.add(key)
+    
+    def track_changes(session, flush_context, instances):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, model_cls):
+                session.info[key] = True
+                return
+    
+    def notify(session):
+        if session.info.pop(key, False):
+            on_commit()
+    
+    def discard(session):
+        session.info.pop(key, None)
+    
+    event.listen(Session, 'before_flush', track_changes)
+    event.listen(Session, 'after_commit', notify)
+    event.listen(Session, 'after_rollback', discard)
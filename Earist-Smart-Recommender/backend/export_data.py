@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Streaming data export
+
+Exports students, questionnaire responses or recommendations as CSV or
+JSONL, optionally gzip-compressed. Rows are streamed from a server-side
+cursor in yield_per batches and encoded into ~64 KB chunks, so memory
+stays flat regardless of table size. The same generator backs the
+/admin/export/<entity> endpoints and this command line tool.
+
+Usage:
+    python export_data.py students -o students.csv
+    python export_data.py responses --format jsonl --top 3 --gzip -o responses.jsonl.gz
+    python export_data.py recommendations > recommendations.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import and_, select
+
+from db import db
+from models import SKILL_FIELDS, QuestionnaireResponse, Recommendation, Student
+from program_catalog import program_catalog
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024
+
+
+def _value(value):
+    """Format a column value for export"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    return value
+
+
+def _stream(stmt):
+    """Execute a Core select on a server-side cursor, yield_per rows at a time"""
+    return db.session.execute(stmt, execution_options={'yield_per': YIELD_PER})
+
+
+def export_students(top: int) -> Tuple[List[str], Iterator[Tuple]]:
+    """Students table rows"""
+    table = Student.__table__
+    columns = ['student_id', 'student_name', 'email', 'grade_level', 'strand',
+               'status', 'date_registered']
+    
+    stmt = select(*(table.c[name] for name in columns)).order_by(table.c.student_id)
+    return columns, (tuple(row) for row in _stream(stmt))
+
+
+def export_recommendations(top: int) -> Tuple[List[str], Iterator[Tuple]]:
+    """Recommendation rows with the student and program they belong to"""
+    rec = Recommendation.__table__
+    student = Student.__table__
+    columns = ['recommendation_id', 'response_id', 'student_id', 'student_name', 'strand',
+               'rank_position', 'program_code', 'program_name', 'confidence_score',
+               'rules_triggered', 'student_feedback', 'recommendation_date']
+    
+    stmt = select(
+        rec.c.recommendation_id, rec.c.response_id, rec.c.student_id,
+        student.c.student_name, student.c.strand, rec.c.rank_position, rec.c.program_id,
+        rec.c.confidence_score, rec.c.rules_triggered, rec.c.student_feedback,
+        rec.c.recommendation_date
+    ).join(student, student.c.student_id == rec.c.student_id).order_by(rec.c.recommendation_id)
+    
+    def rows():
+        for row in _stream(stmt):
+            program = program_catalog.get(row.program_id)
+            yield (*row[:6],
+                   program.program_code if program else row.program_id,
+                   program.program_name if program else None,
+                   *row[7:])
+    
+    return columns, rows()
+
+
+def export_responses(top: int) -> Tuple[List[str], Iterator[Tuple]]:
+    """
+    One row per questionnaire response with its student and top programs
+    
+    Responses, students and the first top recommendations are read in a
+    single ordered join; the recommendation rows of each response are
+    adjacent, so they are folded into columns as the cursor advances.
+    """
+    response = QuestionnaireResponse.__table__
+    student = Student.__table__
+    rec = Recommendation.__table__
+    
+    base = ['response_id', 'student_id', 'student_name', 'grade_level', 'strand',
+            'response_date', 'favorite_subjects', 'interests', 'learning_style',
+            'career_goal_description', 'career_priority'] + [f'skill_{s}' for s in SKILL_FIELDS]
+    columns = base + [f'{name}_{n}' for n in range(1, top + 1)
+                      for name in ('program', 'confidence')]
+    
+    stmt = select(
+        response.c.response_id, response.c.student_id, student.c.student_name,
+        student.c.grade_level, student.c.strand, response.c.response_date,
+        response.c.favorite_subjects, response.c.interests, response.c.learning_style,
+        response.c.career_goal_description, response.c.career_priority,
+        *(response.c[f'skill_{s}'] for s in SKILL_FIELDS),
+        rec.c.rank_position, rec.c.program_id, rec.c.confidence_score
+    ).join(
+        student, student.c.student_id == response.c.student_id
+    ).outerjoin(
+        rec, and_(rec.c.response_id == response.c.response_id, rec.c.rank_position <= top)
+    ).order_by(response.c.response_id)
+    
+    width = len(base)
+    
+    def emit(head, picks):
+        programs = []
+        for _, program_id, confidence in sorted(picks, key=lambda pick: pick[0]):
+            program = program_catalog.get(program_id)
+            programs += [program.program_code if program else program_id, confidence]
+        return (*head, *programs, *[None] * (2 * top - len(programs)))
+    
+    def rows():
+        head, picks = None, []
+        for row in _stream(stmt):
+            if head is None or row[0] != head[0]:
+                if head is not None:
+                    yield emit(head, picks)
+                head, picks = row[:width], []
+            if row.program_id is not None:
+                picks.append(row[width:])
+        if head is not None:
+            yield emit(head, picks)
+    
+    return columns, rows()
+
+
+ENTITIES: Dict[str, Callable[[int], Tuple[List[str], Iterator[Tuple]]]] = {
+    'students': export_students,
+    'responses': export_responses,
+    'recommendations': export_recommendations
+}
+
+
+def _encode_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([_value(v) for v in row])
+        yield buffer.getvalue()
+
+
+def _encode_jsonl(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + '\n'
+
+
+def generate(entity: str, fmt: str = 'csv', top: int = 3, compress: bool = False) -> Iterator[bytes]:
+    """
+    Stream an export as encoded byte chunks
+    
+    Args:
+        entity: 'students', 'responses' or 'recommendations'
+        fmt: 'csv' or 'jsonl'
+        top: Programs per response in the responses export
+        compress: gzip the output
+    
+    Yields:
+        Chunks of roughly CHUNK_BYTES bytes (before compression)
+    """
+    columns, rows = ENTITIES[entity](top)
+    lines = _encode_csv(columns, rows) if fmt == 'csv' else _encode_jsonl(columns, rows)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            data = ''.join(pending).encode('utf-8')
+            pending, size = [], 0
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    
+    data = ''.join(pending).encode('utf-8')
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def export_filename(entity: str, fmt: str, compress: bool) -> str:
+    """Download name, e.g. responses-20250601.jsonl.gz"""
+    name = f"{entity}-{datetime.now():%Y%m%d}.{fmt}"
+    return name + '.gz' if compress else name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export data as CSV or JSONL')
+    parser.add_argument('entity', choices=sorted(ENTITIES))
+    parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--top', type=int, default=3,
+                        help='programs per response in the responses export')
+    parser.add_argument('--gzip', action='store_true', help='compress the output')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args(argv)
+    
+    # Keep the app's startup messages out of an export written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        from app import create_app
+        app = create_app()
+    
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        with app.app_context():
+            for chunk in generate(args.entity, args.fmt, args.top, args.gzip):
+                out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    
+    if args.output:
+        print(f"✅ {args.entity} exported to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
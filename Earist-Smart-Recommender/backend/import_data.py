@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Bulk questionnaire import
+
+Loads questionnaires encoded from paper forms (CSV or JSONL) in one run:
+rows are validated against the questionnaire_responses constraints in a
+vectorized pass, scored with the batch inference engine and committed in
+chunked transactions. Invalid rows are skipped and reported; they never
+leave partial data behind.
+
+JSONL lines use the /api/submit-response payload shape. CSV files use
+one column per field: name, grade_level, strand, email,
+favorite_subjects, interests (comma or semicolon separated),
+learning_style, career_goals, career_priority and skill_<name> (1-5).
+
+Usage:
+    python import_data.py section-a.csv
+    python import_data.py drive.jsonl --chunk-size 2000 --report errors.json
+    python import_data.py section-a.csv --validate-only
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from typing import Dict, IO, List, Optional, Tuple
+
+import numpy as np
+
+from db import db
+from models import SKILL_FIELDS, STRANDS, Student
+from persistence import insert_submissions
+
+GRADE_LEVELS = ('11', '12')
+LIST_FIELDS = ('favorite_subjects', 'interests')
+
+# Unparseable rows: (row number, error message)
+ParseError = Tuple[int, str]
+
+
+def _split_list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'expected a list or a string, got {type(value).__name__}')
+    return [item.strip() for item in re.split(r'[;,]', value or '') if item.strip()]
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def payload_from_csv(row: Dict[str, str]) -> Dict:
+    """Questionnaire payload for a CSV row"""
+    def field(name, *aliases):
+        for key in (name, *aliases):
+            value = row.get(key)
+            if value is not None and value.strip():
+                return value.strip()
+        return None
+    
+    return {
+        'name': field('name', 'student_name'),
+        'grade_level': field('grade_level'),
+        'strand': field('strand'),
+        'email': field('email'),
+        'favorite_subjects': _split_list(row.get('favorite_subjects')),
+        'skills': {skill: row.get(f'skill_{skill}') for skill in SKILL_FIELDS},
+        'interests': _split_list(row.get('interests')),
+        'learning_style': field('learning_style'),
+        'career_goals': field('career_goals', 'career_goal_description') or '',
+        'career_priority': field('career_priority') or ''
+    }
+
+
+def read_payloads(stream: IO[str], fmt: str) -> Tuple[List[Dict], List[int], List[ParseError]]:
+    """
+    Parse a CSV or JSONL upload
+    
+    Returns:
+        (payloads, their 1-based row numbers, rows that could not be parsed)
+    """
+    payloads, row_numbers, errors = [], [], []
+    
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), 1):
+            payloads.append(payload_from_csv(row))
+            row_numbers.append(number)
+        return payloads, row_numbers, errors
+    
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            errors.append((number, f'invalid JSON: {e}'))
+            continue
+        if not isinstance(data, dict):
+            errors.append((number, 'expected a JSON object'))
+            continue
+        
+        data = dict(data)
+        data['skills'] = data.get('skills') or {}
+        try:
+            for field in LIST_FIELDS:
+                data[field] = _split_list(data.get(field))
+        except ValueError as e:
+            errors.append((number, f'{field}: {e}'))
+            continue
+        payloads.append(data)
+        row_numbers.append(number)
+    return payloads, row_numbers, errors
+
+
+def validate(payloads: List[Dict]) -> List[List[str]]:
+    """
+    Check payloads against the students / questionnaire_responses constraints
+    
+    Each constraint is evaluated over the whole batch at once with NumPy.
+    Skills are normalized to ints, grade levels to strings and names and
+    strands stripped of surrounding whitespace, in place.
+    
+    Returns:
+        Error messages for each payload (empty list = valid)
+    """
+    count = len(payloads)
+    errors: List[List[str]] = [[] for _ in range(count)]
+    if count == 0:
+        return errors
+    
+    def flag(mask, message):
+        for index in np.flatnonzero(mask):
+            errors[index].append(message)
+    
+    # CHECK (skill_* BETWEEN 1 AND 5)
+    rated = np.fromiter((isinstance(p.get('skills'), dict) for p in payloads),
+                        dtype=bool, count=count)
+    flag(~rated, 'skills must map each skill to a rating')
+    skills = np.array([[_number(p['skills'].get(skill)) if is_rated else np.nan
+                        for skill in SKILL_FIELDS]
+                       for p, is_rated in zip(payloads, rated)], dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        bad_skills = np.isnan(skills) | (skills < 1) | (skills > 5) | (skills != np.round(skills))
+    for column, skill in enumerate(SKILL_FIELDS):
+        flag(bad_skills[:, column] & rated, f'skill_{skill} must be a whole number from 1 to 5')
+    
+    def column(key):
+        return np.array([str(p.get(key) or '').strip() for p in payloads], dtype=object)
+    
+    names = column('name')
+    name_lengths = np.fromiter((len(name) for name in names), dtype=np.int64, count=count)
+    flag(name_lengths == 0, 'name is required')
+    flag(name_lengths > 100, 'name is longer than 100 characters')
+    
+    grades = column('grade_level')
+    flag(~np.isin(grades, GRADE_LEVELS), f'grade_level must be one of {", ".join(GRADE_LEVELS)}')
+    
+    strands = column('strand')
+    flag(~np.isin(strands, STRANDS), f'strand must be one of {", ".join(STRANDS)}')
+    
+    for field in LIST_FIELDS:
+        flag(np.fromiter((not p[field] for p in payloads), dtype=bool, count=count),
+             f'{field} needs at least one entry')
+    
+    # UNIQUE (email), within the file
+    emails = column('email')
+    present = emails != ''
+    if present.any():
+        _, inverse, counts = np.unique(emails[present].astype(str), return_inverse=True,
+                                       return_counts=True)
+        duplicate = np.zeros(count, dtype=bool)
+        duplicate[np.flatnonzero(present)] = counts[inverse] > 1
+        flag(duplicate, 'email appears more than once in the file')
+    
+    valid = ~bad_skills.any(axis=1)
+    for index in np.flatnonzero(valid):
+        payload = payloads[index]
+        payload['skills'] = {skill: int(value) for skill, value in zip(SKILL_FIELDS, skills[index])}
+        payload['name'] = names[index]
+        payload['grade_level'] = grades[index]
+        payload['strand'] = strands[index]
+        payload['email'] = emails[index] or None
+    
+    return errors
+
+
+def _registered_emails(emails: List[str]) -> set:
+    """Emails in the list that already belong to a student"""
+    found = set()
+    for start in range(0, len(emails), 500):
+        batch = emails[start:start + 500]
+        found.update(email for email, in db.session.query(Student.email)
+                     .filter(Student.email.in_(batch)))
+    return found
+
+
+def import_payloads(engine, payloads: List[Dict], row_numbers: Optional[List[int]] = None,
+                    chunk_size: int = 1000, validate_only: bool = False) -> Dict:
+    """
+    Validate, score and store questionnaire payloads
+    
+    Valid rows are written chunk_size at a time, one transaction per chunk.
+    If a chunk fails to commit, its rows are retried one by one so a single
+    bad row only loses itself.
+    
+    Args:
+        engine: InferenceEngine used to score the batch
+        payloads: Questionnaire payloads
+        row_numbers: Row number of each payload for the report (default 1..n)
+        chunk_size: Rows per transaction
+        validate_only: Only run the checks, write nothing
+    
+    Returns:
+        Report with total, imported, failed and per-row errors
+    """
+    row_numbers = row_numbers or list(range(1, len(payloads) + 1))
+    errors = validate(payloads)
+    
+    emails = [p['email'] for p, e in zip(payloads, errors) if not e and p['email']]
+    taken = _registered_emails(emails) if emails else set()
+    for payload, row_errors in zip(payloads, errors):
+        if not row_errors and payload['email'] in taken:
+            row_errors.append('email is already registered')
+    
+    valid = [index for index, row_errors in enumerate(errors) if not row_errors]
+    imported = 0
+    
+    if not validate_only:
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            batch = [payloads[index] for index in chunk]
+            recommendations = engine.generate_recommendations_batch(batch)
+            try:
+                insert_submissions(batch, recommendations)
+                db.session.commit()
+                imported += len(chunk)
+                continue
+            except Exception:
+                db.session.rollback()
+            
+            for index, payload, recs in zip(chunk, batch, recommendations):
+                try:
+                    insert_submissions([payload], [recs])
+                    db.session.commit()
+                    imported += 1
+                except Exception as e:
+                    db.session.rollback()
+                    errors[index].append(f'could not be saved: {e.__class__.__name__}')
+    
+    failed = [{'row': row_numbers[index], 'errors': row_errors}
+              for index, row_errors in enumerate(errors) if row_errors]
+    return {
+        'total': len(payloads),
+        'valid': len(payloads) - len(failed),
+        'imported': imported,
+        'failed': len(failed),
+        'errors': failed
+    }
+
+
+def import_file(engine, stream: IO[str], fmt: str, **options) -> Dict:
+    """Parse and import a CSV / JSONL stream; see import_payloads for options"""
+    payloads, row_numbers, parse_errors = read_payloads(stream, fmt)
+    report = import_payloads(engine, payloads, row_numbers, **options)
+    
+    if parse_errors:
+        report['total'] += len(parse_errors)
+        report['failed'] += len(parse_errors)
+        report['errors'] = sorted(
+            report['errors'] + [{'row': row, 'errors': [message]} for row, message in parse_errors],
+            key=lambda error: error['row'])
+    return report
+
+
+def file_format(filename: str, default: str = 'csv') -> str:
+    """'csv' or 'jsonl' from a file name"""
+    if filename.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import encoded questionnaires in bulk')
+    parser.add_argument('path', help='CSV or JSONL file')
+    parser.add_argument('--format', dest='fmt', choices=['csv', 'jsonl'],
+                        help='file format (default: from the extension)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='rows per transaction')
+    parser.add_argument('--validate-only', action='store_true', help='check the file, write nothing')
+    parser.add_argument('--report', help='write the full error report to this JSON file')
+    args = parser.parse_args(argv)
+    
+    from app import create_app, get_inference_engine
+    
+    app = create_app()
+    
+    started = time.perf_counter()
+    with app.app_context(), open(args.path, newline='', encoding='utf-8-sig') as stream:
+        report = import_file(get_inference_engine(), stream, args.fmt or file_format(args.path),
+                             chunk_size=args.chunk_size, validate_only=args.validate_only)
+    elapsed = time.perf_counter() - started
+    
+    for error in report['errors'][:20]:
+        print(f"   ❌ row {error['row']}: {'; '.join(error['errors'])}")
+    if report['failed'] > 20:
+        print(f"   ... {report['failed'] - 20} more")
+    if args.report:
+        with open(args.report, 'w') as out:
+            json.dump(report, out, indent=2)
+    
+    verb = 'validated' if args.validate_only else 'imported'
+    count = report['valid'] if args.validate_only else report['imported']
+    print(f"✅ {count} of {report['total']} rows {verb} in {elapsed:.2f}s "
+          f"({report['failed']} rejected)")
+    return 0 if report['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,52 +2,1045 @@
 Rule-Based Inference Engine for Program Recommendation
 """
 
+import heapq
 import json
-from typing import Dict, List, Any
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Mapping, Optional, Union
+
+from config import Config
+from db import StoredVersion
+from scoring import NEG_INF, Scorer, get_scorer
+
+
+# ============================================
+# COMPILED RULE SET
+# ============================================
+
+def _field_getter(field: str) -> Callable[[Dict], Any]:
+    """
+    Build an accessor for a dot-notation profile field
+    
+    Args:
+        field: Field name, supports dot notation (e.g., 'skills.analytical')
+        
+    Returns:
+        Function returning the field value from a profile, or None
+    """
+    keys = tuple(field.split('.'))
+    
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda profile: profile.get(key) if isinstance(profile, dict) else None
+    
+    if len(keys) == 2:
+        outer, inner = keys
+        
+        def nested(profile):
+            value = profile.get(outer) if isinstance(profile, dict) else None
+            return value.get(inner) if isinstance(value, dict) else None
+        
+        return nested
+    
+    def getter(profile):
+        value = profile
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+            if value is None:
+                return None
+        return value
+    
+    return getter
+
+
+def _to_float(value) -> Optional[float]:
+    """Convert a profile value to float, returning None when not numeric"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_criterion(criterion: Dict) -> Callable[[Dict], bool]:
+    """
+    Compile a single criterion into a predicate over a student profile
+    
+    A missing or non-numeric rating fails only its own >=/<= criterion.
+    (The interpreted evaluate_rule used to reject the whole rule instead,
+    so an OR rule may now fire on its other criteria.)
+    
+    Args:
+        criterion: Dictionary with field, operator and value
+        
+    Returns:
+        Function returning True if the profile satisfies the criterion
+    """
+    get = _field_getter(criterion['field'])
+    cond_operator = criterion['operator']
+    expected_value = criterion['value']
+    
+    if cond_operator == '==':
+        return lambda profile: get(profile) == expected_value
+    
+    if cond_operator in ('>=', '<='):
+        threshold = float(expected_value)
+        
+        def compare(profile):
+            actual = _to_float(get(profile))
+            if actual is None:
+                return False
+            return actual >= threshold if cond_operator == '>=' else actual <= threshold
+        
+        return compare
+    
+    if cond_operator == 'IN':
+        if not isinstance(expected_value, list):
+            return lambda profile: False
+        
+        def member(profile):
+            try:
+                return get(profile) in expected_value
+            except TypeError:
+                return False
+        
+        return member
+    
+    if cond_operator == 'CONTAINS':
+        def contains(profile):
+            actual = get(profile)
+            if isinstance(actual, list):
+                return expected_value in actual
+            if isinstance(actual, str):
+                # Profiles rebuilt from the database may hold JSON strings
+                try:
+                    return expected_value in json.loads(actual)
+                except (ValueError, TypeError):
+                    return False
+            return False
+        
+        return contains
+    
+    return lambda profile: False
+
+
+def compile_conditions(conditions: Dict) -> Callable[[Dict], bool]:
+    """
+    Compile a rule condition structure into a single predicate
+    
+    Args:
+        conditions: Dictionary with operator and criteria
+        
+    Returns:
+        Function returning True if the profile satisfies the conditions
+    """
+    operator = conditions.get('operator', 'AND')
+    predicates = tuple(compile_criterion(c) for c in conditions.get('criteria', []))
+    
+    if not predicates:
+        return lambda profile: False
+    if operator == 'AND':
+        return lambda profile: all(p(profile) for p in predicates)
+    if operator == 'OR':
+        return lambda profile: any(p(profile) for p in predicates)
+    return lambda profile: False
+
+
+class CompiledRule:
+    """
+    An active rule with its JSON conditions parsed and compiled once
+    """
+    
+    __slots__ = ('rule_id', 'program_id', 'confidence', 'justification',
+                 'conditions', 'weight', 'matches')
+    
+    def __init__(self, rule_id, program_id, confidence, justification, conditions: Dict,
+                 weight: float = 1.0):
+        if not weight > 0:
+            raise ValueError(f"Rule weight must be positive, got {weight}")
+        self.rule_id = rule_id
+        self.program_id = program_id
+        self.confidence = confidence
+        self.justification = justification
+        self.conditions = conditions
+        self.weight = weight
+        self.matches = compile_conditions(conditions)
+    
+    @classmethod
+    def from_model(cls, rule) -> 'CompiledRule':
+        """Compile a Rule row"""
+        return cls(
+            rule_id=rule.rule_id,
+            program_id=rule.recommended_program_id,
+            confidence=float(rule.confidence_score),
+            justification=rule.justification,
+            conditions=json.loads(rule.conditions),
+            weight=float(rule.weight) if rule.weight is not None else 1.0
+        )
+    
+    def fire(self) -> Dict:
+        """Recommendation produced when this rule fires"""
+        return {
+            'program_id': self.program_id,
+            'confidence': self.confidence,
+            'justification': self.justification,
+            'rule_id': self.rule_id,
+            'weight': self.weight
+        }
+
+
+def _is_hashable(value) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+def _index_key(criterion: Dict) -> Optional[tuple]:
+    """
+    Describe how a criterion can be used as an index precondition
+    
+    Returns:
+        (kind, field, values) where kind is 'eq' or 'contains', or None if
+        the criterion cannot be looked up by value
+    """
+    cond_operator = criterion['operator']
+    value = criterion['value']
+    
+    if cond_operator == '==' and _is_hashable(value):
+        return ('eq', criterion['field'], (value,))
+    if cond_operator == 'IN' and isinstance(value, list) and all(_is_hashable(v) for v in value):
+        return ('eq', criterion['field'], tuple(value))
+    if cond_operator == 'CONTAINS' and _is_hashable(value):
+        return ('contains', criterion['field'], (value,))
+    return None
+
+
+class RuleIndex:
+    """
+    Discrimination index over compiled rules
+    
+    Every AND rule is filed under one of its equality, IN or CONTAINS
+    criteria (the most selective one). A profile is then only matched
+    against rules whose indexed precondition it satisfies, plus the rules
+    that have no indexable criterion.
+    """
+    
+    def __init__(self, rules: List[CompiledRule]):
+        self._eq = {}        # field -> (getter, {value: [rule positions]})
+        self._contains = {}  # field -> (getter, {value: [rule positions]}, [rule positions])
+        self._unindexed = []
+        
+        for position, rule in enumerate(rules):
+            key = self._choose_key(rule)
+            if key is None:
+                self._unindexed.append(position)
+                continue
+            
+            kind, field, values = key
+            if kind == 'eq':
+                _, buckets = self._eq.setdefault(field, (_field_getter(field), {}))
+            else:
+                _, buckets, indexed = self._contains.setdefault(
+                    field, (_field_getter(field), {}, []))
+                indexed.append(position)
+            for value in values:
+                buckets.setdefault(value, []).append(position)
+    
+    @staticmethod
+    def _choose_key(rule: CompiledRule) -> Optional[tuple]:
+        """Pick the indexed precondition of a rule, preferring equality tests"""
+        if rule.conditions.get('operator', 'AND') != 'AND':
+            return None
+        
+        keys = [k for k in map(_index_key, rule.conditions.get('criteria', [])) if k]
+        if not keys:
+            return None
+        # Equality tests with the fewest accepted values reject the most profiles
+        return min(keys, key=lambda k: (k[0] != 'eq', len(k[2])))
+    
+    def candidates(self, profile: Dict) -> List[int]:
+        """
+        Positions of the rules the profile has to be matched against
+        
+        Args:
+            profile: Student profile data
+            
+        Returns:
+            Sorted rule positions (preserves rule order)
+        """
+        positions = set(self._unindexed)
+        
+        for get, buckets in self._eq.values():
+            try:
+                positions.update(buckets.get(get(profile), ()))
+            except TypeError:
+                continue
+        
+        for get, buckets, indexed in self._contains.values():
+            actual = get(profile)
+            if isinstance(actual, list):
+                for item in actual:
+                    try:
+                        positions.update(buckets.get(item, ()))
+                    except TypeError:
+                        continue
+            elif isinstance(actual, str):
+                # JSON string values are decoded by the rule predicates
+                positions.update(indexed)
+        
+        return sorted(positions)
+
+
+def _canonicalizer(field: str, criteria: List[Dict]) -> Callable[[Dict], Any]:
+    """
+    Reduce a profile field to what the given criteria on it can observe
+    
+    - fields only compared with >= / <= become their position among the
+      thresholds (ratings 1 and 2 are the same when no rule tests 2)
+    - fields only tested with CONTAINS become which tested values they
+      contain (item order and untested items are ignored)
+    - any other field keeps its exact value
+    """
+    get = _field_getter(field)
+    operators = {c['operator'] for c in criteria}
+    
+    if operators <= {'>=', '<='}:
+        thresholds = sorted({float(c['value']) for c in criteria})
+        
+        def position(profile):
+            actual = _to_float(get(profile))
+            if actual is None:
+                return None
+            # Between two thresholds, or on one: fixes every >= / <= outcome
+            index = bisect_left(thresholds, actual)
+            return index * 2 + (index < len(thresholds) and thresholds[index] == actual)
+        
+        return position
+    
+    if operators == {'CONTAINS'}:
+        tested = []
+        for c in criteria:
+            if c['value'] not in tested:
+                tested.append(c['value'])
+        
+        def contained(profile):
+            actual = get(profile)
+            if isinstance(actual, str):
+                try:
+                    actual = json.loads(actual)
+                except (ValueError, TypeError):
+                    return ()
+            elif not isinstance(actual, list):
+                return ()
+            
+            found = []
+            for value in tested:
+                try:
+                    found.append(value in actual)
+                except TypeError:
+                    found.append(False)
+            return tuple(found)
+        
+        return contained
+    
+    return lambda profile: _freeze(get(profile))
+
+
+def _freeze(value):
+    """Hashable copy of a JSON value (lists and dicts are tagged by type)"""
+    if isinstance(value, list):
+        return (list, tuple(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return (dict, frozenset((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+class ProfileFingerprint:
+    """
+    Canonical key of the profile answers a rule set can observe
+    
+    Profiles with equal fingerprints fire exactly the same rules, so their
+    ranked recommendations are interchangeable. The key is the profile's
+    candidate rules from the discrimination index (a rule that is not a
+    candidate cannot fire) plus every field those candidates test, reduced
+    by _canonicalizer. Fields no candidate reads (name, email, skills only
+    other strands' rules test, ...) are not part of the key.
+    """
+    
+    # Distinct candidate sets remembered before starting over
+    MAX_SCOPES = 1024
+    
+    def __init__(self, rules: List[CompiledRule], index: 'RuleIndex'):
+        self.rules = rules
+        self.index = index
+        self._scopes: Dict[tuple, tuple] = {}
+    
+    def _scope(self, candidates: tuple) -> tuple:
+        """Canonicalizers for the fields tested by the candidate rules"""
+        criteria = {}
+        for position in candidates:
+            for criterion in self.rules[position].conditions.get('criteria', []):
+                criteria.setdefault(criterion['field'], []).append(criterion)
+        
+        parts = tuple(_canonicalizer(field, criteria[field]) for field in sorted(criteria))
+        if len(self._scopes) >= self.MAX_SCOPES:
+            self._scopes = {}
+        self._scopes[candidates] = parts
+        return parts
+    
+    def __call__(self, profile: Dict) -> Optional[tuple]:
+        """Fingerprint of a profile, or None if it cannot be hashed"""
+        try:
+            candidates = tuple(self.index.candidates(profile))
+            parts = self._scopes.get(candidates) or self._scope(candidates)
+            key = (candidates, tuple([part(profile) for part in parts]))
+            hash(key)
+            return key
+        except TypeError:
+            return None
+
+
+class TopKPlan:
+    """
+    Score bounds of a rule set under one scorer, for RuleSet.match_top
+    
+    Holds each rule's scorer state, the merged extent of all rules from
+    each position on and, per program, the merged extent of its rules from
+    each of its positions on. Extents cover every later rule, not only
+    the profile's candidates, so the bounds are loose but never wrong.
+    """
+    
+    def __init__(self, rules: List[CompiledRule], scorer: Scorer):
+        self.scorer = scorer
+        self.states = [scorer.rule_state(rule.confidence, rule.weight) for rule in rules]
+        extents = [scorer.extent(rule.confidence, rule.weight) for rule in rules]
+        empty = scorer.empty_extent()
+        merge = scorer.merge_extent
+        
+        self.suffix = [empty] * (len(rules) + 1)
+        for position in range(len(rules) - 1, -1, -1):
+            self.suffix[position] = merge(extents[position], self.suffix[position + 1])
+        
+        self.positions: Dict[Any, List[int]] = {}
+        for position, rule in enumerate(rules):
+            self.positions.setdefault(rule.program_id, []).append(position)
+        
+        self.program_suffix: Dict[Any, list] = {}
+        for program_id, positions in self.positions.items():
+            suffix = [empty] * (len(positions) + 1)
+            for n in range(len(positions) - 1, -1, -1):
+                suffix[n] = merge(extents[positions[n]], suffix[n + 1])
+            self.program_suffix[program_id] = suffix
+    
+    def remaining(self, program_id, position: int) -> tuple:
+        """Merged extent of a program's rules after a position"""
+        return self.program_suffix[program_id][bisect_right(self.positions[program_id], position)]
+    
+    def locked(self, states: Dict[Any, tuple], position: int, limit: int,
+               min_score: float) -> Optional[set]:
+        """
+        Programs certain to be the final top recommendations, if known yet
+        
+        Args:
+            states: Merged state of every program with a fired rule so far
+            position: Last rule position evaluated
+            limit, min_score: Ranking settings
+        
+        Returns:
+            The programs that are exactly the top limit scoring at least
+            min_score, whatever the rules after position do, or None while
+            another program could still take their place
+        """
+        if limit <= 0:
+            return set()
+        
+        scorer = self.scorer
+        # A program with no fired rule yet gains at most every remaining rule
+        unseen = NEG_INF
+        if position + 1 < len(self.states):
+            unseen = scorer.bounds(None, self.suffix[position + 1])[1]
+        
+        # Cheap rejections first: lower bounds never exceed current scores
+        if len(states) < limit and unseen >= min_score:
+            return None
+        scores = heapq.nlargest(limit, map(scorer.score, states.values()))
+        if unseen >= (scores[-1] if len(scores) == limit else min_score):
+            return None
+        
+        bounds = {program_id: scorer.bounds(state, self.remaining(program_id, position))
+                  for program_id, state in states.items()}
+        # Chosen like the ranking: by score, ties by program id
+        top = heapq.nsmallest(limit, ((-lower, program_id)
+                                      for program_id, (lower, _) in bounds.items()
+                                      if lower >= min_score))
+        chosen = {program_id for _, program_id in top}
+        if len(top) < limit:
+            threshold, last = min_score, None
+        else:
+            threshold = -top[-1][0]
+            # A program that can at best tie the threshold loses to every
+            # chosen one that may end on it if its id sorts after theirs
+            last = max(program_id for lower, program_id in top if -lower == threshold)
+        
+        if unseen >= threshold:
+            return None
+        for program_id, (_, upper) in bounds.items():
+            if program_id in chosen or upper < threshold:
+                continue
+            if upper == threshold and last is not None and program_id > last:
+                continue
+            return None
+        return chosen
+
+
+class RuleSet:
+    """
+    Immutable snapshot of the compiled active rules
+    
+    Rules are kept strongest first (by confidence, then rule id), so
+    matching in rule order meets the rules that decide the ranking early.
+    """
+    
+    MATCHERS = ('linear', 'indexed', 'rete')
+    
+    def __init__(self, rules: List[CompiledRule], version: int = 0):
+        self.rules = tuple(sorted(rules, key=lambda rule: (-rule.confidence, rule.rule_id)))
+        self.version = version
+        self.index = RuleIndex(self.rules)
+        self._network = None
+        self._batch = None
+        self._fingerprint = None
+        self._plans: Dict[str, TopKPlan] = {}
+    
+    def __len__(self):
+        return len(self.rules)
+    
+    @property
+    def fingerprint(self) -> ProfileFingerprint:
+        """Profile fingerprint over what these rules can observe, built on first use"""
+        if self._fingerprint is None:
+            self._fingerprint = ProfileFingerprint(self.rules, self.index)
+        return self._fingerprint
+    
+    @property
+    def network(self):
+        """Rete network over the rules, built on first use"""
+        if self._network is None:
+            from rete_network import ReteNetwork
+            self._network = ReteNetwork(self.rules)
+        return self._network
+    
+    @property
+    def batch(self):
+        """Vectorized batch matcher over the rules, built on first use"""
+        if self._batch is None:
+            from batch_inference import BatchMatcher
+            self._batch = BatchMatcher(self.rules)
+        return self._batch
+    
+    def match(self, profile: Dict, matcher: str = 'indexed') -> List[Dict]:
+        """
+        Fire every rule whose conditions the profile satisfies
+        
+        Args:
+            profile: Student profile data
+            matcher: 'indexed' (discrimination index), 'rete' (shared
+                condition network) or 'linear' (evaluate every rule)
+            
+        Returns:
+            List of fired rule recommendations, in rule order
+        """
+        if matcher == 'rete':
+            return self.network.match(profile)
+        if matcher == 'linear':
+            return [rule.fire() for rule in self.rules if rule.matches(profile)]
+        if matcher != 'indexed':
+            raise ValueError(f"Unknown rule matcher: {matcher}")
+        
+        rules = self.rules
+        fired = []
+        for position in self.index.candidates(profile):
+            rule = rules[position]
+            if rule.matches(profile):
+                fired.append(rule.fire())
+        return fired
+    
+    def top_k_plan(self, scorer: Scorer) -> TopKPlan:
+        """Score bounds under a scorer, built on first use"""
+        plan = self._plans.get(scorer.name)
+        if plan is None:
+            plan = self._plans[scorer.name] = TopKPlan(self.rules, scorer)
+        return plan
+    
+    def match_top(self, profile: Dict, scorer: Scorer, limit: int,
+                  min_score: float) -> List[Dict]:
+        """
+        Fire the rules that decide a profile's top recommendations
+        
+        Candidate rules are evaluated strongest first, like the indexed
+        matcher. Once the top limit programs scoring at least min_score are
+        certain whatever the remaining rules do, only the rules of those
+        programs are evaluated further. Aggregating and ranking the result
+        gives exactly the top recommendations of matching every rule.
+        
+        Args:
+            profile: Student profile data
+            scorer: Scorer the recommendations are ranked with
+            limit, min_score: Ranking settings
+        
+        Returns:
+            Fired rule recommendations of the programs that can be ranked,
+            in rule order
+        """
+        plan = self.top_k_plan(scorer)
+        rules = self.rules
+        states = {}
+        fired = []
+        chosen = None
+        next_check = 1
+        
+        for position in self.index.candidates(profile):
+            rule = rules[position]
+            if chosen is not None and rule.program_id not in chosen:
+                continue
+            if not rule.matches(profile):
+                continue
+            fired.append(rule.fire())
+            if chosen is not None:
+                continue
+            
+            program_id = rule.program_id
+            state = plan.states[position]
+            states[program_id] = scorer.merge(states[program_id], state) if program_id in states else state
+            # Checking costs a pass over the programs seen, so space checks out as they grow
+            if len(fired) >= next_check:
+                chosen = plan.locked(states, position, limit, min_score)
+                next_check = len(fired) + 1 + len(states) // 8
+        
+        if chosen is None:
+            return fired
+        return [rec for rec in fired if rec['program_id'] in chosen]
+
+
+def load_rule_set(version: int = 0) -> RuleSet:
+    """
+    Load and compile all active rules from the database
+    
+    Rules whose conditions cannot be parsed are skipped and reported.
+    """
+    from models import Rule
+    
+    compiled = []
+    for rule in Rule.query.filter_by(is_active=True).all():
+        try:
+            compiled.append(CompiledRule.from_model(rule))
+        except Exception as e:
+            print(f"Error compiling rule {rule.rule_id}: {e}")
+    
+    return RuleSet(compiled, version)
+
+
+class RuleSetCache:
+    """
+    Process-wide cache of the compiled rule set
+    
+    The rule set is loaded on first use and reloaded after any transaction
+    in this process that inserts, updates or deletes a Rule row commits.
+    With a stored version, it is also reloaded when the rules table's
+    change counter moves, i.e. after edits by other workers, scripts or
+    raw SQL.
+    """
+    
+    def __init__(self, loader: Callable[[int], RuleSet] = load_rule_set,
+                 stored: Optional[StoredVersion] = None):
+        self._loader = loader
+        self._stored = stored
+        self._lock = threading.Lock()
+        self._rule_set: Optional[RuleSet] = None
+        self.version = 0
+    
+    def get(self) -> RuleSet:
+        """Return the current rule set, compiling it if needed"""
+        if self._stored is not None and self._stored.changed():
+            self._drop()
+        
+        rule_set = self._rule_set
+        if rule_set is not None:
+            return rule_set
+        
+        with self._lock:
+            if self._rule_set is None:
+                self._rule_set = self._loader(self.version)
+            return self._rule_set
+    
+    def _drop(self):
+        with self._lock:
+            self._rule_set = None
+            self.version += 1
+    
+    def invalidate(self):
+        """Drop the compiled rule set and bump the version"""
+        self._drop()
+        if self._stored is not None:
+            self._stored.reset()
+
+
+rule_set_cache = RuleSetCache(stored=StoredVersion('rules'))
+
+
+def _copy_recommendations(recommendations: List[Dict]) -> List[Dict]:
+    """Copies safe to hand out while the originals stay cached"""
+    return [dict(rec, rules_triggered=list(rec['rules_triggered'])) for rec in recommendations]
+
+
+class RecommendationCache:
+    """
+    Bounded LRU of ranked recommendations, keyed by profile fingerprint
+    
+    Entries belong to one rule set version: the first lookup under a new
+    version drops them all. Counters are per process, like the cache.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[tuple, List[Dict]]' = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _use_version(self, version: int):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
+    
+    def get(self, version: int, fingerprint: tuple) -> Optional[List[Dict]]:
+        """Copy of the cached recommendations, or None"""
+        with self._lock:
+            self._use_version(version)
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.hits += 1
+        return _copy_recommendations(entry)
+    
+    def put(self, version: int, fingerprint: tuple, recommendations: List[Dict]):
+        """Remember a profile's ranked recommendations"""
+        entry = _copy_recommendations(recommendations)
+        with self._lock:
+            self._use_version(version)
+            self._entries[fingerprint] = entry
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Size, hit rate and eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(100.0 * self.hits / lookups, 1) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'rule_set_version': self._version
+            }
+
+
+def invalidate_rule_set():
+    """
+    Force the compiled rule set to be rebuilt in this process
+    
+    On SQLite every rule change bumps the stored version, which all
+    processes pick up within CACHE_VERSION_CHECK_SECONDS. On other
+    databases, call this after changing rules outside the ORM unit of
+    work (e.g. bulk UPDATE statements or raw SQL).
+    """
+    rule_set_cache.invalidate()
+
+
+def register_rule_listeners():
+    """Invalidate the rule set cache whenever Rule rows are committed"""
+    from db import watch_model_changes
+    from models import Rule
+    
+    watch_model_changes(Rule, rule_set_cache.invalidate)
 
 
 class InferenceEngine:
     """
     Forward-chaining rule-based inference engine for program recommendation
+    
+    Programs recommended by several fired rules are scored with a
+    pluggable, order-independent scorer (see scoring.py). Programs scoring
+    below min_score are dropped and at most limit are returned; both
+    default to Config.MIN_CONFIDENCE_SCORE and Config.MAX_RECOMMENDATIONS.
+    With the indexed matcher and a scorer that supports it, rules of
+    programs that can no longer reach the top are not evaluated
+    (RuleSet.match_top). The bounds only cover rule scores, so this
+    pruning is skipped while the content-based stage is on.
+    
+    A content-based stage (content_similarity.py) blends each program's
+    score with how similar the answers are to the program and fills slots
+    the rules leave empty with the most similar programs, so students who
+    trigger no rule still get recommendations. It is off unless
+    Config.SIMILARITY_WEIGHT or SIMILARITY_FALLBACK turn it on.
+    
+    Once a collaborative model has been trained from student feedback
+    (collaborative_filtering.py), the final list is re-ranked with
+    "students like you" boosts of up to Config.COLLABORATIVE_WEIGHT points.
+    Boosts are applied after the result cache, so retraining takes effect
+    without invalidating it.
     """
     
-    def __init__(self, db):
+    def __init__(self, db, rule_cache: RuleSetCache = None, matcher: str = 'indexed',
+                 cache_size: int = 4096, scorer: Optional[Union[str, Scorer]] = None,
+                 limit: Optional[int] = None, min_score: Optional[float] = None,
+                 similarity_weight: Optional[float] = None,
+                 similarity_fallback: Optional[bool] = None,
+                 similarity_min_score: Optional[float] = None,
+                 content_model: Optional[Callable[[], Any]] = None,
+                 collaborative_weight: Optional[float] = None,
+                 collaborative_model: Optional[Callable[[], Any]] = None):
+        if matcher not in RuleSet.MATCHERS:
+            raise ValueError(f"Unknown rule matcher: {matcher}")
         self.db = db
+        self.rule_cache = rule_cache or rule_set_cache
+        self.matcher = matcher
+        self.scorer = get_scorer(scorer or Config.RECOMMENDATION_SCORER)
+        self.limit = Config.MAX_RECOMMENDATIONS if limit is None else limit
+        self.min_score = Config.MIN_CONFIDENCE_SCORE if min_score is None else min_score
+        self.similarity_weight = (Config.SIMILARITY_WEIGHT if similarity_weight is None
+                                  else similarity_weight)
+        if similarity_fallback is None:
+            similarity_fallback = Config.SIMILARITY_FALLBACK
+        # Minimum similarity of fallback recommendations (None = no fallback)
+        if similarity_min_score is None:
+            similarity_min_score = Config.SIMILARITY_MIN_SCORE
+        self.similarity_min_score = similarity_min_score if similarity_fallback else None
+        # Returns the current ContentModel (default: built from the program catalog)
+        self._content_model = content_model
+        self.collaborative_weight = (Config.COLLABORATIVE_WEIGHT if collaborative_weight is None
+                                     else collaborative_weight)
+        # Returns the current CollaborativeModel or None (default: the trained model file)
+        self._collaborative_model = collaborative_model
+        # Ranked results by profile fingerprint (cache_size=0 disables)
+        self.result_cache = RecommendationCache(cache_size) if cache_size else None
+        register_rule_listeners()
     
-    def generate_recommendations(self, student_profile: Dict, response_id: int) -> List[Dict]:
+    # Config keys from_config reads
+    CONFIG_KEYS = ('RECOMMENDATION_CACHE_SIZE', 'RECOMMENDATION_SCORER', 'MAX_RECOMMENDATIONS',
+                   'MIN_CONFIDENCE_SCORE', 'SIMILARITY_WEIGHT', 'SIMILARITY_FALLBACK',
+                   'SIMILARITY_MIN_SCORE', 'COLLABORATIVE_WEIGHT', 'COLLABORATIVE_MODEL_PATH')
+    
+    @classmethod
+    def from_config(cls, db, config: Mapping[str, Any], **options) -> 'InferenceEngine':
+        """
+        Engine set up from a Flask app's config
+        
+        Args:
+            db: Flask-SQLAlchemy database
+            config: app.config (any mapping with the CONFIG_KEYS)
+            options: Constructor arguments overriding the config
+                (e.g. rule_cache, cache_size)
+        """
+        model_path = config['COLLABORATIVE_MODEL_PATH']
+        
+        def collaborative_model():
+            from collaborative_filtering import collaborative_model
+            return collaborative_model(model_path)
+        
+        settings = dict(cache_size=config['RECOMMENDATION_CACHE_SIZE'],
+                        scorer=config['RECOMMENDATION_SCORER'],
+                        limit=config['MAX_RECOMMENDATIONS'],
+                        min_score=config['MIN_CONFIDENCE_SCORE'],
+                        similarity_weight=config['SIMILARITY_WEIGHT'],
+                        similarity_fallback=config['SIMILARITY_FALLBACK'],
+                        similarity_min_score=config['SIMILARITY_MIN_SCORE'],
+                        collaborative_weight=config['COLLABORATIVE_WEIGHT'],
+                        collaborative_model=collaborative_model)
+        settings.update(options)
+        return cls(db, **settings)
+    
+    def generate_recommendations(self, student_profile: Dict,
+                                 response_id: Optional[int] = None) -> List[Dict]:
         """
         Main recommendation generation function
         
         Args:
             student_profile: Dictionary containing student questionnaire data
-            response_id: ID of the questionnaire response
+            response_id: ID of the questionnaire response (optional, unused
+                by rule matching)
             
         Returns:
-            List of recommendations sorted by confidence score
+            Up to limit recommendations scoring at least min_score, best first
         """
-        from models import Rule
-        
-        # Load all active rules
-        rules = Rule.query.filter_by(is_active=True).all()
+        # Compiled active rules (loaded once per process)
+        rule_set = self.rule_cache.get()
+        content = self.content_model()
+        features = content.features(student_profile) if content is not None else None
         
-        # Fire rules and collect recommendations
-        fired_recommendations = []
+        # Students with equivalent answers get the memoized result
+        cache = self.result_cache
+        fingerprint = self._cache_key(rule_set, student_profile, content, features) if cache else None
+        if fingerprint is not None:
+            cached = cache.get(rule_set.version, fingerprint)
+            if cached is not None:
+                return self.rerank_collaborative(cached)
         
-        for rule in rules:
-            result = self.evaluate_rule(rule, student_profile)
-            if result:
-                fired_recommendations.append(result)
+        # Fire rules and collect recommendations (blended scores cannot be
+        # bounded from the rules alone, so only rules-only ranking prunes)
+        if self.matcher == 'indexed' and self.scorer.prunes and content is None:
+            fired_recommendations = rule_set.match_top(student_profile, self.scorer,
+                                                       self.limit, self.min_score)
+        else:
+            fired_recommendations = rule_set.match(student_profile, self.matcher)
         
-        # Aggregate recommendations for same programs
+        # Score each recommended program over all the rules that fired for it
         aggregated = self.aggregate_recommendations(fired_recommendations)
         
-        # Rank by confidence score
-        ranked = self.rank_recommendations(aggregated)
+        # Drop weak programs, rank by score and keep the top ones
+        if content is None:
+            top = self.rank_recommendations(aggregated)
+        else:
+            top = self.rank_with_similarity(aggregated, content, features)
+        if fingerprint is not None:
+            cache.put(rule_set.version, fingerprint, top)
+        return self.rerank_collaborative(top)
+    
+    def generate_recommendations_batch(self, student_profiles: List[Dict]) -> List[List[Dict]]:
+        """
+        Generate recommendations for many profiles in one vectorized pass
+        
+        Matching is vectorized with NumPy. Results are identical to calling
+        generate_recommendations on each profile. Profiles whose fingerprint
+        is cached are answered from the cache, and profiles sharing a
+        fingerprint are matched once.
+        
+        Args:
+            student_profiles: List of student questionnaire dictionaries
+            
+        Returns:
+            One list of top recommendations per profile, in input order
+        """
+        rule_set = self.rule_cache.get()
+        content = self.content_model()
+        cache = self.result_cache
+        options = {'scorer': self.scorer, 'limit': self.limit, 'min_score': self.min_score,
+                   'content': content, 'similarity_weight': self.similarity_weight,
+                   'similarity_min_score': self.similarity_min_score}
+        if cache is None:
+            return [self.rerank_collaborative(recommendations)
+                    for recommendations in rule_set.batch.recommend(student_profiles, **options)]
+        
+        results: List[Optional[List[Dict]]] = [None] * len(student_profiles)
+        pending: Dict[tuple, List[int]] = {}  # fingerprint -> positions to compute
+        unkeyed = []
+        for position, profile in enumerate(student_profiles):
+            features = content.features(profile) if content is not None else None
+            fingerprint = self._cache_key(rule_set, profile, content, features)
+            if fingerprint is None:
+                unkeyed.append(position)
+            elif fingerprint in pending:
+                pending[fingerprint].append(position)
+            else:
+                cached = cache.get(rule_set.version, fingerprint)
+                if cached is not None:
+                    results[position] = cached
+                else:
+                    pending[fingerprint] = [position]
+        
+        positions = [group[0] for group in pending.values()] + unkeyed
+        if positions:
+            computed = rule_set.batch.recommend([student_profiles[p] for p in positions], **options)
+            for position, recommendations in zip(positions, computed):
+                results[position] = recommendations
         
-        # Return top 5
-        return ranked[:5]
+        for fingerprint, group in pending.items():
+            recommendations = results[group[0]]
+            cache.put(rule_set.version, fingerprint, recommendations)
+            for position in group[1:]:
+                results[position] = _copy_recommendations(recommendations)
+        return [self.rerank_collaborative(recommendations) for recommendations in results]
+    
+    def content_model(self):
+        """
+        ContentModel of the content-based stage, or None when it is off
+        
+        The stage is off when similarity_weight is 0 and fallback is
+        disabled; NumPy is only imported once it is used.
+        """
+        if not self.similarity_weight and self.similarity_min_score is None:
+            return None
+        if self._content_model is None:
+            from content_similarity import content_model
+            self._content_model = content_model
+        return self._content_model()
+    
+    def collaborative_model(self):
+        """
+        CollaborativeModel for "students like you" boosts, or None
+        
+        None when collaborative_weight is 0 or no model has been trained.
+        """
+        if not self.collaborative_weight:
+            return None
+        if self._collaborative_model is None:
+            from collaborative_filtering import collaborative_model
+            self._collaborative_model = collaborative_model
+        return self._collaborative_model()
+    
+    def rerank_collaborative(self, ranked: List[Dict]) -> List[Dict]:
+        """
+        Apply collaborative boosts to ranked recommendations (in place)
+        
+        A boost never takes a recommendation that met min_score below it,
+        since the threshold filter has already run.
+        
+        Args:
+            ranked: Ranked recommendations of one profile, not shared
+                with the result cache
+        
+        Returns:
+            The recommendations, re-ranked
+        """
+        if len(ranked) < 2:
+            return ranked
+        model = self.collaborative_model()
+        if model is None:
+            return ranked
+        return model.rerank(ranked, self.collaborative_weight, self.min_score)
+    
+    @staticmethod
+    def _cache_key(rule_set: RuleSet, profile: Dict, content, features) -> Optional[tuple]:
+        """Result cache key: the rule fingerprint, plus the similarity features if used"""
+        fingerprint = rule_set.fingerprint(profile)
+        if fingerprint is None or content is None:
+            return fingerprint
+        return (fingerprint, content.version, features)
+    
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Result cache counters for this process (None if disabled)"""
+        return self.result_cache.stats() if self.result_cache else None
     
-    from typing import Optional
     def evaluate_rule(self, rule, student_profile: Dict) -> Optional[Dict]:
         """
         Evaluate a single rule against student profile
@@ -164,44 +1157,53 @@ class InferenceEngine:
     
     def aggregate_recommendations(self, recommendations: List[Dict]) -> List[Dict]:
         """
-        Aggregate recommendations for the same program
+        Combine the fired rules of each program into one scored recommendation
+        
+        The score comes from the engine's scorer, so it does not depend on
+        rule order. Justifications are joined and rules listed strongest
+        first (ties by rule id).
         
         Args:
             recommendations: List of fired rule recommendations
             
         Returns:
-            Aggregated list with combined confidence and justifications
+            One recommendation per program with its score as confidence
         """
-        program_map = {}
+        scorer = self.scorer
+        programs = {}
         
         for rec in recommendations:
-            program_id = rec['program_id']
-            
-            if program_id in program_map:
-                # Combine confidence scores (weighted average)
-                existing = program_map[program_id]
-                total_confidence = existing['confidence'] + rec['confidence']
-                avg_confidence = total_confidence / 2
-                
-                program_map[program_id]['confidence'] = avg_confidence
-                program_map[program_id]['rules_triggered'].append(rec['rule_id'])
-                
-                # Combine justifications
-                if rec['justification'] not in existing['justification']:
-                    program_map[program_id]['justification'] += f" Additionally, {rec['justification']}"
+            state = scorer.rule_state(rec['confidence'], rec.get('weight', 1.0))
+            if rec['program_id'] in programs:
+                merged, fired = programs[rec['program_id']]
+                programs[rec['program_id']] = (scorer.merge(merged, state), fired + [rec])
             else:
-                program_map[program_id] = {
-                    'program_id': program_id,
-                    'confidence': rec['confidence'],
-                    'justification': rec['justification'],
-                    'rules_triggered': [rec['rule_id']]
-                }
+                programs[rec['program_id']] = (scorer.merge(scorer.identity(), state), [rec])
+        
+        aggregated = []
+        for program_id, (state, fired) in programs.items():
+            fired.sort(key=lambda rec: (-rec['confidence'], rec['rule_id']))
+            justification = fired[0]['justification']
+            for rec in fired[1:]:
+                if rec['justification'] not in justification:
+                    justification += f" Additionally, {rec['justification']}"
+            
+            aggregated.append({
+                'program_id': program_id,
+                'confidence': scorer.score(state),
+                'justification': justification,
+                'rules_triggered': [rec['rule_id'] for rec in fired]
+            })
         
-        return list(program_map.values())
+        return aggregated
     
     def rank_recommendations(self, recommendations: List[Dict]) -> List[Dict]:
         """
-        Rank recommendations by confidence score
+        Rank recommendations by score
+        
+        Programs scoring below min_score are dropped, ties are broken by
+        program id and at most limit recommendations are kept (selected
+        with a bounded heap, the rest are never sorted).
         
         Args:
             recommendations: List of recommendations
@@ -209,14 +1211,55 @@ class InferenceEngine:
         Returns:
             Sorted list with rank positions added
         """
-        # Sort by confidence (descending)
-        sorted_recs = sorted(recommendations, key=lambda x: x['confidence'], reverse=True)
+        eligible = [rec for rec in recommendations if rec['confidence'] >= self.min_score]
+        ranked = heapq.nsmallest(self.limit, eligible,
+                                 key=lambda rec: (-rec['confidence'], rec['program_id']))
         
         # Add rank position
-        for idx, rec in enumerate(sorted_recs):
+        for idx, rec in enumerate(ranked):
+            rec['rank'] = idx + 1
+        
+        return ranked
+    
+    def rank_with_similarity(self, recommendations: List[Dict], content,
+                             features: tuple) -> List[Dict]:
+        """
+        Rank recommendations with the content-based stage
+        
+        Programs still qualify on their rule score (min_score); their
+        confidence then becomes the rule score blended with their
+        similarity. Slots left empty are filled with the most similar
+        programs no rule recommended, if fallback is on.
+        
+        Args:
+            recommendations: Aggregated rule recommendations
+            content: ContentModel
+            features: content.features() of the student profile
+        
+        Returns:
+            Sorted list with rank positions added
+        """
+        scores = content.scores(features)
+        weight = self.similarity_weight
+        
+        eligible = [rec for rec in recommendations if rec['confidence'] >= self.min_score]
+        if weight:
+            for rec in eligible:
+                row = content.index.get(rec['program_id'])
+                if row is not None:
+                    rec['confidence'] = float(content.blend(rec['confidence'], scores[row], weight))
+        ranked = heapq.nsmallest(self.limit, eligible,
+                                 key=lambda rec: (-rec['confidence'], rec['program_id']))
+        
+        if self.similarity_min_score is not None:
+            judged = {rec['program_id'] for rec in recommendations}
+            ranked += content.fallback(features, scores, judged, self.limit - len(ranked),
+                                       self.similarity_min_score)
+        
+        for idx, rec in enumerate(ranked):
             rec['rank'] = idx + 1
         
-        return sorted_recs
+        return ranked
 
 
 # ============================================
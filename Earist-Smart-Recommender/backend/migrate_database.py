@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Database migration script
+
+Brings an existing database up to date with models.py: creates missing
+tables, adds missing columns to existing ones, creates the secondary
+indexes declared on the models and the triggers that count program and
+rule changes, and fills in registration dates older databases left
+empty, then loads the programs, rules and admin account into an empty
+database. Safe to run repeatedly.
+
+The schema version is stored in SQLite's user_version, so application
+processes only read one PRAGMA on startup and leave DDL to whichever
+process finds the database behind (see prepare_database).
+
+Usage:
+    python migrate_database.py                   # apply migrations and seed
+    python migrate_database.py --rebuild-stats   # reconcile the dashboard counters
+    python migrate_database.py --backfill-rules  # rebuild recommendation_rules
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, inspect, literal, select, text
+from sqlalchemy.schema import CreateColumn
+
+# Bump whenever migrate() or seed_defaults() learns something new, so
+# existing databases run the migrate step once more
+SCHEMA_VERSION = 4
+
+ADMIN_ROLES = ('admin', 'counselor', 'viewer')
+
+# Tables whose changes process-wide caches must notice (see db.StoredVersion)
+VERSIONED_TABLES = ('programs', 'rules')
+
+# Registration date of students stored without one and without any response
+UNKNOWN_REGISTRATION = datetime(1970, 1, 1)
+
+
+def ensure_indexes(db):
+    """
+    Create indexes declared on the models that the database lacks
+    
+    Returns:
+        Names of the indexes created
+    """
+    existing = set()
+    inspector = inspect(db.engine)
+    for table_name in inspector.get_table_names():
+        existing.update(ix['name'] for ix in inspector.get_indexes(table_name))
+    
+    created = []
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
+
+
+def ensure_columns(db, tables=None):
+    """
+    Add columns declared on the models that existing tables lack
+    
+    New columns must be nullable or have a server default, which fills in
+    the rows already stored.
+    
+    Args:
+        tables: Names of the tables to check (default: all existing)
+    
+    Returns:
+        Names of the columns added, as table.column
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names() if tables is None else tables)
+    
+    added = []
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                    added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def backfill_recommendation_rules(db, chunk_size=2000):
+    """
+    Populate recommendation_rules from the rules_triggered column
+    
+    Walks the recommendations in primary key order and inserts the parsed
+    links chunk by chunk. Any existing links are replaced.
+    
+    Returns:
+        Number of links written
+    """
+    from models import Recommendation, RecommendationRule
+    
+    table = Recommendation.__table__
+    links = RecommendationRule.__table__
+    
+    written = 0
+    last_id = 0
+    try:
+        db.session.execute(links.delete())
+        while True:
+            rows = db.session.execute(
+                select(table.c.recommendation_id, table.c.rules_triggered)
+                .where(table.c.recommendation_id > last_id)
+                .order_by(table.c.recommendation_id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            
+            last_id = rows[-1][0]
+            link_rows = RecommendationRule.rows_for(*zip(*rows))
+            if link_rows:
+                db.session.execute(links.insert(), link_rows)
+            written += len(link_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return written
+
+
+def ensure_version_triggers(db):
+    """
+    Create the cache_versions rows and, on SQLite, the triggers that bump
+    them on every insert, update or delete of VERSIONED_TABLES
+    
+    Returns:
+        Names of the triggers created
+    """
+    from models import CacheVersion
+    
+    counters = CacheVersion.__table__
+    present = set(db.session.execute(select(counters.c.name)).scalars())
+    missing = [name for name in VERSIONED_TABLES if name not in present]
+    if missing:
+        db.session.execute(counters.insert(), [{'name': name, 'version': 0} for name in missing])
+    db.session.commit()
+    
+    if db.engine.dialect.name != 'sqlite':
+        return []
+    
+    existing = set(db.session.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    created = []
+    with db.engine.begin() as connection:
+        for table in VERSIONED_TABLES:
+            for event in ('insert', 'update', 'delete'):
+                name = f'{table}_{event}_version'
+                if name in existing:
+                    continue
+                connection.execute(text(
+                    f"CREATE TRIGGER {name} AFTER {event.upper()} ON {table} BEGIN "
+                    f"UPDATE cache_versions SET version = version + 1, "
+                    f"updated_at = CURRENT_TIMESTAMP WHERE name = '{table}'; END"))
+                created.append(name)
+    return created
+
+
+def backfill_registration_dates(db):
+    """
+    Fill in date_registered where databases created before it was NOT NULL
+    left it empty
+    
+    Such students get the date of their first questionnaire response, or
+    UNKNOWN_REGISTRATION if they have none, so they keep a place in the
+    (date_registered, student_id) order the student listing pages by.
+    
+    Returns:
+        Number of students updated
+    """
+    from models import QuestionnaireResponse, Student
+    
+    students = Student.__table__
+    responses = QuestionnaireResponse.__table__
+    first_response = (select(func.min(responses.c.response_date))
+                      .where(responses.c.student_id == students.c.student_id)
+                      .scalar_subquery())
+    result = db.session.execute(
+        students.update()
+        .where(students.c.date_registered.is_(None))
+        .values(date_registered=func.coalesce(
+            first_response, literal(UNKNOWN_REGISTRATION, students.c.date_registered.type))))
+    db.session.commit()
+    return result.rowcount
+
+
+def migrate(db):
+    """
+    Create missing tables, columns and indexes
+    
+    Returns:
+        Descriptions of what was created
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    created = [f'column {name}' for name in ensure_columns(db, existing_tables)]
+    created += [f'index {name}' for name in ensure_indexes(db)]
+    created += [f'trigger {name}' for name in ensure_version_triggers(db)]
+    backfill_registration_dates(db)
+    
+    # Counters added to an already populated database start from a rebuild
+    if 'dashboard_stats' not in existing_tables:
+        import dashboard_stats
+        dashboard_stats.rebuild()
+    
+    # Rule links are derived from recommendations stored before the table existed
+    if 'recommendation_rules' not in existing_tables:
+        backfill_recommendation_rules(db)
+    
+    return created
+
+
+def seed_defaults(db, config):
+    """
+    Load the standard programs and rules into an empty database and make
+    sure the default admin account can log in
+    
+    Args:
+        db: Flask-SQLAlchemy database (inside an app context)
+        config: app.config, for the default admin credentials
+    
+    Returns:
+        True if programs and rules were seeded
+    """
+    from werkzeug.security import generate_password_hash
+    
+    from models import AdminUser, Program, Rule
+    from seed_data import seed_programs, seed_rules
+    
+    seeded = False
+    if Program.query.count() == 0:
+        print("📚 Loading initial data...")
+        seed_programs(db, Program)
+        seed_rules(db, Rule, Program)
+        seeded = True
+    
+    # Earlier setups stored a role outside the enum (or no password)
+    admins = AdminUser.__table__
+    db.session.execute(admins.update().where(admins.c.role.not_in(ADMIN_ROLES)).values(role='admin'))
+    
+    username = config['DEFAULT_ADMIN_USERNAME']
+    password = config['DEFAULT_ADMIN_PASSWORD']
+    password_hash = generate_password_hash(password)
+    if db.session.query(AdminUser.admin_id).filter_by(username=username).first() is None:
+        db.session.add(AdminUser(username=username, password_hash=password_hash, role='admin',
+                                 email='admin@earist.edu.ph'))
+        print(f"✅ Admin user created ({username}/{password})")
+    else:
+        db.session.execute(admins.update()
+                           .where(admins.c.username == username, admins.c.password_hash.is_(None))
+                           .values(password_hash=password_hash))
+    db.session.commit()
+    return seeded
+
+
+def schema_version(db):
+    """Schema version recorded by the last migrate step (0 if unknown)"""
+    if db.engine.dialect.name != 'sqlite':
+        return 0
+    return db.session.execute(text('PRAGMA user_version')).scalar() or 0
+
+
+def set_schema_version(db, version):
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text(f'PRAGMA user_version = {int(version)}'))
+        db.session.commit()
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive lock on a file, held across processes until the block exits"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a+b') as handle:
+        if os.name == 'nt':
+            import msvcrt
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def prepare_database(app, force=False):
+    """
+    One-time migrate and seed step, safe to call from every process
+    
+    The recorded schema version is checked first (one PRAGMA read, no DDL),
+    so processes that find the database current return immediately. When
+    it is behind, the step runs under an exclusive file lock and the
+    version is checked again inside it, so workers starting together
+    migrate the database exactly once while the others wait.
+    
+    Databases other than SQLite have no user_version and always run the
+    (idempotent) step under the lock.
+    
+    Args:
+        app: Flask app whose database to prepare
+        force: Run even if the schema version is current
+    
+    Returns:
+        True if this process ran the migration
+    """
+    from db import db
+    
+    with app.app_context():
+        if not force and schema_version(db) >= SCHEMA_VERSION:
+            return False
+        
+        with file_lock(app.config['MIGRATE_LOCK_FILE']):
+            if not force and schema_version(db) >= SCHEMA_VERSION:
+                return False
+            
+            print("🔧 Migrating database...")
+            created = migrate(db)
+            for name in created:
+                print(f"   ✓ created {name}")
+            seed_defaults(db, app.config)
+            set_schema_version(db, SCHEMA_VERSION)
+            print(f"✅ Database up to date (schema version {SCHEMA_VERSION})")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply database migrations')
+    parser.add_argument('--backfill-rules', action='store_true',
+                        help='rebuild recommendation_rules from rules_triggered')
+    parser.add_argument('--rebuild-stats', action='store_true',
+                        help='recompute the dashboard counters from scratch')
+    args = parser.parse_args(argv)
+    
+    from app import create_app
+    from db import db
+    
+    if not (args.backfill_rules or args.rebuild_stats):
+        prepare_database(create_app(migrate=False), force=True)
+        return 0
+    
+    app = create_app()
+    with app.app_context():
+        if args.backfill_rules:
+            written = backfill_recommendation_rules(db)
+            print(f"✅ recommendation_rules rebuilt ({written} links)")
+            return 0
+        
+        import dashboard_stats
+        stats = dashboard_stats.rebuild()
+        print(f"✅ Dashboard counters rebuilt ({stats.get('students', 0)} students, "
+              f"{stats.get('recommendations', 0)} recommendations)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
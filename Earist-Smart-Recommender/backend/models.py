@@ -2,21 +2,54 @@
 Database Models for ERVHS-EARIST Recommendation System
 """
 
+import json
 from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
 from db import db
 
 
+SKILL_FIELDS = ('analytical', 'technical', 'communication', 'creativity',
+                'numerical', 'leadership', 'attention_to_detail', 'research')
+STRANDS = ('STEM', 'ABM', 'HUMSS', 'GAS', 'TVL-ICT', 'TVL-HE', 'TVL-IA')
+# Feedback a student can give on a recommendation
+FEEDBACK_VALUES = ('helpful', 'somewhat_helpful', 'not_helpful')
+
+
+def decode_list(value):
+    """Decode a list column stored either as a JSON array or comma-joined"""
+    if not value:
+        return []
+    if value.startswith('['):
+        return json.loads(value)
+    return value.split(',')
+
+
+def encode_cursor(registered, student_id):
+    """Opaque pagination cursor for a (date_registered, student_id) position"""
+    return f'{registered.isoformat()}~{student_id}'
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed cursors"""
+    registered, _, student_id = cursor.rpartition('~')
+    return datetime.fromisoformat(registered), int(student_id)
+
+
 class Student(db.Model):
     """Student information table"""
     __tablename__ = 'students'
+    __table_args__ = (
+        db.Index('ix_students_date_registered', 'date_registered'),
+        db.Index('ix_students_strand_registered', 'strand', 'date_registered'),
+    )
     
     student_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     student_name = db.Column(db.String(100), nullable=False)
     grade_level = db.Column(db.Enum('11', '12', name='grade_levels'), nullable=False)
-    strand = db.Column(db.Enum('STEM', 'ABM', 'HUMSS', 'GAS', 'TVL-ICT', 'TVL-HE', 'TVL-IA', 
-                               name='strands'), nullable=False)
+    strand = db.Column(db.Enum(*STRANDS, name='strands'), nullable=False)
     email = db.Column(db.String(100), unique=True)
-    date_registered = db.Column(db.DateTime, default=datetime.utcnow)
+    date_registered = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     status = db.Column(db.Enum('active', 'completed', 'inactive', name='student_status'), 
                       default='active')
     
@@ -26,6 +59,57 @@ class Student(db.Model):
     recommendations = db.relationship('Recommendation', backref='student', lazy=True, 
                                      cascade='all, delete-orphan')
     
+    @classmethod
+    def keyset_page(cls, limit, after=None, strand=None, grade_level=None, status=None):
+        """
+        One page of students, newest first, using keyset pagination
+        
+        Pages are addressed by the (date_registered, student_id) of the last
+        row of the previous page, so each page costs the same index range
+        scan no matter how deep into the table it is.
+        
+        Args:
+            limit: Page size
+            after: Cursor returned with the previous page
+            strand, grade_level, status: Optional exact-match filters
+            
+        Returns:
+            (students, next_cursor) where next_cursor is None on the last page
+        """
+        query = cls.query
+        if strand:
+            query = query.filter(cls.strand == strand)
+        if grade_level:
+            query = query.filter(cls.grade_level == grade_level)
+        if status:
+            query = query.filter(cls.status == status)
+        if after:
+            registered, student_id = decode_cursor(after)
+            query = query.filter(
+                tuple_(cls.date_registered, cls.student_id) < (registered, student_id))
+        
+        rows = query.order_by(cls.date_registered.desc(), cls.student_id.desc()) \
+                    .limit(limit + 1).all()
+        
+        students = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = students[-1]
+            next_cursor = encode_cursor(last.date_registered, last.student_id)
+        return students, next_cursor
+    
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'student_name': self.student_name,
+            'email': self.email,
+            'grade_level': self.grade_level,
+            'strand': self.strand,
+            'date_registered': self.date_registered.strftime('%Y-%m-%d %H:%M')
+                               if self.date_registered else None,
+            'status': self.status
+        }
+    
     def __repr__(self):
         return f'<Student {self.student_name} - {self.strand}>'
 
@@ -33,6 +117,9 @@ class Student(db.Model):
 class QuestionnaireResponse(db.Model):
     """Questionnaire responses table"""
     __tablename__ = 'questionnaire_responses'
+    __table_args__ = (
+        db.Index('ix_responses_date', 'response_date'),
+    )
     
     response_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.student_id', ondelete='CASCADE'), 
@@ -65,6 +152,23 @@ class QuestionnaireResponse(db.Model):
     recommendations = db.relationship('Recommendation', backref='response', lazy=True, 
                                      cascade='all, delete-orphan')
     
+    def to_profile(self, strand=None):
+        """
+        Rebuild the questionnaire payload the inference engine expects
+        
+        Args:
+            strand: Student strand; loaded from the student row if omitted
+        """
+        return {
+            'strand': strand if strand is not None else self.student.strand,
+            'favorite_subjects': decode_list(self.favorite_subjects),
+            'skills': {skill: getattr(self, f'skill_{skill}') for skill in SKILL_FIELDS},
+            'interests': decode_list(self.interests),
+            'learning_style': self.learning_style,
+            'career_goals': self.career_goal_description or '',
+            'career_priority': self.career_priority or ''
+        }
+    
     def __repr__(self):
         return f'<Response {self.response_id} by Student {self.student_id}>'
 
@@ -98,6 +202,9 @@ class Program(db.Model):
 class Rule(db.Model):
     """Rules table"""
     __tablename__ = 'rules'
+    __table_args__ = (
+        db.Index('ix_rules_active_program', 'is_active', 'recommended_program_id'),
+    )
     
     rule_id = db.Column(db.String(20), primary_key=True)
     rule_description = db.Column(db.Text, nullable=False)
@@ -108,6 +215,9 @@ class Rule(db.Model):
     recommended_program_id = db.Column(db.Integer, db.ForeignKey('programs.program_id'), 
                                       nullable=False)
     confidence_score = db.Column(db.Float, db.CheckConstraint('confidence_score BETWEEN 0 AND 100'))
+    # Relative weight of this rule when several fire for the same program
+    weight = db.Column(db.Float, db.CheckConstraint('weight > 0'), nullable=False,
+                       default=1.0, server_default='1')
     justification = db.Column(db.Text, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     
@@ -121,6 +231,10 @@ class Rule(db.Model):
 class Recommendation(db.Model):
     """Recommendations table"""
     __tablename__ = 'recommendations'
+    __table_args__ = (
+        db.Index('ix_recommendations_student_rank', 'student_id', 'rank_position'),
+        db.Index('ix_recommendations_response', 'response_id'),
+    )
     
     recommendation_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.student_id', ondelete='CASCADE'), 
@@ -134,7 +248,7 @@ class Recommendation(db.Model):
     confidence_score = db.Column(db.Float)
     justification = db.Column(db.Text)
     
-    # Stored as JSON array of rule IDs
+    # Comma-joined rule IDs, kept for display; query recommendation_rules instead
     rules_triggered = db.Column(db.Text)
     
     recommendation_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -142,10 +256,102 @@ class Recommendation(db.Model):
                                         name='feedback_types'), default='no_feedback')
     counselor_notes = db.Column(db.Text)
     
+    # Relationships
+    rule_links = db.relationship('RecommendationRule', backref='recommendation', lazy=True,
+                                 cascade='all, delete-orphan')
+    
+    @classmethod
+    def for_student(cls, student_id):
+        """
+        Ranked recommendations of a student, with each recommended program
+        loaded in the same query
+        """
+        return cls.query.options(joinedload(cls.program)).filter_by(
+            student_id=student_id
+        ).order_by(cls.rank_position)
+    
+    @staticmethod
+    def rows_from_results(student_id, response_id, results):
+        """
+        Convert inference engine output into recommendations table rows
+        
+        Args:
+            student_id: Student the recommendations belong to
+            response_id: Questionnaire response they were generated from
+            results: Ranked recommendation dicts from InferenceEngine
+            
+        Returns:
+            List of column dictionaries suitable for a bulk insert
+        """
+        return [{
+            'student_id': student_id,
+            'response_id': response_id,
+            'program_id': rec['program_id'],
+            'rank_position': rec.get('rank', 1),
+            'confidence_score': rec.get('confidence', 0),
+            'justification': rec.get('justification', ''),
+            'rules_triggered': ','.join([str(r) for r in rec.get('rules_triggered', [])])
+        } for rec in results]
+    
     def __repr__(self):
         return f'<Recommendation #{self.rank_position} for Student {self.student_id}>'
 
 
+class RecommendationRule(db.Model):
+    """Rules that fired for each recommendation (normalized rules_triggered)"""
+    __tablename__ = 'recommendation_rules'
+    __table_args__ = (
+        db.Index('ix_recommendation_rules_rule', 'rule_id', 'recommendation_id'),
+    )
+    
+    recommendation_id = db.Column(db.Integer,
+                                  db.ForeignKey('recommendations.recommendation_id', ondelete='CASCADE'),
+                                  primary_key=True)
+    # Not a foreign key: links outlive deleted rules so their history stays queryable
+    rule_id = db.Column(db.String(20), primary_key=True)
+    
+    @staticmethod
+    def rows_for(recommendation_ids, rules_triggered):
+        """
+        Link rows for freshly inserted recommendations
+        
+        Args:
+            recommendation_ids: Ids of the inserted recommendations
+            rules_triggered: Matching rules_triggered column values
+        """
+        return [{'recommendation_id': recommendation_id, 'rule_id': rule_id}
+                for recommendation_id, rules in zip(recommendation_ids, rules_triggered)
+                for rule_id in dict.fromkeys(decode_list(rules))]
+    
+    def __repr__(self):
+        return f'<RecommendationRule {self.rule_id} -> {self.recommendation_id}>'
+
+
+class DashboardStat(db.Model):
+    """Materialized dashboard counters (see dashboard_stats.py)"""
+    __tablename__ = 'dashboard_stats'
+    
+    # e.g. 'students', 'strand:STEM', 'program:3', 'feedback:helpful'
+    stat_key = db.Column(db.String(50), primary_key=True)
+    stat_value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DashboardStat {self.stat_key}={self.stat_value}>'
+
+
+class CacheVersion(db.Model):
+    """Change counters of the tables behind process-wide caches (see db.StoredVersion)"""
+    __tablename__ = 'cache_versions'
+    
+    # Name of the counted table, e.g. 'rules'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
 class AdminUser(db.Model):
     """Admin users table"""
     __tablename__ = 'admin_users'
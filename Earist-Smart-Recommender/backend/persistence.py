@@ -0,0 +1,134 @@
+"""
+Submission Persistence
+
+Writes a questionnaire submission (student, response, ranked
+recommendations and the rules behind them) with Core INSERT statements
+in one short transaction, instead of flushing ORM objects one by one.
+Recommendations are computed before the transaction starts, so the
+SQLite write lock is only held for the inserts themselves. The dashboard
+counters are bumped in the same transaction.
+"""
+
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert
+
+import dashboard_stats
+from db import db
+from models import (SKILL_FIELDS, QuestionnaireResponse, Recommendation, RecommendationRule,
+                    Student)
+
+
+def student_row(data: Dict) -> Dict:
+    """Students table row for a questionnaire payload"""
+    return {
+        'student_name': data.get('name'),
+        'grade_level': data.get('grade_level'),
+        'strand': data.get('strand'),
+        'email': data.get('email')
+    }
+
+
+def response_row(data: Dict, student_id: int) -> Dict:
+    """Questionnaire responses table row for a questionnaire payload"""
+    skills = data.get('skills', {})
+    row = {
+        'student_id': student_id,
+        'favorite_subjects': ','.join(data.get('favorite_subjects', [])),
+        'interests': ','.join(data.get('interests', [])),
+        'learning_style': data.get('learning_style'),
+        'career_goal_specified': True if data.get('career_goals', '') else False,
+        'career_goal_description': data.get('career_goals', ''),
+        'career_priority': data.get('career_priority', '')
+    }
+    for skill in SKILL_FIELDS:
+        row[f'skill_{skill}'] = int(skills.get(skill, 0))
+    return row
+
+
+def insert_recommendations(rows: List[Dict]) -> List[int]:
+    """
+    Bulk insert recommendation rows together with their rule links
+    
+    Must run inside the caller's transaction.
+    
+    Args:
+        rows: Recommendations table rows (see Recommendation.rows_from_results)
+    
+    Returns:
+        Ids of the inserted recommendations, in row order
+    """
+    if not rows:
+        return []
+    
+    table = Recommendation.__table__
+    ids = db.session.execute(
+        insert(table).returning(table.c.recommendation_id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    
+    links = RecommendationRule.rows_for(ids, [row['rules_triggered'] for row in rows])
+    if links:
+        db.session.execute(insert(RecommendationRule.__table__), links)
+    return ids
+
+
+def insert_submissions(payloads: List[Dict], recommendations: List[List[Dict]]) -> List[Tuple[int, int]]:
+    """
+    Bulk insert submissions with their recommendations and counter updates
+    
+    Must run inside the caller's transaction.
+    
+    Args:
+        payloads: Questionnaire payloads
+        recommendations: Ranked recommendations for each payload
+    
+    Returns:
+        (student_id, response_id) of each payload, in input order
+    """
+    if not payloads:
+        return []
+    
+    student_table = Student.__table__
+    student_ids = db.session.execute(
+        insert(student_table).returning(student_table.c.student_id, sort_by_parameter_order=True),
+        [student_row(data) for data in payloads]
+    ).scalars().all()
+    
+    response_table = QuestionnaireResponse.__table__
+    response_ids = db.session.execute(
+        insert(response_table).returning(response_table.c.response_id, sort_by_parameter_order=True),
+        [response_row(data, student_id) for data, student_id in zip(payloads, student_ids)]
+    ).scalars().all()
+    
+    rows = []
+    deltas = Counter()
+    for data, student_id, response_id, recs in zip(payloads, student_ids, response_ids,
+                                                  recommendations):
+        rows.extend(Recommendation.rows_from_results(student_id, response_id, recs))
+        deltas.update(dashboard_stats.submission_deltas(data.get('strand'), recs))
+    insert_recommendations(rows)
+    dashboard_stats.bump(deltas)
+    
+    return list(zip(student_ids, response_ids))
+
+
+def save_submission(data: Dict, recommendations: List[Dict]) -> Tuple[int, int]:
+    """
+    Persist a submission and its recommendations atomically
+    
+    Args:
+        data: Questionnaire payload as posted by the questionnaire page
+        recommendations: Ranked recommendations from the inference engine
+    
+    Returns:
+        (student_id, response_id) of the inserted rows
+    """
+    try:
+        (ids,) = insert_submissions([data], [recommendations])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return ids
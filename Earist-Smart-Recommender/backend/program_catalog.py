@@ -0,0 +1,159 @@
+"""
+In-process Program Catalog
+
+The programs table is small and almost never changes, so it is loaded
+once per process and served from memory. Entries are plain snapshots
+(not ORM instances) with their JSON columns already decoded, which makes
+them safe to share between requests and threads.
+
+Every commit that writes a Program row bumps the catalog version, drops
+the snapshots and any output derived from them (e.g. rendered pages).
+Other processes notice through the programs table's stored change
+counter (see db.StoredVersion) within CACHE_VERSION_CHECK_SECONDS.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db import StoredVersion
+
+
+class ProgramEntry:
+    """
+    Read-only snapshot of a Program row
+    """
+    
+    __slots__ = ('program_id', 'program_code', 'program_name', 'program_description',
+                 'college_department', 'required_skills', 'typical_strands',
+                 'career_pathways', 'program_duration', 'is_active', 'skills', 'strands')
+    
+    COLUMNS = ('program_id', 'program_code', 'program_name', 'program_description',
+               'college_department', 'required_skills', 'typical_strands',
+               'career_pathways', 'program_duration', 'is_active')
+    
+    def __init__(self, program):
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(program, name))
+        # Pre-decoded JSON array columns
+        self.skills = json.loads(program.required_skills) if program.required_skills else []
+        self.strands = json.loads(program.typical_strands) if program.typical_strands else []
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Program details for JSON responses"""
+        return {
+            'program_id': self.program_id,
+            'program_code': self.program_code,
+            'program_name': self.program_name,
+            'description': self.program_description,
+            'college': self.college_department,
+            'required_skills': self.skills,
+            'typical_strands': self.strands,
+            'career_pathways': self.career_pathways,
+            'duration': self.program_duration
+        }
+    
+    def __repr__(self):
+        return f'<ProgramEntry {self.program_code} - {self.program_name}>'
+
+
+class ProgramCatalog:
+    """
+    Process-wide cache of all programs, keyed by id and by code
+    
+    loaded_at is the time the programs last changed when the database
+    records it, so every worker sends the same Last-Modified.
+    """
+    
+    def __init__(self, stored: Optional[StoredVersion] = None):
+        self._stored = stored
+        self._lock = threading.Lock()
+        # (by id, by code), swapped atomically on reload
+        self._indexes: Optional[Tuple[Dict[int, ProgramEntry], Dict[str, ProgramEntry]]] = None
+        self._derived: Dict[str, Any] = {}
+        self.version = 0
+        self.loaded_at: Optional[datetime] = None
+    
+    def _load(self) -> Tuple[Dict[int, ProgramEntry], Dict[str, ProgramEntry]]:
+        if self._stored is not None and self._stored.changed():
+            self._drop()
+        
+        indexes = self._indexes
+        if indexes is not None:
+            return indexes
+        
+        with self._lock:
+            if self._indexes is None:
+                from models import Program
+                
+                entries = [ProgramEntry(p) for p in
+                           Program.query.order_by(Program.program_id).all()]
+                self._indexes = ({e.program_id: e for e in entries},
+                                 {e.program_code: e for e in entries})
+                changed_at = self._stored.updated_at if self._stored is not None else None
+                self.loaded_at = (changed_at or datetime.utcnow()).replace(microsecond=0)
+            return self._indexes
+    
+    def load(self):
+        """Load the catalog now (e.g. at startup) instead of on first use"""
+        self._load()
+    
+    def get(self, program_id: int) -> Optional[ProgramEntry]:
+        """Program by id, or None"""
+        return self._load()[0].get(program_id)
+    
+    def by_code(self, program_code: str) -> Optional[ProgramEntry]:
+        """Program by code (e.g. 'BSCS'), or None"""
+        return self._load()[1].get(program_code)
+    
+    def active(self) -> List[ProgramEntry]:
+        """Active programs, in id order"""
+        return [e for e in self._load()[0].values() if e.is_active]
+    
+    def cached(self, key: str, build: Callable[[], Any]) -> Any:
+        """
+        Memoize a value derived from the catalog until the next change
+        
+        Args:
+            key: Name of the derived value
+            build: Function computing it from the current catalog
+        """
+        self._load()
+        version = self.version
+        entry = self._derived.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        
+        value = build()
+        self._derived[key] = (version, value)
+        return value
+    
+    def _drop(self):
+        with self._lock:
+            self._indexes = None
+            self._derived = {}
+            self.version += 1
+    
+    def invalidate(self):
+        """Drop the cached programs and bump the catalog version"""
+        self._drop()
+        if self._stored is not None:
+            self._stored.reset()
+
+
+def content_etag(body: str) -> str:
+    """Stable ETag for a rendered page, identical across worker processes"""
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+program_catalog = ProgramCatalog(StoredVersion('programs'))
+
+
+def register_program_listeners():
+    """Invalidate the catalog whenever Program rows are committed"""
+    from db import watch_model_changes
+    from models import Program
+    
+    watch_model_changes(Program, program_catalog.invalidate)
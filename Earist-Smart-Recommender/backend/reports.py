@@ -0,0 +1,221 @@
+"""
+PDF Recommendation Reports
+
+Reports are rendered by a small background pool instead of on the
+request thread, and the rendered bytes are cached on disk so every
+worker process can serve them. Cache files are keyed by
+(student_id, response_id, recommendation version), where the version is
+a checksum of what the report shows: regenerated recommendations that
+differ get a new key (recommendation ids alone are not enough, SQLite
+reuses them after a delete), and the re-scoring job also deletes the
+affected students' files explicitly.
+
+ReportLab is imported on first render, not at import time, so worker
+processes that never serve a report do not pay for it on startup.
+"""
+
+import glob
+import io
+import os
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+
+# (student_id, response_id, recommendation version)
+ReportKey = Tuple[int, int, int]
+
+
+def draw_report(p, data: Dict):
+    """Draw one student's report on the current page of a canvas"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    
+    _, height = letter
+    
+    p.setFont("Helvetica-Bold", 20)
+    p.drawString(1*inch, height-1*inch, "ERVHS-EARIST Recommendations")
+    
+    p.setFont("Helvetica", 12)
+    p.drawString(1*inch, height-1.5*inch, f"Student: {data['student_name']}")
+    p.drawString(1*inch, height-1.7*inch, f"Strand: {data['strand']}")
+    
+    y = height - 2.5*inch
+    p.setFont("Helvetica-Bold", 12)
+    for rank, program_name in data['programs']:
+        p.drawString(1*inch, y, f"{rank}. {program_name}")
+        y -= 0.3*inch
+
+
+def render_report(data: Dict) -> bytes:
+    """
+    Render a student's recommendation report
+    
+    Args:
+        data: Plain report data from report_data()
+    
+    Returns:
+        PDF bytes
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    draw_report(p, data)
+    p.save()
+    return buffer.getvalue()
+
+
+def report_data(student_id: int) -> Optional[Dict]:
+    """
+    Everything a report needs, loaded in two queries
+    
+    Returns:
+        Plain dictionary (safe to hand to another thread), or None if the
+        student does not exist
+    """
+    from db import db
+    from models import Recommendation, Student
+    
+    student = db.session.get(Student, student_id)
+    if student is None:
+        return None
+    
+    recommendations = Recommendation.for_student(student_id).all()
+    response_id = recommendations[0].response_id if recommendations else 0
+    programs = [(rec.rank_position, rec.program.program_name) for rec in recommendations]
+    version = zlib.crc32(repr((student.student_name, student.strand, programs)).encode('utf-8'))
+    
+    return {
+        'key': (student_id, response_id, version),
+        'student_name': student.student_name,
+        'strand': student.strand,
+        'programs': programs
+    }
+
+
+def report_filename(data: Dict) -> str:
+    """Download name for a student's report"""
+    return f"recommendations_{data['student_name'].replace(' ', '_')}.pdf"
+
+
+class ReportCache:
+    """
+    Rendered reports on disk, shared by all worker processes
+    
+    Files are written atomically, so a reader never sees a partial PDF.
+    The directory is pruned oldest-first once it exceeds max_bytes.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._written = 0
+    
+    def path(self, key: ReportKey) -> str:
+        return os.path.join(self.directory, '{}-{}-{}.pdf'.format(*key))
+    
+    def get(self, key: ReportKey) -> Optional[str]:
+        """Path of the cached report, or None"""
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+    
+    def put(self, key: ReportKey, pdf: bytes) -> str:
+        """Store a rendered report, replacing older versions of the student's"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.invalidate([key[0]], keep=key)
+        
+        path = self.path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as out:
+            out.write(pdf)
+        os.replace(tmp, path)
+        
+        self._written += len(pdf)
+        if self._written > self.max_bytes // 10:
+            self._written = 0
+            self.prune()
+        return path
+    
+    def invalidate(self, student_ids: Iterable[int], keep: Optional[ReportKey] = None):
+        """Delete the cached reports of the given students"""
+        keep_path = self.path(keep) if keep else None
+        for student_id in student_ids:
+            for path in glob.glob(os.path.join(self.directory, f'{student_id}-*.pdf')):
+                if path != keep_path:
+                    self._remove(path)
+    
+    def prune(self):
+        """Delete the least recently written reports beyond max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory) if os.path.isdir(self.directory) else ():
+            if entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+    
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ReportRenderer:
+    """
+    Background rendering with one job per report key
+    
+    Concurrent requests for the same report share a single job.
+    """
+    
+    def __init__(self, cache: ReportCache, workers: int):
+        self.cache = cache
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[ReportKey, Future] = {}
+    
+    def _render(self, data: Dict) -> str:
+        try:
+            return self.cache.put(data['key'], render_report(data))
+        finally:
+            with self._lock:
+                self._jobs.pop(data['key'], None)
+    
+    def submit(self, data: Dict) -> Future:
+        """Start rendering a report unless it is already in progress"""
+        with self._lock:
+            job = self._jobs.get(data['key'])
+            if job is None:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='report')
+                job = self._pool.submit(self._render, data)
+                self._jobs[data['key']] = job
+            return job
+
+
+def init_app(app):
+    """Set up the app's report cache and renderer from its config"""
+    cache = ReportCache(app.config['REPORT_CACHE_DIR'], app.config['REPORT_CACHE_MAX_BYTES'])
+    app.extensions['reports'] = ReportRenderer(cache, app.config['REPORT_WORKERS'])
+
+
+def report_renderer() -> ReportRenderer:
+    """Report renderer of the current app"""
+    return current_app.extensions['reports']
+
+
+def report_cache() -> ReportCache:
+    """Report cache of the current app"""
+    return report_renderer().cache
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Recommendation re-scoring job
+
+Regenerates stored recommendations after rules are edited, without asking
+students to resubmit. Questionnaire responses are streamed in chunks,
+scored on a process pool and the recommendations of each chunk are
+replaced in a single transaction. Feedback and counselor notes are kept
+for programs that are still recommended.
+
+Usage:
+    python rescore_recommendations.py                    # every response
+    python rescore_recommendations.py --rule RULE007     # only responses RULE007 affects
+    python rescore_recommendations.py --since 2025-06-01 # responses submitted since
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+
+import dashboard_stats
+from inference_engine import (CompiledRule, InferenceEngine, RuleSet, RuleSetCache,
+                              compile_conditions)
+from persistence import insert_recommendations
+from reports import report_cache
+
+# Per-process engine used by pool workers
+_worker_engine = None
+
+
+def _make_engine(rule_rows, content, config):
+    rule_set = RuleSet([CompiledRule(*row) for row in rule_rows])
+    return InferenceEngine.from_config(None, config,
+                                       rule_cache=RuleSetCache(lambda version: rule_set),
+                                       content_model=lambda: content)
+
+
+def _init_worker(rule_rows, content, config):
+    global _worker_engine
+    _worker_engine = _make_engine(rule_rows, content, config)
+
+
+def _score_chunk(profiles):
+    return _worker_engine.generate_recommendations_batch(profiles)
+
+
+def rule_snapshot(rule_set):
+    """Picklable copy of a compiled rule set for pool workers"""
+    return [(r.rule_id, r.program_id, r.confidence, r.justification, r.conditions, r.weight)
+            for r in rule_set.rules]
+
+
+def iter_response_chunks(db, chunk_size, since=None):
+    """
+    Stream questionnaire responses in keyset-paginated chunks
+    
+    Yields:
+        Lists of (response_id, student_id, profile) tuples
+    """
+    from models import QuestionnaireResponse, Student
+    
+    last_id = 0
+    while True:
+        query = db.session.query(QuestionnaireResponse, Student.strand).join(
+            Student, Student.student_id == QuestionnaireResponse.student_id
+        ).filter(QuestionnaireResponse.response_id > last_id)
+        if since is not None:
+            query = query.filter(QuestionnaireResponse.response_date >= since)
+        
+        rows = query.order_by(QuestionnaireResponse.response_id).limit(chunk_size).all()
+        if not rows:
+            return
+        
+        last_id = rows[-1][0].response_id
+        chunk = [(r.response_id, r.student_id, r.to_profile(strand)) for r, strand in rows]
+        db.session.expunge_all()
+        yield chunk
+
+
+def rule_filter(db, rule_id):
+    """
+    Build a chunk filter keeping only the responses a rule affects
+    
+    A response is affected if the rule fired for it last time, or if the
+    rule (in its current form) fires for it now.
+    """
+    from models import Recommendation, RecommendationRule, Rule
+    
+    rule = db.session.get(Rule, rule_id)
+    if rule is None:
+        print(f"⚠️  {rule_id} no longer exists; re-scoring responses it fired for")
+    matches = compile_conditions(json.loads(rule.conditions)) if rule and rule.is_active else None
+    
+    def keep(chunk):
+        ids = [response_id for response_id, _, _ in chunk]
+        triggered = {
+            response_id
+            for response_id, in db.session.query(Recommendation.response_id).join(
+                RecommendationRule,
+                RecommendationRule.recommendation_id == Recommendation.recommendation_id
+            ).filter(RecommendationRule.rule_id == rule_id,
+                     Recommendation.response_id.in_(ids))
+        }
+        return [item for item in chunk
+                if item[0] in triggered or (matches is not None and matches(item[2]))]
+    
+    return keep
+
+
+def replace_recommendations(db, chunk, results):
+    """
+    Replace the recommendations of a chunk of responses in one transaction
+    
+    The dashboard counters are adjusted in the same transaction, and the
+    cached PDF reports of the affected students are dropped afterwards.
+    """
+    from models import Recommendation, RecommendationRule
+    
+    table = Recommendation.__table__
+    links = RecommendationRule.__table__
+    ids = [response_id for response_id, _, _ in chunk]
+    
+    kept = {
+        (row.response_id, row.program_id): (row.student_feedback, row.counselor_notes)
+        for row in db.session.execute(
+            select(table.c.response_id, table.c.program_id,
+                   table.c.student_feedback, table.c.counselor_notes)
+            .where(table.c.response_id.in_(ids))
+        )
+    }
+    
+    rows = []
+    for (response_id, student_id, _), recommendations in zip(chunk, results):
+        for row in Recommendation.rows_from_results(student_id, response_id, recommendations):
+            feedback, notes = kept.get((response_id, row['program_id']), ('no_feedback', None))
+            row['student_feedback'] = feedback
+            row['counselor_notes'] = notes
+            rows.append(row)
+    
+    deltas = dashboard_stats.recommendation_deltas(
+        [program_id for _, program_id in kept], [feedback for feedback, _ in kept.values()], sign=-1)
+    deltas.update(dashboard_stats.recommendation_deltas(
+        [row['program_id'] for row in rows], [row['student_feedback'] for row in rows]))
+    
+    try:
+        # Links first: SQLite does not enforce ON DELETE CASCADE by default
+        db.session.execute(links.delete().where(links.c.recommendation_id.in_(
+            select(table.c.recommendation_id).where(table.c.response_id.in_(ids)))))
+        db.session.execute(table.delete().where(table.c.response_id.in_(ids)))
+        insert_recommendations(rows)
+        dashboard_stats.bump(deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    report_cache().invalidate({student_id for _, student_id, _ in chunk})
+    return len(rows)
+
+
+def rescore(db, rule_set, chunk_size=500, workers=None, since=None, rule_id=None,
+            config=None):
+    """
+    Re-run the inference engine over stored responses
+    
+    Args:
+        db: Flask-SQLAlchemy database (inside an app context)
+        rule_set: Compiled rule set to score with
+        chunk_size: Responses per chunk / transaction
+        workers: Worker processes (0 scores in-process)
+        since: Only responses submitted on or after this datetime
+        rule_id: Only responses affected by this rule
+        config: Engine settings (default: the current app's config)
+    
+    Returns:
+        (responses rescored, recommendation rows written, elapsed seconds)
+    """
+    snapshot = rule_snapshot(rule_set)
+    # Workers have no app: hand them the engine settings and the content
+    # model built here
+    config = config if config is not None else current_app.config
+    config = {key: config[key] for key in InferenceEngine.CONFIG_KEYS}
+    content = InferenceEngine.from_config(db, config, cache_size=0).content_model()
+    chunks = iter_response_chunks(db, chunk_size, since)
+    if rule_id:
+        keep = rule_filter(db, rule_id)
+        chunks = (filtered for filtered in map(keep, chunks) if filtered)
+    
+    started = time.perf_counter()
+    responses = written = 0
+    
+    def report(chunk, results):
+        nonlocal responses, written
+        written += replace_recommendations(db, chunk, results)
+        responses += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"   ✓ {responses} responses rescored ({responses / elapsed:,.0f}/s)")
+    
+    if workers == 0:
+        engine = _make_engine(snapshot, content, config)
+        for chunk in chunks:
+            report(chunk, engine.generate_recommendations_batch([p for _, _, p in chunk]))
+    else:
+        workers = workers or os.cpu_count() or 1
+        # Workers get everything through initargs, so they need no forked state
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot, content, config),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_score_chunk, [p for _, _, p in chunk])))
+                # Bound the read-ahead so memory stays flat
+                if len(pending) >= workers * 2:
+                    chunk, future = pending.popleft()
+                    report(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                report(chunk, future.result())
+    
+    return responses, written, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Recompute stored recommendations')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help='only responses submitted on or after this date (YYYY-MM-DD[THH:MM])')
+    parser.add_argument('--rule', dest='rule_id',
+                        help='only responses the given rule fired for or now fires for')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count, 0 = in-process)')
+    args = parser.parse_args(argv)
+    
+    from app import create_app, db, get_inference_engine
+    
+    app = create_app()
+    with app.app_context():
+        rule_set = get_inference_engine().rule_cache.get()
+        print(f"🔁 Re-scoring recommendations with {len(rule_set)} active rules...")
+        responses, written, elapsed = rescore(
+            db, rule_set,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            since=args.since,
+            rule_id=args.rule_id
+        )
+    
+    rate = responses / elapsed if elapsed else 0
+    print(f"✅ {responses} responses, {written} recommendations written "
+          f"in {elapsed:.2f}s ({rate:,.0f} responses/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Rete-style Matcher for the Inference Engine
+
+Builds a shared condition network from the compiled rule set:
+
+- Alpha nodes: one node per distinct criterion (field, operator, value).
+  Rules that use the same test, e.g. ``skills.analytical >= 4``, share the
+  node, so it is evaluated at most once per profile.
+- Alpha memory: per field, the set of alpha nodes satisfied by a given
+  field value is cached and reused across profiles.
+- Terminal nodes: TREAT-style counters. An AND rule fires once all of its
+  alpha nodes are satisfied, an OR rule once any of them is.
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Tuple
+
+from inference_engine import _field_getter, _to_float, compile_criterion
+
+
+def _node_key(criterion: Dict) -> Tuple:
+    """Canonical identity of a criterion, used to share alpha nodes"""
+    return (
+        criterion['field'],
+        criterion['operator'],
+        json.dumps(criterion['value'], sort_keys=True)
+    )
+
+
+class FieldTests:
+    """
+    Alpha nodes that test the same profile field
+    
+    Equality/IN nodes are hashed by accepted value, numeric thresholds are
+    kept sorted, CONTAINS nodes are hashed by the contained value. Any other
+    test falls back to its compiled predicate.
+    """
+    
+    # Distinct field values remembered before the alpha memory is reset
+    MEMORY_LIMIT = 4096
+    
+    def __init__(self, field: str):
+        self.get = _field_getter(field)
+        self.eq = {}            # value -> [node ids]
+        self.ge = []            # sorted [(threshold, node id)]
+        self.le = []            # sorted [(threshold, node id)]
+        self.contains = {}      # value -> [node ids]
+        self.contains_nodes = []
+        self.generic = []       # [(node id, predicate)]
+        self.memory = {}        # alpha memory: field value -> satisfied node ids
+    
+    def add(self, node_id: int, criterion: Dict):
+        cond_operator = criterion['operator']
+        value = criterion['value']
+        
+        try:
+            if cond_operator == '==':
+                self.eq.setdefault(value, []).append(node_id)
+                return
+            if cond_operator == 'IN' and isinstance(value, list):
+                for item in set(value):
+                    self.eq.setdefault(item, []).append(node_id)
+                return
+            if cond_operator == 'CONTAINS':
+                self.contains.setdefault(value, []).append(node_id)
+                self.contains_nodes.append((node_id, compile_criterion(criterion)))
+                return
+        except TypeError:
+            # Unhashable expected value
+            pass
+        
+        if cond_operator == '>=':
+            self.ge.append((float(value), node_id))
+        elif cond_operator == '<=':
+            self.le.append((float(value), node_id))
+        else:
+            self.generic.append((node_id, compile_criterion(criterion)))
+    
+    def freeze(self):
+        self.ge.sort()
+        self.le.sort()
+        self._ge_keys = [t for t, _ in self.ge]
+        self._le_keys = [t for t, _ in self.le]
+    
+    def _scalar_matches(self, actual) -> Tuple[int, ...]:
+        """Equality and threshold nodes satisfied by a hashable value"""
+        matched = list(self.eq.get(actual, ()))
+        
+        number = _to_float(actual)
+        # NaN compares False with every threshold, but bisect would place
+        # it past them all (infinities bisect correctly)
+        if number is not None and number == number:
+            # threshold <= actual
+            matched.extend(n for _, n in self.ge[:bisect_right(self._ge_keys, number)])
+            # threshold >= actual
+            matched.extend(n for _, n in self.le[bisect_left(self._le_keys, number):])
+        
+        return tuple(matched)
+    
+    def satisfied(self, profile: Dict, out: List[int]):
+        """Append the ids of the alpha nodes this profile satisfies to out"""
+        actual = self.get(profile)
+        
+        try:
+            matched = self.memory.get(actual)
+            if matched is None:
+                if len(self.memory) >= self.MEMORY_LIMIT:
+                    self.memory.clear()
+                matched = self.memory[actual] = self._scalar_matches(actual)
+            out.extend(matched)
+        except TypeError:
+            # Unhashable values (lists) never satisfy equality or thresholds
+            pass
+        
+        if self.contains_nodes:
+            if isinstance(actual, list):
+                for item in actual:
+                    try:
+                        out.extend(self.contains.get(item, ()))
+                    except TypeError:
+                        continue
+            elif isinstance(actual, str):
+                out.extend(n for n, predicate in self.contains_nodes if predicate(profile))
+        
+        out.extend(n for n, predicate in self.generic if predicate(profile))
+
+
+class ReteNetwork:
+    """
+    Shared-condition matcher over a compiled rule set
+    """
+    
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self.fields: Dict[str, FieldTests] = {}
+        
+        node_ids = {}
+        and_rules = []                      # [(rule position, node ids)]
+        or_successors: Dict[int, List[int]] = {}
+        
+        for position, rule in enumerate(self.rules):
+            operator = rule.conditions.get('operator', 'AND')
+            criteria = rule.conditions.get('criteria', [])
+            if operator not in ('AND', 'OR') or not criteria:
+                continue
+            
+            nodes = set()
+            for criterion in criteria:
+                key = _node_key(criterion)
+                node_id = node_ids.get(key)
+                if node_id is None:
+                    node_id = node_ids[key] = len(node_ids)
+                    field = criterion['field']
+                    if field not in self.fields:
+                        self.fields[field] = FieldTests(field)
+                    self.fields[field].add(node_id, criterion)
+                nodes.add(node_id)
+            
+            if operator == 'AND':
+                and_rules.append((position, nodes))
+            else:
+                for node_id in nodes:
+                    or_successors.setdefault(node_id, []).append(position)
+        
+        for tests in self.fields.values():
+            tests.freeze()
+        
+        # Each AND rule is activated through its least shared alpha node and
+        # then joined against the remaining nodes it requires
+        fan_out = {}
+        for _, nodes in and_rules:
+            for node_id in nodes:
+                fan_out[node_id] = fan_out.get(node_id, 0) + 1
+        
+        self._activations: Dict[int, List[Tuple[int, Tuple[int, ...]]]] = {}
+        for position, nodes in and_rules:
+            anchor = min(nodes, key=lambda n: (fan_out[n], n))
+            rest = tuple(n for n in nodes if n != anchor)
+            self._activations.setdefault(anchor, []).append((position, rest))
+        
+        self._or_successors = or_successors
+        self.node_count = len(node_ids)
+    
+    def match(self, profile: Dict) -> List[Dict]:
+        """
+        Fire every rule whose conditions the profile satisfies
+        
+        Args:
+            profile: Student profile data
+        
+        Returns:
+            List of fired rule recommendations, in rule order
+        """
+        satisfied = []
+        for tests in self.fields.values():
+            tests.satisfied(profile, satisfied)
+        satisfied = set(satisfied)
+        
+        fired = []
+        activations = self._activations
+        or_successors = self._or_successors
+        
+        for node_id in satisfied:
+            for position, rest in activations.get(node_id, ()):
+                for other in rest:
+                    if other not in satisfied:
+                        break
+                else:
+                    fired.append(position)
+            fired.extend(or_successors.get(node_id, ()))
+        
+        rules = self.rules
+        return [rules[position].fire() for position in sorted(set(fired))]
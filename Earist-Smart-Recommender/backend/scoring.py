@@ -0,0 +1,182 @@
+"""
+Recommendation Scoring
+
+When several fired rules recommend the same program, a scorer combines
+their confidences into the program's score. Each rule contributes a
+small state tuple whose components are merged with max, sum or product
+only, so combining is order-independent and associative: partial states
+built in any rule order, or on different shards, threads or vectorized
+batches, merge to the same score.
+
+Scorers also bound the final score of a program from the rules that have
+fired for it so far and an "extent" summarizing the rules not evaluated
+yet, which lets top-k matching stop early (see RuleSet.match_top). The
+bounds are always valid, but only the max scorer's are tight enough to
+pay for themselves: a weighted mean can still fall and noisy-or evidence
+still pile up until the last rule, so those scorers match every rule.
+
+Scorers (weights come from Rule.weight, default 1):
+    max            strongest single rule, weight * confidence capped at 100
+    noisy_or       100 * (1 - prod(1 - weight * confidence / 100)); every
+                   extra matching rule adds evidence
+    weighted_mean  sum(weight * confidence) / sum(weight)
+"""
+
+import operator
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional, Tuple, Union
+
+# Identity element and merge function of each state component
+IDENTITY = {'max': float('-inf'), 'min': float('inf'), 'sum': 0.0, 'prod': 1.0}
+MERGE = {'max': max, 'min': min, 'sum': operator.add, 'prod': operator.mul}
+
+NEG_INF = float('-inf')
+
+State = Tuple[float, ...]
+
+
+class Scorer(ABC):
+    """
+    Base class for scorers
+    
+    Subclasses set name, ops (the merge operation of each state
+    component) and extent_ops, and implement rule_state, score, extent
+    and bounds. score must be plain arithmetic so it works on floats and
+    NumPy arrays alike.
+    """
+    
+    name = None
+    ops: Tuple[str, ...] = ()
+    extent_ops: Tuple[str, ...] = ()
+    # Whether the engine should stop matching early with this scorer's bounds
+    prunes = False
+    
+    @abstractmethod
+    def rule_state(self, confidence: float, weight: float) -> State:
+        """State contributed by one fired rule"""
+    
+    @abstractmethod
+    def score(self, state: State) -> float:
+        """Program score (0-100) of a merged state"""
+    
+    @abstractmethod
+    def extent(self, confidence: float, weight: float) -> State:
+        """Summary of one rule, merged over the rules not evaluated yet"""
+    
+    @abstractmethod
+    def bounds(self, state: Optional[State], extent: State) -> Tuple[float, float]:
+        """
+        Bounds on a program's final score
+        
+        Args:
+            state: Merged state of its rules fired so far (None if none has)
+            extent: Merged extent of its rules not evaluated yet, or of a
+                superset of them (empty_extent() if there are none)
+        
+        Returns:
+            (lower, upper); lower is -inf while no rule has fired
+        """
+    
+    def identity(self) -> State:
+        return tuple(IDENTITY[op] for op in self.ops)
+    
+    def merge(self, a: State, b: State) -> State:
+        """Merge two partial states (order does not matter)"""
+        return tuple(MERGE[op](x, y) for op, x, y in zip(self.ops, a, b))
+    
+    def empty_extent(self) -> State:
+        return tuple(IDENTITY[op] for op in self.extent_ops)
+    
+    def merge_extent(self, a: State, b: State) -> State:
+        return tuple(MERGE[op](x, y) for op, x, y in zip(self.extent_ops, a, b))
+    
+    def combine(self, rules: Iterable[Tuple[float, float]]) -> float:
+        """
+        Score of a program from its fired rules
+        
+        Args:
+            rules: (confidence, weight) of each fired rule
+        """
+        state = self.identity()
+        for confidence, weight in rules:
+            state = self.merge(state, self.rule_state(confidence, weight))
+        return self.score(state)
+    
+    def __repr__(self):
+        return f'<Scorer {self.name}>'
+
+
+class MaxScorer(Scorer):
+    name = 'max'
+    ops = ('max',)
+    extent_ops = ('max',)
+    prunes = True
+    
+    def rule_state(self, confidence, weight):
+        return (min(100.0, confidence * weight),)
+    
+    def score(self, state):
+        return state[0]
+    
+    def extent(self, confidence, weight):
+        return self.rule_state(confidence, weight)
+    
+    def bounds(self, state, extent):
+        lower = NEG_INF if state is None else state[0]
+        return lower, max(lower, extent[0])
+
+
+class NoisyOrScorer(Scorer):
+    name = 'noisy_or'
+    ops = ('prod',)
+    extent_ops = ('prod',)
+    
+    def rule_state(self, confidence, weight):
+        return (1.0 - min(100.0, confidence * weight) / 100.0,)
+    
+    def score(self, state):
+        return 100.0 * (1.0 - state[0])
+    
+    def extent(self, confidence, weight):
+        return self.rule_state(confidence, weight)
+    
+    def bounds(self, state, extent):
+        # Every further rule can only add evidence
+        if state is None:
+            return NEG_INF, self.score(extent)
+        return self.score(state), self.score((state[0] * extent[0],))
+
+
+class WeightedMeanScorer(Scorer):
+    name = 'weighted_mean'
+    ops = ('sum', 'sum')
+    extent_ops = ('max', 'min')
+    
+    def rule_state(self, confidence, weight):
+        return (confidence * weight, weight)
+    
+    def score(self, state):
+        # Rule weights are positive, so a scored program has state[1] > 0
+        return state[0] / state[1]
+    
+    def extent(self, confidence, weight):
+        return (confidence, confidence)
+    
+    def bounds(self, state, extent):
+        # A weighted mean stays between its smallest and largest terms
+        if state is None:
+            return NEG_INF, extent[0]
+        current = self.score(state)
+        return min(current, extent[1]), max(current, extent[0])
+
+
+SCORERS = {cls.name: cls for cls in (MaxScorer, NoisyOrScorer, WeightedMeanScorer)}
+
+
+def get_scorer(scorer: Union[str, Scorer]) -> Scorer:
+    """Scorer instance from a name ('max', 'noisy_or', 'weighted_mean') or instance"""
+    if isinstance(scorer, Scorer):
+        return scorer
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer: {scorer} (expected one of {', '.join(SCORERS)})")
+    return SCORERS[scorer]()
@@ -0,0 +1,35 @@
+"""
+Shared fixtures
+
+Every test app runs on its own in-memory database, migrated and seeded
+by create_app, and writes its files under pytest's tmp_path.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app
+    from config import TestingConfig
+    
+    class Config(TestingConfig):
+        MIGRATE_LOCK_FILE = str(tmp_path / 'migrate.lock')
+        REPORT_CACHE_DIR = str(tmp_path / 'reports')
+        COLLABORATIVE_MODEL_PATH = str(tmp_path / 'collaborative_model.json')
+    
+    app = create_app(Config, migrate=True)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
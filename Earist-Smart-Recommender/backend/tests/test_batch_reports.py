@@ -0,0 +1,69 @@
+"""
+Batch report jobs: the spawned render pool and pruning of old outputs
+"""
+
+import io
+import json
+import os
+import time
+import zipfile
+
+import batch_reports
+from batch_reports import BatchJobs, write_zip, zip_entry_name
+
+
+def report_data(student_id):
+    return {'key': (student_id, student_id, 0), 'student_name': f'Student {student_id}',
+            'strand': 'STEM', 'programs': [(1, 'Bachelor of Science in Computer Science')]}
+
+
+def test_write_zip_renders_on_a_process_pool(monkeypatch):
+    # Small chunks so five reports are spread over several workers
+    monkeypatch.setattr(batch_reports, 'CHUNK_SIZE', 2)
+    items = [report_data(student_id) for student_id in range(1, 6)]
+    done = []
+    
+    out = io.BytesIO()
+    write_zip(items, out, workers=2, progress=done.append)
+    
+    with zipfile.ZipFile(out) as archive:
+        assert archive.namelist() == [zip_entry_name(data) for data in items]
+        assert all(archive.read(name).startswith(b'%PDF') for name in archive.namelist())
+    assert done == [2, 4, 5]
+
+
+def make_job(jobs, job_id, state, size, age):
+    """Status and output files of a job last touched age seconds ago"""
+    os.makedirs(jobs.directory, exist_ok=True)
+    paths = [jobs._status_path(job_id), jobs.output_path(job_id, 'zip')]
+    with open(paths[0], 'w') as out:
+        json.dump({'job_id': job_id, 'status': state}, out)
+    with open(paths[1], 'wb') as out:
+        out.write(b'x' * size)
+    stamp = time.time() - age
+    for path in paths:
+        os.utime(path, (stamp, stamp))
+
+
+def test_prune_deletes_expired_jobs(tmp_path):
+    jobs = BatchJobs(str(tmp_path), max_age=3600, max_bytes=10 ** 6)
+    make_job(jobs, 'old', 'done', 100, age=7200)
+    make_job(jobs, 'stalled', 'running', 100, age=7200)
+    make_job(jobs, 'recent', 'done', 100, age=60)
+    
+    jobs.prune()
+    assert jobs.status('old') is None
+    assert jobs.status('stalled') is None
+    assert jobs.status('recent')['status'] == 'done'
+
+
+def test_prune_keeps_running_jobs_within_max_bytes(tmp_path):
+    jobs = BatchJobs(str(tmp_path), max_age=3600, max_bytes=2500)
+    make_job(jobs, 'running', 'running', 1000, age=300)
+    make_job(jobs, 'first', 'done', 1000, age=200)
+    make_job(jobs, 'second', 'failed', 1000, age=100)
+    make_job(jobs, 'third', 'done', 1000, age=10)
+    
+    jobs.prune()
+    assert [job for job in ('running', 'first', 'second', 'third') if jobs.status(job)] == \
+        ['running', 'third']
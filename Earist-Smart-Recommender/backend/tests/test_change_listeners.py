@@ -0,0 +1,80 @@
+"""
+Committed Program and Rule writes invalidate the in-process caches;
+rolled back ones do not. Writes the ORM never sees (another worker, a
+script, raw SQL) reach the caches through the stored change counters.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from db import StoredVersion, db
+from inference_engine import rule_set_cache
+from models import CacheVersion, Program, Rule
+from program_catalog import program_catalog
+
+
+def test_program_commit_invalidates_catalog(app):
+    version = program_catalog.version
+    program = db.session.get(Program, 1)
+    program.program_name = 'Renamed'
+    db.session.commit()
+    assert program_catalog.version == version + 1
+    assert program_catalog.get(1).program_name == 'Renamed'
+
+
+def test_rollback_keeps_catalog(app):
+    version = program_catalog.version
+    db.session.get(Program, 1).program_name = 'Discarded'
+    db.session.flush()
+    db.session.rollback()
+    assert program_catalog.version == version
+
+
+def test_rule_commit_invalidates_rule_set(app):
+    before = rule_set_cache.get()
+    rule = db.session.get(Rule, before.rules[0].rule_id)
+    rule.confidence_score = 71.0
+    db.session.commit()
+    after = rule_set_cache.get()
+    assert after.version != before.version
+    assert any(r.confidence == 71.0 for r in after.rules if r.rule_id == rule.rule_id)
+
+
+def write_elsewhere(statement):
+    """Run SQL on its own connection, outside the session and its listeners"""
+    with db.engine.begin() as connection:
+        connection.execute(text(statement))
+
+
+@pytest.fixture
+def check_every_time(app, monkeypatch):
+    monkeypatch.setattr(StoredVersion, 'interval', 0)
+
+
+def test_raw_program_update_reaches_catalog(check_every_time):
+    program_catalog.get(1)
+    write_elsewhere("UPDATE programs SET program_name = 'Elsewhere' WHERE program_id = 1")
+    
+    assert program_catalog.get(1).program_name == 'Elsewhere'
+    # Every worker derives Last-Modified from the same stored time
+    changed_at = db.session.get(CacheVersion, 'programs').updated_at
+    assert program_catalog.loaded_at == changed_at.replace(microsecond=0)
+
+
+def test_raw_rule_update_reaches_rule_set(check_every_time):
+    before = rule_set_cache.get()
+    rule_id = before.rules[0].rule_id
+    write_elsewhere(f"UPDATE rules SET confidence_score = 72 WHERE rule_id = '{rule_id}'")
+    
+    after = rule_set_cache.get()
+    assert after.version != before.version
+    assert [r.confidence for r in after.rules if r.rule_id == rule_id] == [72.0]
+    assert rule_set_cache.get() is after
+
+
+def test_stored_version_is_read_at_most_once_per_interval(app):
+    counter = StoredVersion('rules')
+    counter.interval = 3600
+    counter.changed()
+    write_elsewhere("UPDATE rules SET is_active = is_active")
+    assert not counter.changed()
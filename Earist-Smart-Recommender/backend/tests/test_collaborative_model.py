@@ -0,0 +1,89 @@
+"""
+Publishing collaborative models through the manifest
+
+A data file is never replaced in place (Windows cannot replace a file a
+worker has memory-mapped), and a model that cannot be read never takes
+the place of the one already serving. Boosts never push a
+recommendation that passed the confidence threshold below it.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+import pytest
+
+import collaborative_filtering
+from collaborative_filtering import collaborative_model, model_file, save_model
+from inference_engine import InferenceEngine
+
+
+def similarity(value):
+    return np.array([[0.0, value], [value, 0.0]])
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return str(tmp_path / 'collaborative_model.json')
+
+
+def test_each_training_publishes_a_new_data_file(manifest):
+    first = save_model(manifest, [1, 2], similarity(0.5))
+    assert model_file(manifest) == first
+    assert collaborative_model(manifest).similarity[0, 1] == 0.5
+    
+    second = save_model(manifest, [1, 2], similarity(0.25))
+    assert second != first
+    assert model_file(manifest) == second
+    assert glob.glob(os.path.join(os.path.dirname(manifest), '*.npy')) == [second]
+    assert collaborative_model(manifest).similarity[0, 1] == 0.25
+
+
+def test_mapped_old_data_file_is_left_behind(manifest, monkeypatch):
+    first = save_model(manifest, [1, 2], similarity(0.5))
+    
+    def locked(path):
+        raise PermissionError(path)
+    
+    monkeypatch.setattr(collaborative_filtering.os, 'remove', locked)
+    second = save_model(manifest, [1, 2], similarity(0.25))
+    assert os.path.exists(first)
+    assert model_file(manifest) == second
+    
+    monkeypatch.undo()
+    save_model(manifest, [1, 2], similarity(0.75))
+    assert not os.path.exists(first) and not os.path.exists(second)
+
+
+@pytest.mark.parametrize('content', ['{"file": "collaborative_model.1.npy"}', '[]', 'not json'])
+def test_unreadable_model_keeps_the_previous_one(manifest, content):
+    save_model(manifest, [1, 2], similarity(0.5))
+    serving = collaborative_model(manifest)
+    
+    with open(manifest, 'w') as out:
+        out.write(content)
+    os.utime(manifest, ns=(0, 0))
+    assert collaborative_model(manifest) is serving
+
+
+def test_no_model_until_trained(manifest):
+    assert collaborative_model(manifest) is None
+    with open(manifest, 'w') as out:
+        json.dump({'file': 'missing.npy'}, out)
+    assert collaborative_model(manifest) is None
+
+
+def test_boosts_keep_recommendations_above_min_score(manifest):
+    save_model(manifest, [1, 2, 3], np.full((3, 3), -1.0) + np.eye(3))
+    engine = InferenceEngine(None, cache_size=0, min_score=70.0, collaborative_weight=5.0,
+                             collaborative_model=lambda: collaborative_model(manifest))
+    ranked = [{'program_id': 1, 'confidence': 72.0, 'rank': 1},
+              {'program_id': 2, 'confidence': 71.0, 'rank': 2},
+              # A content fallback, already below the threshold
+              {'program_id': 3, 'confidence': 40.0, 'rank': 3}]
+    
+    reranked = engine.rerank_collaborative(ranked)
+    
+    assert [(rec['program_id'], rec['confidence']) for rec in reranked] == \
+        [(1, 70.0), (2, 70.0), (3, 35.0)]
@@ -0,0 +1,108 @@
+"""
+Student feedback on a recommendation
+
+Only the three feedback values are stored; anything else is rejected
+before it reaches the recommendation or the dashboard counters. Students
+rate only their own recommendations, and repeating a vote counts once.
+"""
+
+import pytest
+
+import dashboard_stats
+from db import db
+from models import SKILL_FIELDS, Recommendation
+from persistence import save_submission
+
+
+def store_recommendation(name):
+    """Id of a new student's only recommendation, without feedback"""
+    payload = {
+        'name': name,
+        'grade_level': '11',
+        'strand': 'ABM',
+        'email': None,
+        'favorite_subjects': ['Accounting'],
+        'skills': {skill: 3 for skill in SKILL_FIELDS},
+        'interests': ['Business'],
+        'learning_style': 'Collaborative/Group work',
+        'career_goals': ''
+    }
+    recommendations = [{'program_id': 1, 'rank': 1, 'confidence': 80.0,
+                        'justification': 'Reason', 'rules_triggered': []}]
+    student_id, _ = save_submission(payload, recommendations)
+    db.session.remove()
+    return Recommendation.query.filter_by(student_id=student_id).one().recommendation_id
+
+
+@pytest.fixture
+def recommendation_id(app, client):
+    """A recommendation of the student logged in on client"""
+    recommendation_id = store_recommendation('Feedback')
+    with client.session_transaction() as session:
+        session['student_id'] = db.session.get(Recommendation, recommendation_id).student_id
+    return recommendation_id
+
+
+def test_feedback_is_stored_and_counted(client, recommendation_id):
+    before = dashboard_stats.read()
+    
+    response = client.post('/api/feedback', json={'recommendation_id': recommendation_id,
+                                                  'feedback': 'helpful'})
+    assert response.status_code == 200
+    
+    after = dashboard_stats.read()
+    assert after['feedback:helpful'] == before.get('feedback:helpful', 0) + 1
+    assert after['feedback:no_feedback'] == before['feedback:no_feedback'] - 1
+    assert db.session.get(Recommendation, recommendation_id).student_feedback == 'helpful'
+
+
+@pytest.mark.parametrize('feedback', ['great', 'no_feedback', '', None, 1])
+def test_unknown_feedback_is_rejected(client, recommendation_id, feedback):
+    before = dashboard_stats.read()
+    
+    response = client.post('/api/feedback', json={'recommendation_id': recommendation_id,
+                                                  'feedback': feedback})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    
+    db.session.remove()
+    assert db.session.get(Recommendation, recommendation_id).student_feedback == 'no_feedback'
+    assert dashboard_stats.read() == before
+
+
+def test_repeated_feedback_counts_once(client, recommendation_id):
+    vote = {'recommendation_id': recommendation_id, 'feedback': 'not_helpful'}
+    assert client.post('/api/feedback', json=vote).status_code == 200
+    once = dashboard_stats.read()
+    
+    for _ in range(3):
+        assert client.post('/api/feedback', json=vote).status_code == 200
+    assert dashboard_stats.read() == once
+
+
+def test_feedback_needs_the_owning_student(app, recommendation_id):
+    others = store_recommendation('Other')
+    before = dashboard_stats.read()
+    
+    anonymous = app.test_client()
+    response = anonymous.post('/api/feedback', json={'recommendation_id': recommendation_id,
+                                                     'feedback': 'helpful'})
+    assert response.status_code == 401
+    
+    owner = app.test_client()
+    with owner.session_transaction() as session:
+        session['student_id'] = db.session.get(Recommendation, recommendation_id).student_id
+    response = owner.post('/api/feedback', json={'recommendation_id': others,
+                                                 'feedback': 'helpful'})
+    assert response.status_code == 404
+    
+    db.session.remove()
+    assert db.session.get(Recommendation, others).student_feedback == 'no_feedback'
+    assert dashboard_stats.read() == before
+
+
+def test_feedback_deltas_rejects_unknown_values():
+    assert dashboard_stats.feedback_deltas('no_feedback', 'not_helpful') == {
+        'feedback:no_feedback': -1, 'feedback:not_helpful': 1}
+    with pytest.raises(ValueError):
+        dashboard_stats.feedback_deltas('helpful', 'great')
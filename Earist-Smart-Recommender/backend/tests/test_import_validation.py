@@ -0,0 +1,76 @@
+"""
+Bulk-import validation reports bad rows instead of failing the batch
+"""
+
+import io
+import json
+
+import pytest
+
+from import_data import read_payloads, validate
+from models import SKILL_FIELDS
+
+
+def payload(**overrides):
+    data = {
+        'name': 'Ana Santos',
+        'grade_level': '12',
+        'strand': 'STEM',
+        'email': 'ana@example.com',
+        'favorite_subjects': ['Mathematics'],
+        'skills': {skill: 4 for skill in SKILL_FIELDS},
+        'interests': ['Technology'],
+        'learning_style': 'Hands-on/Practical learning'
+    }
+    data.update(overrides)
+    return data
+
+
+def jsonl(*rows):
+    return io.StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+
+
+def test_valid_row_is_normalized():
+    rows = [payload(grade_level=12, skills={skill: '3' for skill in SKILL_FIELDS})]
+    
+    assert validate(rows) == [[]]
+    assert rows[0]['skills'] == {skill: 3 for skill in SKILL_FIELDS}
+    assert rows[0]['grade_level'] == '12'
+
+
+@pytest.mark.parametrize('skills', [[4, 4, 4], 'analytical=4', 5])
+def test_skills_that_are_not_an_object_are_a_row_error(skills):
+    payloads, _, parse_errors = read_payloads(jsonl(payload(skills=skills), payload(email=None)),
+                                              'jsonl')
+    
+    errors = validate(payloads)
+    assert parse_errors == []
+    assert errors[0] == ['skills must map each skill to a rating']
+    assert errors[1] == []
+
+
+def test_unknown_strand_and_bad_rating_are_reported():
+    skills = dict({skill: 4 for skill in SKILL_FIELDS}, analytical=6)
+    
+    errors = validate([payload(strand='SPORTS', skills=skills)])
+    assert 'skill_analytical must be a whole number from 1 to 5' in errors[0]
+    assert any(error.startswith('strand must be one of') for error in errors[0])
+
+
+@pytest.mark.parametrize('value', [5, {}, {'Technology': True}, 0])
+def test_list_field_of_the_wrong_type_is_a_parse_error(value):
+    payloads, row_numbers, parse_errors = read_payloads(
+        jsonl(payload(interests=value), payload(email=None)), 'jsonl')
+    
+    assert row_numbers == [2]
+    assert len(payloads) == 1
+    assert parse_errors == [(1, 'interests: expected a list or a string, got '
+                                f'{type(value).__name__}')]
+
+
+def test_padded_values_are_stored_stripped():
+    rows = [payload(name='  Ana Santos ', strand=' STEM ')]
+    
+    assert validate(rows) == [[]]
+    assert rows[0]['strand'] == 'STEM'
+    assert rows[0]['name'] == 'Ana Santos'
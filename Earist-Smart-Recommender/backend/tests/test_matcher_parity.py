@@ -0,0 +1,146 @@
+"""
+The linear, indexed and rete matchers fire the same rules
+
+Profiles are drawn at random from the values the seeded rules test
+(plus values no rule mentions, missing fields and malformed, NaN or
+infinite ratings), so most of them fire several rules. Engines that stop
+matching early (top-k pruning) must rank them exactly like full matching.
+"""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+from db import db
+from inference_engine import InferenceEngine, RuleSet, load_rule_set
+from models import SKILL_FIELDS
+
+PROFILES = 2000
+
+# Ratings that parse as floats but are not finite
+NON_FINITE = [float('nan'), 'nan', float('inf'), '-inf']
+
+
+def rule_vocabulary(rule_set):
+    """Values each profile field is compared with, from ==, IN and CONTAINS criteria"""
+    values = defaultdict(set)
+    
+    def collect(conditions):
+        for criterion in conditions.get('criteria', []):
+            if 'criteria' in criterion:
+                collect(criterion)
+            elif criterion['operator'] == 'IN':
+                values[criterion['field']].update(criterion['value'])
+            elif criterion['operator'] in ('==', 'CONTAINS'):
+                values[criterion['field']].add(criterion['value'])
+    
+    for rule in rule_set.rules:
+        collect(rule.conditions)
+    return {field: sorted(found) + ['Unlisted'] for field, found in values.items()}
+
+
+def random_profile(rng, vocabulary):
+    def pick(field):
+        return rng.choice(vocabulary.get(field, ['Unlisted']))
+    
+    def sample(field):
+        options = vocabulary.get(field, ['Unlisted'])
+        return rng.sample(options, rng.randint(0, min(4, len(options))))
+    
+    profile = {
+        'strand': pick('strand'),
+        'favorite_subjects': sample('favorite_subjects'),
+        'skills': {skill: rng.randint(1, 5) for skill in SKILL_FIELDS},
+        'interests': sample('interests'),
+        'learning_style': pick('learning_style'),
+        'career_goals': ''
+    }
+    
+    roll = rng.random()
+    if roll < 0.05:
+        del profile['skills'][rng.choice(SKILL_FIELDS)]
+    elif roll < 0.07:
+        profile['skills'][rng.choice(SKILL_FIELDS)] = 'n/a'
+    elif roll < 0.08:
+        profile['skills'][rng.choice(SKILL_FIELDS)] = rng.choice(NON_FINITE)
+    elif roll < 0.10:
+        del profile[rng.choice(['strand', 'interests', 'learning_style'])]
+    return profile
+
+
+@pytest.fixture
+def seeded_rules(app):
+    return load_rule_set()
+
+
+def test_matchers_fire_identical_rules(seeded_rules):
+    rng = random.Random(20)
+    vocabulary = rule_vocabulary(seeded_rules)
+    profiles = [random_profile(rng, vocabulary) for _ in range(PROFILES)]
+    
+    fired = 0
+    for profile in profiles:
+        results = {matcher: seeded_rules.match(profile, matcher) for matcher in RuleSet.MATCHERS}
+        assert results['indexed'] == results['linear'], profile
+        assert results['rete'] == results['linear'], profile
+        fired += len(results['linear'])
+    
+    # The profiles must exercise the rules, not only miss them
+    assert fired > PROFILES // 4
+
+
+@pytest.mark.parametrize('rating', NON_FINITE)
+def test_non_finite_ratings(seeded_rules, rating):
+    profile = {
+        'strand': 'STEM',
+        'favorite_subjects': [],
+        'skills': {skill: rating for skill in SKILL_FIELDS},
+        'interests': [],
+        'learning_style': 'Unlisted',
+        'career_goals': ''
+    }
+    
+    linear = seeded_rules.match(profile, 'linear')
+    for matcher in RuleSet.MATCHERS:
+        assert seeded_rules.match(profile, matcher) == linear, matcher
+    
+    batch = seeded_rules.batch.recommend([profile], limit=len(seeded_rules), min_score=0)
+    assert sorted(rec['program_id'] for rec in batch[0]) == \
+        sorted({rec['program_id'] for rec in linear})
+
+
+@pytest.mark.parametrize('scorer', ['weighted_mean', 'max', 'noisy_or'])
+def test_engine_from_config_ranks_like_full_matching(app, seeded_rules, monkeypatch, scorer):
+    pruned_calls = []
+    match_top = RuleSet.match_top
+    
+    def spy(self, *args, **kwargs):
+        pruned_calls.append(args)
+        return match_top(self, *args, **kwargs)
+    
+    monkeypatch.setattr(RuleSet, 'match_top', spy)
+    monkeypatch.setitem(app.config, 'RECOMMENDATION_SCORER', scorer)
+    engine = InferenceEngine.from_config(db, app.config)
+    engine.result_cache = None
+    full = InferenceEngine(db, matcher='linear', cache_size=0, scorer=scorer,
+                           similarity_weight=0, similarity_fallback=False)
+    
+    rng = random.Random(23)
+    vocabulary = rule_vocabulary(seeded_rules)
+    profiles = [random_profile(rng, vocabulary) for _ in range(PROFILES // 4)]
+    for profile in profiles:
+        assert engine.generate_recommendations(profile) == \
+            full.generate_recommendations(profile), profile
+    # The default configuration leaves the content stage off, so scorers
+    # with tight bounds prune
+    assert len(pruned_calls) == (len(profiles) if engine.scorer.prunes else 0)
+
+
+def test_content_scoring_disables_pruning(app, seeded_rules, monkeypatch):
+    monkeypatch.setattr(RuleSet, 'match_top', None)
+    engine = InferenceEngine(db, cache_size=0, scorer='max', similarity_weight=0.2)
+    
+    rng = random.Random(24)
+    assert engine.content_model() is not None
+    engine.generate_recommendations(random_profile(rng, rule_vocabulary(seeded_rules)))
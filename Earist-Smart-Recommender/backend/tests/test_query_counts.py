@@ -0,0 +1,102 @@
+"""
+Statement counts of the pages that show a student's recommendations
+
+Recommendations are loaded with their programs in one query
+(Recommendation.for_student), so these counts must not grow with the
+number of recommendations. A regression to per-row lazy loading shows up
+here as extra statements.
+"""
+
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from db import db
+from models import SKILL_FIELDS
+from persistence import save_submission
+
+RECOMMENDATIONS = 5
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements executed inside the block"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def student_id(app):
+    """A student with RECOMMENDATIONS stored recommendations"""
+    payload = {
+        'name': 'Query Count',
+        'grade_level': '12',
+        'strand': 'STEM',
+        'email': None,
+        'favorite_subjects': ['Mathematics'],
+        'skills': {skill: 4 for skill in SKILL_FIELDS},
+        'interests': ['Technology'],
+        'learning_style': 'Hands-on/Practical learning',
+        'career_goals': ''
+    }
+    recommendations = [{
+        'program_id': program_id,
+        'rank': program_id,
+        'confidence': 90.0 - program_id,
+        'justification': f'Reason {program_id}',
+        'rules_triggered': []
+    } for program_id in range(1, RECOMMENDATIONS + 1)]
+    student_id, _ = save_submission(payload, recommendations)
+    # Requests must load everything themselves
+    db.session.remove()
+    return student_id
+
+
+def test_results_page_queries(client, student_id):
+    with client.session_transaction() as session:
+        session['student_id'] = student_id
+    
+    with count_statements() as statements:
+        response = client.get('/results')
+    
+    assert response.status_code == 200
+    assert response.data.count(b'Reason ') == RECOMMENDATIONS
+    # The student, then the recommendations joined to their programs
+    assert len(statements) == 2, statements
+
+
+def test_download_report_queries(client, student_id):
+    with client.session_transaction() as session:
+        session['student_id'] = student_id
+    
+    with count_statements() as statements:
+        response = client.get(f'/api/download-report/{student_id}')
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert len(statements) == 2, statements
+
+
+def test_download_report_requires_owner_or_admin(app, client, student_id):
+    assert client.get(f'/api/download-report/{student_id}').status_code == 403
+    with client.session_transaction() as session:
+        session['student_id'] = student_id + 1
+    assert client.get(f'/api/download-report/{student_id}').status_code == 403
+    # Nothing was rendered or cached for the refused requests
+    cache_dir = app.config['REPORT_CACHE_DIR']
+    assert not os.path.isdir(cache_dir) or not os.listdir(cache_dir)
+    
+    with client.session_transaction() as session:
+        del session['student_id']
+        session['admin_id'] = 1
+    assert client.get(f'/api/download-report/{student_id}').status_code == 200
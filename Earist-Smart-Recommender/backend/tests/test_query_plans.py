@@ -0,0 +1,74 @@
+"""
+The hot lookups must be served by their secondary indexes
+
+Runs migrate() on a fresh SQLite file and checks the EXPLAIN QUERY PLAN
+of every query that runs on page views: each must name its ix_* index
+and must not need a temporary B-tree for sorting. A plan that stops
+using an index (a dropped index, a reordered ORDER BY, a new filter)
+fails here.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from db import db
+from migrate_database import migrate
+from models import QuestionnaireResponse, Recommendation, RecommendationRule, Rule, Student
+
+# (description, query builder, expected index)
+HOT_QUERIES = [
+    ('recommendations of a student by rank',
+     lambda: Recommendation.for_student(1), 'ix_recommendations_student_rank'),
+    ('recommendations of a response',
+     lambda: Recommendation.query.filter(Recommendation.response_id.in_([1, 2])),
+     'ix_recommendations_response'),
+    ('latest registered students',
+     lambda: Student.query.order_by(Student.date_registered.desc(),
+                                    Student.student_id.desc()).limit(10),
+     'ix_students_date_registered'),
+    ('students of a strand, newest first',
+     lambda: Student.query.filter(Student.strand == 'STEM')
+     .order_by(Student.date_registered.desc(), Student.student_id.desc()).limit(20),
+     'ix_students_strand_registered'),
+    ('responses submitted since a date',
+     lambda: QuestionnaireResponse.query.filter(QuestionnaireResponse.response_date >= '2025-01-01'),
+     'ix_responses_date'),
+    ('recommendations a rule fired for',
+     lambda: RecommendationRule.query.filter_by(rule_id='RULE007'), 'ix_recommendation_rules_rule'),
+    ('active rules',
+     lambda: Rule.query.filter_by(is_active=True), 'ix_rules_active_program'),
+]
+
+
+@pytest.fixture(scope='module')
+def migrated(tmp_path_factory):
+    """App on a temporary SQLite file brought up to date by migrate()"""
+    from app import create_app
+    from config import TestingConfig
+    
+    directory = tmp_path_factory.mktemp('plans')
+    
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{directory / 'plans.db'}"
+        MIGRATE_LOCK_FILE = str(directory / 'migrate.lock')
+        REPORT_CACHE_DIR = str(directory / 'reports')
+    
+    app = create_app(Config, migrate=False)
+    with app.app_context():
+        migrate(db)
+        yield app
+
+
+def explain(query):
+    """EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    sql = str(query.statement.compile(dialect=db.engine.dialect,
+                                      compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+@pytest.mark.parametrize('description, build, index_name', HOT_QUERIES,
+                         ids=[description for description, _, _ in HOT_QUERIES])
+def test_hot_query_uses_index(migrated, description, build, index_name):
+    plan = explain(build())
+    assert any(index_name in line for line in plan), plan
+    assert not any('TEMP B-TREE' in line for line in plan), plan
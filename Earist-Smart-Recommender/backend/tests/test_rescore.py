@@ -0,0 +1,35 @@
+"""
+Re-scoring stored responses with the app's engine settings
+
+The job and its pool workers take every setting from the app's config,
+never from the Config class defaults.
+"""
+
+from db import db
+from inference_engine import load_rule_set
+from models import SKILL_FIELDS, Recommendation
+from persistence import save_submission
+from rescore_recommendations import rescore
+
+
+def test_rescore_uses_the_app_config(app, monkeypatch):
+    payload = {
+        'name': 'Rescore',
+        'grade_level': '12',
+        'strand': 'STEM',
+        'email': None,
+        'favorite_subjects': ['Mathematics', 'Science'],
+        'skills': {skill: 5 for skill in SKILL_FIELDS},
+        'interests': ['Technology', 'Engineering'],
+        'learning_style': 'Hands-on/Practical learning',
+        'career_goals': ''
+    }
+    student_id, _ = save_submission(payload, [])
+    db.session.remove()
+    
+    monkeypatch.setitem(app.config, 'MAX_RECOMMENDATIONS', 1)
+    monkeypatch.setitem(app.config, 'MIN_CONFIDENCE_SCORE', 0.0)
+    responses, written, _ = rescore(db, load_rule_set(), workers=0)
+    
+    assert (responses, written) == (1, 1)
+    assert Recommendation.query.filter_by(student_id=student_id).count() == 1
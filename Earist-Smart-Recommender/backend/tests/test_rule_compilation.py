@@ -0,0 +1,39 @@
+"""
+A non-numeric rating fails only the criterion that compares it
+
+Every matcher, and the vectorised batch path, must agree: an OR rule
+still fires on its other criteria, an AND rule does not.
+"""
+
+import pytest
+
+from inference_engine import CompiledRule, RuleSet
+
+CRITERIA = [
+    {'field': 'skills.analytical', 'operator': '>=', 'value': 4},
+    {'field': 'interests', 'operator': 'CONTAINS', 'value': 'Technology'}
+]
+
+
+def rule_set(operator):
+    rule = CompiledRule(rule_id=1, program_id=7, confidence=80.0, justification='Reason',
+                        conditions={'operator': operator, 'criteria': CRITERIA})
+    return RuleSet([rule])
+
+
+def profile(analytical):
+    return {'strand': 'STEM', 'skills': {'analytical': analytical},
+            'interests': ['Technology']}
+
+
+@pytest.mark.parametrize('analytical', ['n/a', None])
+@pytest.mark.parametrize('operator, fires', [('OR', True), ('AND', False)])
+def test_non_numeric_rating_fails_only_its_criterion(analytical, operator, fires):
+    rules = rule_set(operator)
+    student = profile(analytical)
+    
+    for matcher in RuleSet.MATCHERS:
+        assert bool(rules.match(student, matcher)) is fires, matcher
+    
+    batch = rules.batch.recommend([student], limit=5, min_score=0)
+    assert [rec['program_id'] for rec in batch[0]] == ([7] if fires else [])
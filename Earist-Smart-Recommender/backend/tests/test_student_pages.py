@@ -0,0 +1,77 @@
+"""
+Keyset pagination of the student listing
+
+Databases created before students.date_registered was NOT NULL may hold
+students without one; migrate() backfills them so paging never meets a
+NULL in its (date_registered, student_id) cursor.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from db import db
+from migrate_database import UNKNOWN_REGISTRATION, migrate
+from models import STRANDS, QuestionnaireResponse, Student
+
+
+@pytest.fixture
+def legacy_app(tmp_path, monkeypatch):
+    """App whose students table was created with a nullable date_registered"""
+    from app import create_app
+    from config import TestingConfig
+    
+    class Config(TestingConfig):
+        MIGRATE_LOCK_FILE = str(tmp_path / 'migrate.lock')
+        REPORT_CACHE_DIR = str(tmp_path / 'reports')
+    
+    app = create_app(Config, migrate=False)
+    with app.app_context():
+        with monkeypatch.context() as patch:
+            patch.setattr(Student.__table__.c.date_registered, 'nullable', True)
+            db.create_all()
+        yield app
+
+
+def test_migrate_backfills_missing_registration_dates(legacy_app):
+    responded = datetime(2025, 6, 1, 9, 30)
+    students = Student.__table__
+    db.session.execute(insert(students), [
+        {'student_id': 1, 'student_name': 'Dated', 'grade_level': '12', 'strand': 'STEM',
+         'date_registered': datetime(2025, 7, 1)},
+        {'student_id': 2, 'student_name': 'Responded', 'grade_level': '12', 'strand': 'ABM',
+         'date_registered': None},
+        {'student_id': 3, 'student_name': 'Unknown', 'grade_level': '11', 'strand': 'GAS',
+         'date_registered': None},
+    ])
+    db.session.execute(insert(QuestionnaireResponse.__table__), [{
+        'student_id': 2, 'favorite_subjects': 'Mathematics', 'interests': 'Business',
+        'response_date': responded
+    }])
+    db.session.commit()
+    
+    migrate(db)
+    db.session.remove()
+    
+    assert db.session.get(Student, 2).date_registered == responded
+    assert db.session.get(Student, 3).date_registered == UNKNOWN_REGISTRATION
+    
+    seen, cursor = [], None
+    while True:
+        page, cursor = Student.keyset_page(1, after=cursor)
+        seen.extend(student.student_id for student in page)
+        if cursor is None:
+            break
+    assert seen == [1, 2, 3]
+
+
+def test_strand_filters_list_every_strand(client):
+    with client.session_transaction() as session:
+        session['admin_id'] = 1
+    
+    page = client.get('/admin/students?strand=HUMSS').get_data(as_text=True)
+    
+    for strand in STRANDS:
+        assert page.count(f'<option value="{strand}"') == 2
+    assert page.count('<option value="HUMSS" selected>') == 2